@@ -0,0 +1,187 @@
+"""
+Adaptive Inference Control Module.
+Feedback controller that picks, per camera, how often to run YOLO (the
+inference stride) and at which resolution, so every camera gets as close as
+possible to a target detection rate while total inference work stays inside a
+node-wide CPU budget.
+"""
+
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Sequence
+
+
+class _CameraState:
+    """Measurements and current settings for one camera."""
+
+    def __init__(self, stride: int, size_index: int):
+        self.stride = stride
+        self.size_index = size_index
+        self.frames_since_inference = 0
+        self.frame_fps = 0.0
+        self.latency = 0.0
+        self.last_frame_ts: Optional[float] = None
+        self.last_size_change = 0.0
+
+
+class AdaptiveStrideController:
+    """Per-camera stride/resolution controller under a shared inference budget."""
+
+    def __init__(
+        self,
+        target_fps: float = 6.0,
+        cpu_budget: float = 0.8,
+        initial_stride: int = 5,
+        min_stride: int = 1,
+        max_stride: int = 30,
+        sizes: Sequence[int] = (320, 384, 416, 480),
+        initial_size: int = 480,
+        adaptive_resolution: bool = True,
+        load_probe: Optional[Callable[[], Dict[str, float]]] = None,
+        size_cooldown: float = 5.0,
+        active_window: float = 5.0
+    ):
+        """
+        Initialize the controller.
+
+        Args:
+            target_fps: Desired detections per second per camera
+            cpu_budget: Fraction of the inference worker's time that may be busy
+                        (1.0 = inference runs back to back)
+            initial_stride: Stride used before any measurements exist
+            min_stride, max_stride: Bounds for the inference stride
+            sizes: Allowed inference resolutions (multiples of 32), ascending
+            initial_size: Starting (and maximum) resolution
+            adaptive_resolution: Allow stepping the resolution down/up
+            load_probe: Callable returning {"frame_cost_s", "queue_depth",
+                        "max_batch_size"} for the shared inference worker
+            size_cooldown: Minimum seconds between resolution changes per camera
+            active_window: Cameras without frames for this long are ignored
+        """
+        self.target_fps = target_fps
+        self.cpu_budget = cpu_budget
+        self.min_stride = max(1, min_stride)
+        self.max_stride = max(self.min_stride, max_stride)
+        self.sizes = sorted({s for s in sizes if s < initial_size} | {initial_size})
+        self.initial_stride = min(max(initial_stride, self.min_stride), self.max_stride)
+        self.adaptive_resolution = adaptive_resolution
+        self.load_probe = load_probe
+        self.size_cooldown = size_cooldown
+        self.active_window = active_window
+
+        self._cameras: Dict[str, _CameraState] = {}
+        self._lock = threading.Lock()
+
+    def should_infer(self, camera: str) -> bool:
+        """
+        Record a new frame for a camera and decide whether to run inference on it.
+
+        Returns:
+            True if this frame should go to the model
+        """
+        now = time.time()
+        with self._lock:
+            state = self._state(camera)
+            if state.last_frame_ts is not None and now > state.last_frame_ts:
+                state.frame_fps = _ema(state.frame_fps, 1.0 / (now - state.last_frame_ts))
+            state.last_frame_ts = now
+
+            state.frames_since_inference += 1
+            if state.frames_since_inference < state.stride:
+                return False
+            state.frames_since_inference = 0
+            return True
+
+    def inference_size(self, camera: str) -> int:
+        """Current inference resolution for a camera."""
+        with self._lock:
+            return self.sizes[self._state(camera).size_index]
+
+    def record_inference(self, camera: str, latency: float):
+        """
+        Feed back the wall time of one inference and re-plan strides.
+
+        Args:
+            camera: Camera identifier
+            latency: Seconds from submitting the frame to getting its result
+        """
+        with self._lock:
+            self._state(camera).latency = _ema(self._state(camera).latency, latency)
+        self._replan(camera)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            cameras = {
+                name: {
+                    "stride": state.stride,
+                    "inference_size": self.sizes[state.size_index],
+                    "frame_fps": round(state.frame_fps, 1),
+                    "detection_fps": round(state.frame_fps / state.stride, 1),
+                    "latency_ms": round(state.latency * 1000, 1),
+                }
+                for name, state in self._cameras.items()
+            }
+        return {
+            "target_fps": self.target_fps,
+            "cpu_budget": self.cpu_budget,
+            "cameras": cameras,
+        }
+
+    def _state(self, camera: str) -> _CameraState:
+        state = self._cameras.get(camera)
+        if state is None:
+            state = _CameraState(self.initial_stride, len(self.sizes) - 1)
+            self._cameras[camera] = state
+        return state
+
+    def _replan(self, camera: str):
+        """Recompute the stride (and possibly resolution) for one camera."""
+        load = self.load_probe() if self.load_probe else {}
+        now = time.time()
+
+        with self._lock:
+            state = self._state(camera)
+            active = [
+                s for s in self._cameras.values()
+                if s.last_frame_ts is not None and now - s.last_frame_ts < self.active_window
+            ] or [state]
+
+            frame_fps = state.frame_fps or (self.target_fps * state.stride)
+            frame_cost = load.get("frame_cost_s") or state.latency
+            if frame_cost <= 0:
+                return
+
+            # Fair share of the budget: detections/sec this camera may run
+            share_fps = self.cpu_budget / (frame_cost * len(active))
+            allowed_fps = min(self.target_fps, share_fps)
+            stride = math.ceil(frame_fps / allowed_fps) if allowed_fps > 0 else self.max_stride
+
+            # Frames piling up in the shared queue means we are over budget
+            max_batch = load.get("max_batch_size", 1)
+            if load.get("queue_depth", 0) > max_batch:
+                stride = max(stride, state.stride + 1)
+
+            state.stride = min(max(stride, self.min_stride), self.max_stride)
+
+            if not self.adaptive_resolution or now - state.last_size_change < self.size_cooldown:
+                return
+
+            size = self.sizes[state.size_index]
+            if share_fps < self.target_fps and state.size_index > 0:
+                # Budget cannot reach the target rate: trade resolution for rate
+                state.size_index -= 1
+                state.last_size_change = now
+                print(f"[INFO] Camera {camera}: inference size lowered to {self.sizes[state.size_index]}")
+            elif state.size_index < len(self.sizes) - 1:
+                # Cost grows roughly with pixel count; raise only if the target
+                # would still be met with margin at the next resolution
+                larger = self.sizes[state.size_index + 1]
+                if share_fps * (size / larger) ** 2 > 1.25 * self.target_fps:
+                    state.size_index += 1
+                    state.last_size_change = now
+                    print(f"[INFO] Camera {camera}: inference size raised to {larger}")
+
+
+def _ema(current: float, sample: float, alpha: float = 0.2) -> float:
+    return sample if current == 0 else (1 - alpha) * current + alpha * sample
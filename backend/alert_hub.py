@@ -0,0 +1,133 @@
+"""
+Alert Hub Module.
+In-process fan-out of new alerts to push subscribers (/alerts/stream over
+Server-Sent Events or WebSocket). Publishers only wake the waiting
+subscribers; each subscriber then reads the alerts after its own cursor from
+the AlertStore by id, so a slow client never holds up the others and a
+reconnecting client resumes from its Last-Event-ID. Each alert is serialized
+once, however many subscribers receive it.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from alert_store import AlertStore
+from async_stream import AsyncFrameNotifier
+
+
+Alert = Dict[str, Any]
+
+
+class AlertHub:
+    """Wakes alert stream subscribers and hands them new alerts in id order."""
+
+    def __init__(
+        self,
+        store: AlertStore,
+        snapshot: Optional[Callable[[], Dict[str, Any]]] = None,
+        heartbeat_interval: float = 15.0,
+        batch_limit: int = 500,
+        encoded_cache_size: int = 4096
+    ):
+        """
+        Initialize the hub.
+
+        Args:
+            store: Alert store the subscribers read from
+            snapshot: Optional statistics callable pushed after new alerts (e.g. /stats)
+            heartbeat_interval: Seconds without alerts before a heartbeat is sent
+            batch_limit: Most alerts handed to a subscriber per wakeup
+            encoded_cache_size: Serialized alerts kept for reuse across subscribers
+        """
+        self.store = store
+        self.snapshot = snapshot
+        self.heartbeat_interval = heartbeat_interval
+        self.batch_limit = max(1, batch_limit)
+        self._notifier = AsyncFrameNotifier()
+        self._encoded: "OrderedDict[int, str]" = OrderedDict()
+        self._encoded_cache_size = max(1, encoded_cache_size)
+        self._stats: Tuple[int, Optional[str]] = (0, None)
+
+        # Statistics
+        self.subscribers = 0
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, alert: Alert):
+        """Announce an alert already added to the store (callable from any thread)."""
+        self.published += 1
+        self._notifier.notify()
+
+    def encode(self, alert: Alert) -> str:
+        """JSON text of an alert, serialized once and shared by all subscribers."""
+        alert_id = alert["id"]
+        text = self._encoded.get(alert_id)
+        if text is None:
+            text = json.dumps(alert, default=str)
+            self._encoded[alert_id] = text
+            if len(self._encoded) > self._encoded_cache_size:
+                self._encoded.popitem(last=False)
+        return text
+
+    def encoded_stats(self) -> Optional[str]:
+        """JSON text of snapshot() as of the newest alert, computed once per alert."""
+        if self.snapshot is None:
+            return None
+        last_id, text = self._stats
+        if text is None or last_id != self.store.last_id:
+            last_id = self.store.last_id
+            text = json.dumps(self.snapshot(), default=str)
+            self._stats = (last_id, text)
+        return text
+
+    async def subscribe(
+        self,
+        last_event_id: Optional[int] = None,
+        type: Optional[str] = None,
+        zone: Optional[str] = None
+    ) -> AsyncIterator[List[Alert]]:
+        """
+        Yield batches of new alerts; an empty batch means a heartbeat is due.
+
+        Args:
+            last_event_id: Resume after this alert id (None = only new alerts)
+            type, zone: Optional exact-match filters
+        """
+        store = self.store
+        cursor = store.last_id if last_event_id is None else last_event_id
+        last_sent = time.monotonic()
+        self.subscribers += 1
+        try:
+            while True:
+                timeout = max(0.0, last_sent + self.heartbeat_interval - time.monotonic())
+                await self._notifier.wait(lambda: store.last_id > cursor, timeout)
+                alerts = store.after_id(cursor, self.batch_limit)
+                if alerts:
+                    cursor = alerts[-1]["id"]
+                if alerts and (type is not None or zone is not None):
+                    alerts = [
+                        a for a in alerts
+                        if (type is None or a.get("type") == type) and (zone is None or a.get("zone") == zone)
+                    ]
+                if alerts:
+                    self.delivered += len(alerts)
+                elif time.monotonic() - last_sent < self.heartbeat_interval:
+                    continue  # Only filtered-out alerts arrived
+                last_sent = time.monotonic()
+                yield alerts
+        finally:
+            self.subscribers -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+def sse_event(alert_id: int, data: str, event: str = "alert") -> str:
+    """One Server-Sent Events message carrying an id, so clients can resume."""
+    return f"id: {alert_id}\nevent: {event}\ndata: {data}\n\n"
@@ -0,0 +1,338 @@
+"""
+Alert Persistence Module.
+Durable alert log in SQLite (WAL mode). Alerts are queued by the request
+path and written by a background thread in batched group commits; when the
+bounded queue is full, alerts spill to a JSON-lines file and are replayed
+into the database once the writer catches up. On boot the newest alerts are
+read back to warm-start the in-memory store.
+
+Alert ids are the database row ids from the start: each process reserves
+blocks of ids in the database (a counter row, so uvicorn workers sharing one
+file never collide) and stamps alerts before they are queued, so the
+in-memory store, the streams' Last-Event-ID and the table agree. The writer
+thread keeps a spare block reserved ahead of the one in use, so handing out
+an id never waits for the database.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from typing import Any, Dict, List, Optional, Tuple
+
+
+Alert = Dict[str, Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY,
+    ts INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    zone TEXT,
+    frame_path TEXT,
+    meta TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_ts ON alerts (ts);
+CREATE INDEX IF NOT EXISTS idx_alerts_type_ts ON alerts (type, ts);
+CREATE TABLE IF NOT EXISTS alert_ids (next_id INTEGER NOT NULL);
+"""
+
+# Ids come from reserve blocks; an alert without one gets the next row id.
+# OR IGNORE: a spilled alert replayed twice is written once
+_INSERT = "INSERT OR IGNORE INTO alerts (id, ts, type, zone, frame_path, meta) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class AlertPersistence:
+    """Background SQLite writer for alerts with group commit and spill-over."""
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        queue_size: int = 10000,
+        retention_days: float = 30.0,
+        compact_interval: float = 3600.0,
+        id_block: int = 1000
+    ):
+        """
+        Initialize the persistence layer (the writer starts on start()).
+
+        Args:
+            path: SQLite database file
+            batch_size: Most alerts written in one transaction
+            flush_interval: Longest time a queued alert waits for its commit
+            queue_size: Alerts buffered in memory before spilling to disk
+            retention_days: Alerts older than this are deleted (0 = keep all)
+            compact_interval: Seconds between retention/checkpoint passes
+            id_block: Alert ids reserved per database round trip
+        """
+        self.path = path
+        self.spill_path = path + ".spill.jsonl"
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.retention_days = retention_days
+        self.compact_interval = compact_interval
+        self.id_block = max(1, id_block)
+
+        self._queue: "queue.Queue[Optional[Alert]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._spill_lock = threading.Lock()
+        self._id_lock = threading.Lock()
+        self._next_id = self._id_end = 0
+        self._spare_ids: Optional[Tuple[int, int]] = None  # (first, end) of the next block
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # Statistics
+        self.written = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.errors = 0
+        self.id_misses = 0
+        self.last_commit_ms = 0.0
+
+    def start(self) -> "AlertPersistence":
+        """Create the schema and start the writer thread."""
+        if self._running:
+            return self
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+        # Block in use plus the spare; the writer reserves the following ones
+        first = self._reserve_ids(2 * self.id_block)
+        with self._id_lock:
+            self._next_id, self._id_end = first, first + self.id_block
+            self._spare_ids = (first + self.id_block, first + 2 * self.id_block)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="alert-persistence", daemon=True)
+        self._thread.start()
+        print(f"[INFO] Alert persistence: {self.path} (WAL, batches of {self.batch_size})")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Flush queued alerts and stop the writer."""
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def next_id(self) -> Optional[int]:
+        """
+        Id for a new alert (its future row id), from this process's reserved blocks.
+
+        Never touches the database: when the block in use runs out, the spare
+        reserved by the writer thread takes over.
+
+        Returns:
+            The id, or None if both blocks are used up (writer behind or failing)
+        """
+        with self._id_lock:
+            if self._next_id >= self._id_end:
+                if self._spare_ids is None:
+                    self.id_misses += 1
+                    return None
+                (self._next_id, self._id_end), self._spare_ids = self._spare_ids, None
+            alert_id = self._next_id
+            self._next_id += 1
+            return alert_id
+
+    def enqueue(self, alert: Alert):
+        """Queue an alert for writing; never blocks the caller on the database."""
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self._spill(alert)
+
+    def load_recent(self, limit: int) -> Tuple[List[Alert], Dict[str, int]]:
+        """
+        Read back the newest alerts for a warm start.
+
+        Returns:
+            (up to limit alerts oldest first, total stored alert count per type)
+        """
+        if not os.path.isfile(self.path):
+            return [], {}
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT id, ts, type, zone, frame_path, meta FROM alerts ORDER BY id DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+            totals = dict(conn.execute("SELECT type, COUNT(*) FROM alerts GROUP BY type").fetchall())
+        return [_from_row(row) for row in reversed(rows)], totals
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "errors": self.errors,
+            "id_misses": self.id_misses,
+            "last_commit_ms": round(self.last_commit_ms, 2),
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: commits survive a process crash; only an OS crash can
+        # lose the last few group commits
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reserve_ids(self, count: int) -> int:
+        """Reserve count ids above every row and earlier reservation; returns the first."""
+        with closing(self._connect()) as conn:
+            conn.isolation_level = None
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT next_id FROM alert_ids").fetchone()
+                first = max(row[0] if row else 1, conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM alerts").fetchone()[0])
+                if row:
+                    conn.execute("UPDATE alert_ids SET next_id = ?", (first + count,))
+                else:
+                    conn.execute("INSERT INTO alert_ids (next_id) VALUES (?)", (first + count,))
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        return first
+
+    def _refill_ids(self):
+        """Reserve a new spare block once the previous spare went into use (writer thread)."""
+        with self._id_lock:
+            if self._spare_ids is not None:
+                return
+        try:
+            first = self._reserve_ids(self.id_block)
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"[ERROR] Failed to reserve alert ids: {e}")
+            return
+        with self._id_lock:
+            self._spare_ids = (first, first + self.id_block)
+
+    def _spill(self, alert: Alert):
+        with self._spill_lock:
+            with open(self.spill_path, "a") as f:
+                f.write(json.dumps(alert, default=str) + "\n")
+            self.spilled += 1
+
+    def _collect_batch(self) -> Tuple[List[Alert], bool]:
+        """Block for the first alert, then gather until full or flush_interval elapses."""
+        try:
+            first = self._queue.get(timeout=1.0)
+        except queue.Empty:
+            return [], False
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _write(self, conn: sqlite3.Connection, alerts: List[Alert]):
+        started = time.perf_counter()
+        try:
+            with conn:
+                conn.executemany(_INSERT, [_to_row(alert) for alert in alerts])
+            self.written += len(alerts)
+            self.last_commit_ms = (time.perf_counter() - started) * 1000
+        except sqlite3.Error as e:
+            self.errors += 1
+            print(f"[ERROR] Failed to persist {len(alerts)} alerts: {e}")
+            for alert in alerts:
+                self._spill(alert)
+
+    def _replay_spill(self, conn: sqlite3.Connection):
+        """Move spilled alerts into the database once the queue has drained."""
+        with self._spill_lock:
+            if not os.path.isfile(self.spill_path):
+                return
+            replay_path = self.spill_path + ".replay"
+            os.replace(self.spill_path, replay_path)
+        alerts = []
+        with open(replay_path) as f:
+            for line in f:
+                try:
+                    alerts.append(json.loads(line))
+                except ValueError:
+                    continue
+        for i in range(0, len(alerts), self.batch_size):
+            self._write(conn, alerts[i:i + self.batch_size])
+        self.replayed += len(alerts)
+        os.remove(replay_path)
+        print(f"[INFO] Replayed {len(alerts)} spilled alerts into {self.path}")
+
+    def _compact(self, conn: sqlite3.Connection):
+        """Apply retention and checkpoint the WAL."""
+        try:
+            if self.retention_days > 0:
+                cutoff = int((time.time() - self.retention_days * 86400) * 1000)
+                with conn:
+                    deleted = conn.execute("DELETE FROM alerts WHERE ts < ?", (cutoff,)).rowcount
+                if deleted:
+                    print(f"[INFO] Alert retention: deleted {deleted} alerts older than {self.retention_days} days")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
+            print(f"[WARN] Alert database compaction failed: {e}")
+
+    def _run(self):
+        """Writer loop: batch -> one transaction; replay spills and compact when idle."""
+        conn = self._connect()
+        last_compact = 0.0
+        while True:
+            batch, stopping = self._collect_batch()
+            self._refill_ids()
+            if batch:
+                self._write(conn, batch)
+            if stopping or (not self._running and self._queue.empty()):
+                break
+            if self._queue.empty():
+                self._replay_spill(conn)
+                if time.time() - last_compact >= self.compact_interval:
+                    self._compact(conn)
+                    last_compact = time.time()
+        conn.close()
+
+
+def _to_row(alert: Alert) -> Tuple:
+    meta = alert.get("meta")
+    return (
+        alert.get("id"),
+        int(alert["ts"]),
+        alert["type"],
+        alert.get("zone"),
+        alert.get("frame_path"),
+        json.dumps(meta, default=str) if meta is not None else None,
+    )
+
+
+def _from_row(row: Tuple) -> Alert:
+    alert_id, ts, alert_type, zone, frame_path, meta = row
+    return {
+        "id": alert_id,
+        "type": alert_type,
+        "ts": ts,
+        "zone": zone,
+        "frame_path": frame_path,
+        "meta": json.loads(meta) if meta else None,
+    }
@@ -0,0 +1,182 @@
+"""
+Alert Statistics Module.
+Incrementally maintained alert aggregates for /stats: lifetime per-type
+totals plus per-minute bucket counters in circular arrays, with a running sum
+per configured window (e.g. 10 min, 1 h, 24 h). Counters are updated on
+insert and expired lazily when time advances, so reading the statistics does
+not depend on how many alerts are stored.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence
+
+
+class _Series:
+    """Minute buckets and window sums for one counter (all / a type / a zone)."""
+
+    __slots__ = ("buckets", "minute", "sums")
+
+    def __init__(self, span: int, n_windows: int):
+        self.buckets = [0] * span
+        self.minute: Optional[int] = None  # Newest minute the buckets cover
+        self.sums = [0] * n_windows
+
+
+class SlidingWindowCounters:
+    """Per-key event counts over several trailing windows at minute resolution."""
+
+    def __init__(self, windows_minutes: Sequence[int] = (10, 60, 1440)):
+        """
+        Initialize the counters.
+
+        Args:
+            windows_minutes: Trailing window lengths in minutes
+        """
+        self.windows = sorted({max(1, int(w)) for w in windows_minutes})
+        self.span = self.windows[-1]
+        self._series: Dict[Hashable, _Series] = {}
+
+    def add(self, key: Hashable, minute: int, now_minute: int, count: int = 1):
+        """
+        Count an event for a key.
+
+        Args:
+            key: Counter key
+            minute: Minute (epoch ms // 60000) the event belongs to
+            now_minute: Current minute; later-dated events are counted as now
+            count: Number of events
+        """
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = _Series(self.span, len(self.windows))
+        self._advance(series, now_minute)
+
+        age = max(0, now_minute - minute)
+        if age >= self.span:
+            return  # Older than every window
+        series.buckets[(now_minute - age) % self.span] += count
+        for i, window in enumerate(self.windows):
+            if age < window:
+                series.sums[i] += count
+
+    def counts(self, key: Hashable, now_minute: int) -> Dict[int, int]:
+        """Event count of a key per window length (minutes)."""
+        series = self._series.get(key)
+        if series is None:
+            return {w: 0 for w in self.windows}
+        self._advance(series, now_minute)
+        return dict(zip(self.windows, series.sums))
+
+    def keys(self) -> List[Hashable]:
+        return list(self._series)
+
+    def _advance(self, series: _Series, now_minute: int):
+        """Expire buckets that fell out of each window since the last update."""
+        if series.minute is None:
+            series.minute = now_minute
+            return
+        if now_minute <= series.minute:
+            return
+        if now_minute - series.minute >= self.span:
+            series.buckets = [0] * self.span
+            series.sums = [0] * len(self.windows)
+        else:
+            buckets = series.buckets
+            for minute in range(series.minute + 1, now_minute + 1):
+                # A window of w minutes ending at `minute` no longer covers minute - w
+                for i, window in enumerate(self.windows):
+                    series.sums[i] -= buckets[(minute - window) % self.span]
+                buckets[minute % self.span] = 0
+        series.minute = now_minute
+
+
+class AlertStatistics:
+    """Totals, windowed counts and safety scores, updated as alerts arrive."""
+
+    def __init__(
+        self,
+        windows_minutes: Sequence[int] = (10, 60, 1440),
+        score_window_minutes: int = 10,
+        score_penalty: int = 5
+    ):
+        """
+        Initialize the statistics.
+
+        Args:
+            windows_minutes: Trailing windows reported by snapshot()
+            score_window_minutes: Window the safety score is computed over
+            score_penalty: Points deducted from 100 per alert in that window
+        """
+        self.score_window = max(1, int(score_window_minutes))
+        self.score_penalty = score_penalty
+        self._counters = SlidingWindowCounters(list(windows_minutes) + [self.score_window])
+        self._totals: Dict[str, int] = {}
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def record(self, alert: Dict[str, Any], now: Optional[float] = None):
+        """Count one alert (dict with "type", "ts" in ms and optional "zone")."""
+        now_minute = int((now if now is not None else time.time()) // 60)
+        minute = int(alert["ts"]) // 60000
+        alert_type = alert.get("type")
+        zone = alert.get("zone")
+        with self._lock:
+            self._total += 1
+            self._totals[alert_type] = self._totals.get(alert_type, 0) + 1
+            self._counters.add(("all",), minute, now_minute)
+            self._counters.add(("type", alert_type), minute, now_minute)
+            if zone is not None:
+                self._counters.add(("zone", zone), minute, now_minute)
+
+    def restore(self, alerts: Iterable[Dict[str, Any]], totals: Dict[str, int]):
+        """Warm start: refill the windows from recent alerts, then set lifetime totals."""
+        for alert in alerts:
+            self.record(alert)
+        with self._lock:
+            self._totals = dict(totals)
+            self._total = sum(totals.values())
+
+    def safety_score(self, alerts_in_window: int) -> int:
+        # naive compliance: 100 - 5*violations per 10 minutes
+        return max(0, 100 - self.score_penalty * alerts_in_window)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Current statistics.
+
+        Returns:
+            {"total", "by_type", "safety_score", "windows": {"10m": {"total",
+            "by_type"}, ...}, "zones": {zone: {"alerts", "safety_score"}}}
+        """
+        now_minute = int((now if now is not None else time.time()) // 60)
+        with self._lock:
+            all_counts = self._counters.counts(("all",), now_minute)
+            windows = {
+                _window_label(w): {"total": all_counts[w], "by_type": {}}
+                for w in self._counters.windows
+            }
+            zones = {}
+            for key in self._counters.keys():
+                if key[0] == "type":
+                    for w, n in self._counters.counts(key, now_minute).items():
+                        if n:
+                            windows[_window_label(w)]["by_type"][key[1]] = n
+                elif key[0] == "zone":
+                    n = self._counters.counts(key, now_minute)[self.score_window]
+                    zones[key[1]] = {"alerts": n, "safety_score": self.safety_score(n)}
+            return {
+                "total": self._total,
+                "by_type": dict(self._totals),
+                "safety_score": self.safety_score(all_counts[self.score_window]),
+                "windows": windows,
+                "zones": zones,
+            }
+
+
+def _window_label(minutes: int) -> str:
+    if minutes % 1440 == 0:
+        return f"{minutes // 1440}d" if minutes > 1440 else "24h"
+    if minutes % 60 == 0:
+        return f"{minutes // 60}h"
+    return f"{minutes}m"
@@ -0,0 +1,288 @@
+"""
+Alert Store Module.
+Fixed-capacity, time-ordered in-memory alert store. Alerts live in a ring
+buffer addressed by a monotonically increasing sequence number; a
+running-maximum timestamp column makes "since"/range lookups a binary search,
+an id column does the same for stream resume (alert ids ascend but may have
+gaps, e.g. database row ids), and per-type and per-zone sequence indexes
+answer filtered queries without scanning the rest. Appends and evictions
+are O(1) amortized.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+
+Alert = Dict[str, Any]
+
+
+class _SeqIndex:
+    """Ascending list of sequence numbers for one type or zone, trimmed from the front."""
+
+    __slots__ = ("seqs", "start")
+
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.start = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.start
+
+    def append(self, seq: int):
+        self.seqs.append(seq)
+
+    def trim(self, min_seq: int):
+        """Drop sequence numbers older than min_seq (only ever at the front)."""
+        seqs, start = self.seqs, self.start
+        while start < len(seqs) and seqs[start] < min_seq:
+            start += 1
+        # Compact occasionally so the list does not grow without bound
+        if start > 1024 and start * 2 > len(seqs):
+            del seqs[:start]
+            start = 0
+        self.start = start
+
+    def from_seq(self, min_seq: int) -> List[int]:
+        return self.seqs[bisect_left(self.seqs, min_seq, self.start):]
+
+    def last(self, n: int) -> List[int]:
+        return self.seqs[max(self.start, len(self.seqs) - n):]
+
+
+class AlertStore:
+    """Ring-buffer alert store with timestamp, type and zone indexes."""
+
+    def __init__(self, capacity: int = 100_000, id_source: Optional[Callable[[], Optional[int]]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            capacity: Maximum alerts kept; the oldest is evicted when full
+            id_source: Returns the id of each new alert, ascending (e.g. reserved
+                database row ids); None, or a None result, = newest id + 1
+        """
+        self.capacity = max(1, capacity)
+        self.id_source = id_source
+        self._alerts: List[Optional[Alert]] = [None] * self.capacity
+        # Running maximum of "ts" up to each alert: non-decreasing even when
+        # alerts arrive slightly out of order, so it can be binary searched
+        self._max_ts = np.zeros(self.capacity, dtype=np.int64)
+        # Alert id of each slot, ascending with the sequence number
+        self._ids = np.zeros(self.capacity, dtype=np.int64)
+        self._by_type: Dict[str, _SeqIndex] = {}
+        self._by_zone: Dict[str, _SeqIndex] = {}
+        self._first_seq = 1  # Oldest sequence number still stored
+        self._next_seq = 1   # Sequence number of the next alert
+        self._last_id = 0
+        self._latest_ts = np.iinfo(np.int64).min
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._next_seq - self._first_seq
+
+    def add(self, alert: Alert) -> Alert:
+        """
+        Store an alert (dict with at least "type" and "ts" in milliseconds).
+
+        An "id" already set (e.g. a persisted alert) is kept and must be
+        greater than every stored id; otherwise one is taken from id_source.
+
+        Returns:
+            The stored alert, with its "id"
+        """
+        with self._lock:
+            alert_id = alert.get("id")
+            if alert_id is None:
+                if self.id_source is not None:
+                    alert_id = self.id_source()
+                if alert_id is None or alert_id <= self._last_id:
+                    alert_id = self._last_id + 1
+                alert["id"] = alert_id
+            elif alert_id <= self._last_id:
+                raise ValueError(f"Alert id {alert_id} is not after the newest stored id {self._last_id}")
+            if len(self) == self.capacity:
+                self._evict_oldest()
+
+            seq = self._next_seq
+            slot = seq % self.capacity
+            self._latest_ts = max(self._latest_ts, int(alert["ts"]))
+            self._alerts[slot] = alert
+            self._max_ts[slot] = self._latest_ts
+            self._ids[slot] = alert_id
+            self._index(self._by_type, alert.get("type"), seq)
+            self._index(self._by_zone, alert.get("zone"), seq)
+            self._last_id = alert_id
+            self._next_seq += 1
+        return alert
+
+    def restore(self, alerts: List[Alert]):
+        """
+        Warm start an empty store from persisted alerts (ascending ids).
+
+        Alerts keep their ids, so stream clients resume across restarts.
+        """
+        alerts = alerts[-self.capacity:]
+        with self._lock:
+            if len(self):
+                raise RuntimeError("AlertStore.restore() needs an empty store")
+        for alert in alerts:
+            self.add(alert)
+
+    def since(
+        self,
+        since_ts: int,
+        type: Optional[str] = None,
+        zone: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Alert]:
+        """Alerts with ts > since_ts, oldest first (optionally filtered/limited)."""
+        return self.range(since_ts + 1, None, type, zone, limit)
+
+    def range(
+        self,
+        start_ts: Optional[int] = None,
+        end_ts: Optional[int] = None,
+        type: Optional[str] = None,
+        zone: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Alert]:
+        """
+        Alerts with start_ts <= ts < end_ts, oldest first.
+
+        Args:
+            start_ts, end_ts: Millisecond bounds (None = unbounded)
+            type, zone: Optional exact-match filters (served from the indexes)
+            limit: Return at most this many of the oldest matches
+        """
+        with self._lock:
+            first = self._first_seq if start_ts is None else self._first_seq_at(start_ts)
+            result = []
+            for seq in self._select(first, type, zone):
+                alert = self._alerts[seq % self.capacity]
+                ts = alert["ts"]
+                if start_ts is not None and ts < start_ts:
+                    continue  # Arrived out of order
+                if end_ts is not None and ts >= end_ts:
+                    if self._max_ts[seq % self.capacity] >= end_ts + _REORDER_SLACK_MS:
+                        break
+                    continue
+                result.append(alert)
+                if limit is not None and len(result) >= limit:
+                    break
+            return result
+
+    def tail(self, n: int = 100, type: Optional[str] = None, zone: Optional[str] = None) -> List[Alert]:
+        """Newest n alerts (optionally filtered), oldest first."""
+        with self._lock:
+            if type is None and zone is None:
+                first = max(self._first_seq, self._next_seq - n)
+                return [self._alerts[i % self.capacity] for i in range(first, self._next_seq)]
+            index = self._filter_index(type, zone)
+            if index is None:
+                return []
+            if type is not None and zone is not None:
+                # Two filters: walk the narrower index backwards
+                matches = []
+                for seq in reversed(index.from_seq(self._first_seq)):
+                    alert = self._alerts[seq % self.capacity]
+                    if alert.get("type") == type and alert.get("zone") == zone:
+                        matches.append(alert)
+                        if len(matches) >= n:
+                            break
+                return matches[::-1]
+            return [self._alerts[i % self.capacity] for i in index.last(n)]
+
+    @property
+    def last_id(self) -> int:
+        """Id of the newest alert (0 before the first one)."""
+        return self._last_id
+
+    def after_id(self, alert_id: int, limit: Optional[int] = None) -> List[Alert]:
+        """
+        Alerts with an id greater than alert_id, oldest first (for stream resume).
+
+        Ids older than the store's retention resume from the oldest stored alert.
+        """
+        with self._lock:
+            first = self._first_seq_where(self._ids, alert_id, "right")
+            end = self._next_seq if limit is None else min(self._next_seq, first + limit)
+            return [self._alerts[i % self.capacity] for i in range(first, end)]
+
+    def counts_by_type(self) -> Dict[str, int]:
+        """Stored alert count per type."""
+        with self._lock:
+            return {name: len(index) for name, index in self._by_type.items() if len(index)}
+
+    def _select(self, first_seq: int, type: Optional[str], zone: Optional[str]) -> Iterable[int]:
+        """Sequence numbers from first_seq on, narrowed by the type/zone indexes."""
+        if type is None and zone is None:
+            return range(first_seq, self._next_seq)
+        index = self._filter_index(type, zone)
+        if index is None:
+            return iter(())
+        seqs = index.from_seq(first_seq)
+        if type is not None and zone is not None:
+            seqs = (
+                i for i in seqs
+                if self._alerts[i % self.capacity].get("type") == type
+                and self._alerts[i % self.capacity].get("zone") == zone
+            )
+        return seqs
+
+    def _filter_index(self, type: Optional[str], zone: Optional[str]) -> Optional[_SeqIndex]:
+        indexes = []
+        if type is not None:
+            indexes.append(self._by_type.get(type))
+        if zone is not None:
+            indexes.append(self._by_zone.get(zone))
+        if any(index is None for index in indexes):
+            return None
+        return min(indexes, key=len)
+
+    def _first_seq_at(self, ts: int) -> int:
+        """Smallest stored sequence number whose running-max ts is >= ts (binary search)."""
+        return self._first_seq_where(self._max_ts, ts, "left")
+
+    def _first_seq_where(self, column: np.ndarray, value: int, side: str) -> int:
+        """np.searchsorted over a non-decreasing per-slot column, as a sequence number."""
+        if len(self) == 0:
+            return self._next_seq
+        # The live slots occupy at most two contiguous, sorted slices of the ring
+        start = self._first_seq % self.capacity
+        end = (self._next_seq - 1) % self.capacity + 1
+        if start < end:
+            return self._first_seq + int(np.searchsorted(column[start:end], value, side))
+        head = column[start:]
+        offset = int(np.searchsorted(head, value, side))
+        if offset < len(head):
+            return self._first_seq + offset
+        return self._first_seq + len(head) + int(np.searchsorted(column[:end], value, side))
+
+    def _evict_oldest(self):
+        slot = self._first_seq % self.capacity
+        alert = self._alerts[slot]
+        self._alerts[slot] = None
+        self._first_seq += 1
+        for indexes, key in ((self._by_type, alert.get("type")), (self._by_zone, alert.get("zone"))):
+            if key is not None and key in indexes:
+                index = indexes[key]
+                index.trim(self._first_seq)
+                if not len(index):
+                    del indexes[key]
+
+    @staticmethod
+    def _index(indexes: Dict[str, _SeqIndex], key: Optional[str], seq: int):
+        if key is None:
+            return
+        index = indexes.get(key)
+        if index is None:
+            index = indexes[key] = _SeqIndex()
+        index.append(seq)
+
+
+# Alerts stamped up to this long before the newest one are still considered
+# when stopping a bounded range scan (clients post their own timestamps)
+_REORDER_SLACK_MS = 60_000
@@ -1,17 +1,40 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import StreamingResponse, Response, PlainTextResponse, JSONResponse
 from pydantic import BaseModel, field_validator
-from typing import Optional, List, Dict, Any, Literal
+from typing import Optional, List, Dict, Any, Literal, Tuple
+import asyncio
+import hmac
+import json
 import time
 import os
+import threading
 import subprocess
 import signal
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from dotenv import load_dotenv
 from twilio.rest import Client
+import camera_reader
+import stream_broadcaster
+from inference_scheduler import BatchInferenceScheduler
+from mjpeg_ingest import MJPEGStreamParser, LatestFrameWorker
+from frame_cache import EncodedFrameCache, FrameChannel
+from adaptive_control import AdaptiveStrideController
+from motion_gate import MotionGate
+from inference_engine import LetterboxBuffer, load_engine, unletterbox_detections
+from overlay import draw_detections
+from alert_store import AlertStore
+from alert_stats import AlertStatistics
+from alert_persistence import AlertPersistence
+from alert_hub import AlertHub, sse_event
+from sensor_store import samples_from_columns
+from sensor_devices import DeviceRegistry, merge_columns
+from sensor_archive import SensorArchive
+from fall_detector import FallDetector
+from sensor_binary import decode_frame
+import sensor_query
 
 # Load environment variables
 load_dotenv()
@@ -51,13 +74,69 @@ app.add_middleware(
 
 # Global variable to track vision process
 vision_process = None
-ALERTS: List[Dict[str,Any]] = []
+# Time-indexed ring buffer of alerts (oldest evicted beyond capacity)
+ALERT_STORE_CAPACITY = int(os.getenv("ALERT_STORE_CAPACITY", "100000"))
+alert_store = AlertStore(capacity=ALERT_STORE_CAPACITY)
+
+# Incremental /stats aggregates over trailing windows (minutes)
+STATS_WINDOWS_MINUTES = [int(w) for w in os.getenv("STATS_WINDOWS_MINUTES", "10,60,1440").split(",") if w.strip()]
+SAFETY_SCORE_WINDOW_MINUTES = int(os.getenv("SAFETY_SCORE_WINDOW_MINUTES", "10"))
+alert_stats = AlertStatistics(STATS_WINDOWS_MINUTES, SAFETY_SCORE_WINDOW_MINUTES)
+
+# Durable alert log: SQLite in WAL mode, written in batches by a background thread
+ALERT_PERSISTENCE_ENABLED = os.getenv("ALERT_PERSISTENCE_ENABLED", "true").lower() == "true"
+ALERT_DB_PATH = os.getenv("ALERT_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "alerts.db"))
+ALERT_DB_BATCH_SIZE = int(os.getenv("ALERT_DB_BATCH_SIZE", "500"))
+ALERT_DB_FLUSH_MS = float(os.getenv("ALERT_DB_FLUSH_MS", "200"))
+ALERT_DB_QUEUE_SIZE = int(os.getenv("ALERT_DB_QUEUE_SIZE", "10000"))
+ALERT_DB_RETENTION_DAYS = float(os.getenv("ALERT_DB_RETENTION_DAYS", "30"))
+alert_persistence = AlertPersistence(
+    ALERT_DB_PATH,
+    batch_size=ALERT_DB_BATCH_SIZE,
+    flush_interval=ALERT_DB_FLUSH_MS / 1000,
+    queue_size=ALERT_DB_QUEUE_SIZE,
+    retention_days=ALERT_DB_RETENTION_DAYS
+) if ALERT_PERSISTENCE_ENABLED else None
+
+# Push feed for /alerts/stream (SSE and WebSocket); heartbeat keeps idle
+# connections open through proxies
+ALERT_STREAM_HEARTBEAT_S = float(os.getenv("ALERT_STREAM_HEARTBEAT_S", "15"))
+alert_hub = AlertHub(
+    alert_store,
+    snapshot=lambda: {**alert_stats.snapshot(), "stored": len(alert_store), "stored_by_type": alert_store.counts_by_type()},
+    heartbeat_interval=ALERT_STREAM_HEARTBEAT_S
+)
+
+def record_alert(alert: Dict[str, Any]) -> Dict[str, Any]:
+    """Store an alert, update the /stats aggregates, queue it for the database and push it to streams"""
+    alert_store.add(alert)
+    alert_stats.record(alert)
+    if alert_persistence is not None:
+        alert_persistence.enqueue(alert)
+    alert_hub.publish(alert)
+    return alert
+
+def restore_alerts():
+    """Warm start: reload the newest persisted alerts and start the database writer"""
+    global alert_persistence
+    if alert_persistence is None:
+        return
+    try:
+        alerts, totals = alert_persistence.load_recent(ALERT_STORE_CAPACITY)
+        alert_store.restore(alerts)
+        alert_stats.restore(alerts, totals)
+        alert_persistence.start()
+        # New alerts get their database row id up front, so it is their id everywhere
+        alert_store.id_source = alert_persistence.next_id
+        print(f"[INFO] Restored {len(alerts)} alerts from {ALERT_DB_PATH}")
+    except Exception as e:
+        print(f"[WARN] Alert persistence unavailable ({e}); alerts are kept in memory only")
+        alert_persistence = None
 
 # Startup event to pre-load model
 @app.on_event("startup")
 async def startup_event():
     """Pre-load YOLOv8 model on server startup for faster first request"""
-    import threading
     def preload():
         print("[INFO] Pre-loading YOLOv8 model on startup...")
         try:
@@ -68,6 +147,22 @@ async def startup_event():
     
     # Load in background thread to not block startup
     threading.Thread(target=preload, daemon=True).start()
+    
+    restore_alerts()
+    if sensor_archive is not None:
+        sensor_archive.start()
+
+@app.on_event("shutdown")
+def shutdown_event():
+    """Stop inference broadcasters and camera capture threads"""
+    stream_broadcaster.release_all()
+    camera_reader.release_all()
+    if _inference_scheduler is not None:
+        _inference_scheduler.stop()
+    if alert_persistence is not None:
+        alert_persistence.stop()
+    if sensor_archive is not None:
+        sensor_archive.stop()
 
 class AlertIn(BaseModel):
     type: str
@@ -78,36 +173,89 @@ class AlertIn(BaseModel):
 
 @app.post("/alerts")
 def post_alert(a: AlertIn):
-    ALERTS.append(a.dict())
-    # keep only last 1000
-    if len(ALERTS) > 1000: del ALERTS[:-1000]
+    record_alert(a.dict())
     return {"ok": True}
 
 @app.get("/alerts")
-def get_alerts(since: Optional[int] = None):
-    if since is None: return {"data": ALERTS[-100:]}
-    return {"data": [a for a in ALERTS if a["ts"] > since]}
+def get_alerts(since: Optional[int] = None, type: Optional[str] = None,
+               zone: Optional[str] = None, limit: Optional[int] = None):
+    if since is None: return {"data": alert_store.tail(limit or 100, type=type, zone=zone)}
+    return {"data": alert_store.since(since, type=type, zone=zone, limit=limit)}
+
+def parse_last_event_id(value: Optional[str]) -> Optional[int]:
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+async def alert_event_stream(last_event_id: Optional[int], type: Optional[str], zone: Optional[str]):
+    """SSE body: one "alert" event per new alert, then a "stats" event; comments as heartbeats"""
+    yield "retry: 3000\n\n"
+    async for alerts in alert_hub.subscribe(last_event_id, type=type, zone=zone):
+        if not alerts:
+            yield ": heartbeat\n\n"
+            continue
+        chunk = "".join(sse_event(a["id"], alert_hub.encode(a)) for a in alerts)
+        stats_text = alert_hub.encoded_stats()
+        if stats_text is not None:
+            chunk += sse_event(alerts[-1]["id"], stats_text, "stats")
+        yield chunk
+
+@app.get("/alerts/stream")
+def alerts_stream(request: Request, type: Optional[str] = None, zone: Optional[str] = None,
+                  last_event_id: Optional[str] = None):
+    """
+    Server-Sent Events feed of new alerts (replaces polling /alerts and /stats).
+
+    Reconnecting clients resume after the Last-Event-ID header (EventSource
+    sends it automatically) or the last_event_id query parameter.
+    """
+    resume_id = parse_last_event_id(request.headers.get("last-event-id") or last_event_id)
+    return StreamingResponse(
+        alert_event_stream(resume_id, type, zone),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/alerts/stream")
+async def alerts_stream_ws(websocket: WebSocket, type: Optional[str] = None, zone: Optional[str] = None,
+                           last_event_id: Optional[str] = None):
+    """WebSocket variant of /alerts/stream: {"event": "alert"|"stats"|"heartbeat", "id", "data"} messages"""
+    await websocket.accept()
+    try:
+        async for alerts in alert_hub.subscribe(parse_last_event_id(last_event_id), type=type, zone=zone):
+            if not alerts:
+                await websocket.send_text('{"event": "heartbeat"}')
+                continue
+            for a in alerts:
+                await websocket.send_text(f'{{"event": "alert", "id": {a["id"]}, "data": {alert_hub.encode(a)}}}')
+            stats_text = alert_hub.encoded_stats()
+            if stats_text is not None:
+                await websocket.send_text(f'{{"event": "stats", "id": {alerts[-1]["id"]}, "data": {stats_text}}}')
+    except WebSocketDisconnect:
+        pass
 
 @app.get("/stats")
 def stats():
-    total = len(ALERTS)
-    by_type = {}
-    for a in ALERTS:
-        by_type[a["type"]] = by_type.get(a["type"], 0) + 1
-    # naive compliance: 100 - 5*violations per 10 minutes
-    ten_min_ago = int((time.time()-600)*1000)
-    recent = [a for a in ALERTS if a["ts"] >= ten_min_ago]
-    score = max(0, 100 - 5*len(recent))
-    return {"total": total, "by_type": by_type, "safety_score": score}
+    # Maintained on insert: cost does not grow with the number of alerts.
+    # safety_score: 100 - 5*alerts in the last SAFETY_SCORE_WINDOW_MINUTES,
+    # overall and per zone; windows: counts per trailing window
+    return {
+        **alert_stats.snapshot(),
+        "stored": len(alert_store),
+        "stored_by_type": alert_store.counts_by_type(),
+        "persistence": alert_persistence.stats() if alert_persistence is not None else None,
+        "streams": alert_hub.stats()
+    }
 
 @app.get("/camera/test")
 def test_camera():
     """Quick test to check if camera is accessible"""
     try:
-        cam = get_camera()
-        success, frame = cam.read()
-        if success:
-            return {"status": "ok", "message": "Camera is working", "frame_shape": frame.shape}
+        reader = get_camera()
+        latest = reader.latest() if reader.wait_until_ready(timeout=3.0) else None
+        if latest is not None:
+            return {"status": "ok", "message": "Camera is working", "frame_shape": latest[2].shape}
         else:
             return {"status": "error", "message": "Failed to read frame"}
     except Exception as e:
@@ -196,346 +344,454 @@ def vision_status():
         return {"status": "stopped", "running": False}
 
 # Global variables for video streams
-camera = None
 active_camera_source = 0  # Track which camera is active
-camera_instances = {}  # Dictionary to store multiple camera instances
 
 def get_camera(source=None):
-    """Get or create camera instance for specific source"""
-    global camera, camera_instances
-    
+    """Get the background reader for a camera source (one capture thread per source)"""
     # If no source specified, use the active camera source
     if source is None:
         source = active_camera_source
     
-    # For the default camera, use the global variable
-    if source == active_camera_source:
-        if camera is None or not camera.isOpened():
-            print(f"[INFO] Initializing camera {active_camera_source}...")
-            camera = cv2.VideoCapture(active_camera_source)
-            # Reduce resolution for faster capture and processing
-            camera.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-            camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-            camera.set(cv2.CAP_PROP_FPS, 30)
-            camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize buffer lag
-            print(f"[INFO] Camera initialized successfully")
-        return camera
-    
-    # For other sources, use the instances dictionary
-    source_key = str(source)
-    if source_key not in camera_instances or not camera_instances[source_key].isOpened():
-        print(f"[INFO] Initializing camera {source}...")
-        camera_instances[source_key] = cv2.VideoCapture(source)
-        camera_instances[source_key].set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        camera_instances[source_key].set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        camera_instances[source_key].set(cv2.CAP_PROP_FPS, 30)
-        camera_instances[source_key].set(cv2.CAP_PROP_BUFFERSIZE, 1)
-        print(f"[INFO] Camera {source} initialized successfully")
-    
-    return camera_instances[source_key]
+    return camera_reader.get_reader(source)
 
 # Global variables for trained YOLOv8 model
 yolo_model = None
+_yolo_model_lock = threading.Lock()
+_yolo_model_loading = False
+
+# Inference backend: "auto" picks by file extension (.pt -> torch, .onnx -> onnx,
+# .xml/OpenVINO dir -> openvino); "onnx"/"openvino" with a .pt path exports once
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "auto")
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR") or None
 
 def get_yolo_model():
     """Initialize YOLOv8 trained model (singleton)"""
     global yolo_model
     
-    if yolo_model is None:
-        # Path to the trained YOLOv8 model - allow override via MODEL_PATH env var
-        default_path = os.path.join(os.path.dirname(__file__), "best.pt")
-        model_path = os.environ.get("MODEL_PATH", default_path)
-        print(f"[INFO] Loading YOLOv8 trained model from: {model_path}")
-        if not os.path.isfile(model_path):
-            print(f"[WARN] Model file not found at {model_path}. Trying default path {default_path}")
-            model_path = default_path
-        yolo_model = YOLO(model_path)
-        print(f"[INFO] YOLOv8 model loaded successfully!")
-        print(f"[INFO] Model classes: {yolo_model.names}")
+    with _yolo_model_lock:
+        if yolo_model is None:
+            # Path to the trained YOLOv8 model - allow override via MODEL_PATH env var
+            default_path = os.path.join(os.path.dirname(__file__), "best.pt")
+            model_path = os.environ.get("MODEL_PATH", default_path)
+            print(f"[INFO] Loading YOLOv8 trained model from: {model_path}")
+            # Exported OpenVINO models are directories (e.g. best_int8_openvino_model/)
+            if not os.path.exists(model_path):
+                print(f"[WARN] Model not found at {model_path}. Falling back to default path {default_path}")
+                model_path = default_path
+            yolo_model = load_engine(model_path, INFERENCE_ENGINE, cache_dir=MODEL_CACHE_DIR)
+            print(f"[INFO] YOLOv8 model loaded successfully ({yolo_model.name} engine)!")
+            print(f"[INFO] Model classes: {yolo_model.names}")
     
     return yolo_model
 
-def generate_frames(source=None):
-    """Generate video frames with YOLOv8 detections"""
+def get_loaded_model():
+    """Return the YOLOv8 model if it is ready, starting a background load otherwise"""
+    global _yolo_model_loading
+    
+    if yolo_model is not None:
+        return yolo_model
+    
+    if not _yolo_model_loading:
+        _yolo_model_loading = True
+        
+        def load_model_async():
+            global _yolo_model_loading
+            print("[INFO] Loading YOLOv8 model in background...")
+            try:
+                get_yolo_model()
+                print("[INFO] YOLOv8 model loaded and ready for inference")
+            except Exception as e:
+                print(f"[ERROR] Failed to load YOLOv8 model: {e}")
+            finally:
+                _yolo_model_loading = False
+        
+        threading.Thread(target=load_model_async, daemon=True).start()
+    
+    return None
+
+# Cross-camera batched inference: frames from all cameras share one predict call
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+INFERENCE_MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "15"))
+_inference_scheduler = None
+_inference_scheduler_lock = threading.Lock()
+
+def predict_batch(frames):
+    """Run YOLOv8 on a batch of equally sized frames (one result per frame)"""
+    model = get_yolo_model()
+    # Camera frames arrive letterboxed to a square inference size; predict at
+    # that size instead of letterboxing them again to the default 640
+    h, w = frames[0].shape[:2]
+    imgsz = h if h == w else 640
+    return model.predict_batch(frames, conf=0.5, imgsz=imgsz)
+
+def get_inference_scheduler():
+    """Get the shared batched inference scheduler (singleton)"""
+    global _inference_scheduler
+    
+    with _inference_scheduler_lock:
+        if _inference_scheduler is None:
+            _inference_scheduler = BatchInferenceScheduler(
+                predict_batch,
+                max_batch_size=INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=INFERENCE_MAX_WAIT_MS
+            )
+            print(f"[INFO] Batched inference: max batch {INFERENCE_MAX_BATCH_SIZE}, max wait {INFERENCE_MAX_WAIT_MS} ms")
     
-    cam = get_camera(source)
+    return _inference_scheduler
+
+# Adaptive inference stride/resolution per camera (replaces the fixed every-Nth-frame rule)
+PROCESS_EVERY_N_FRAMES = int(os.getenv("PROCESS_EVERY_N_FRAMES", "5"))  # Initial stride
+INFERENCE_SIZE = int(os.getenv("INFERENCE_SIZE", "480"))  # Maximum inference resolution
+TARGET_DETECTION_FPS = float(os.getenv("TARGET_DETECTION_FPS", "6"))
+INFERENCE_CPU_BUDGET = float(os.getenv("INFERENCE_CPU_BUDGET", "0.8"))
+ADAPTIVE_RESOLUTION = os.getenv("ADAPTIVE_RESOLUTION", "true").lower() in ("1", "true", "yes")
+
+inference_controller = AdaptiveStrideController(
+    target_fps=TARGET_DETECTION_FPS,
+    cpu_budget=INFERENCE_CPU_BUDGET,
+    initial_stride=PROCESS_EVERY_N_FRAMES,
+    initial_size=INFERENCE_SIZE,
+    adaptive_resolution=ADAPTIVE_RESOLUTION,
+    load_probe=lambda: get_inference_scheduler().load()
+)
+
+# Motion gate: skip YOLO on static scenes and reuse the last detections
+MOTION_GATE_ENABLED = os.getenv("MOTION_GATE_ENABLED", "true").lower() in ("1", "true", "yes")
+MOTION_THRESHOLD = float(os.getenv("MOTION_THRESHOLD", "0.01"))  # Fraction of changed pixels
+MOTION_REFRESH_SECONDS = float(os.getenv("MOTION_REFRESH_SECONDS", "5"))
+motion_gates: Dict[str, MotionGate] = {}
+
+# Shortest time between two violation alerts of the same camera
+ALERT_INTERVAL_SECONDS = float(os.getenv("ALERT_INTERVAL_SECONDS", "1.0"))
+
+def generate_synthetic_frame():
+    """Generate a synthetic test frame when camera is unavailable"""
+    import datetime
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    frame[:] = (40, 40, 40)  # Dark gray background
     
-    # Check if camera is available
-    use_synthetic = False
-    if cam is None or not cam.isOpened():
-        print("[WARN] Camera not available. Using synthetic test frames.")
-        use_synthetic = True
+    # Add "NO CAMERA" message
+    cv2.putText(frame, "NO CAMERA AVAILABLE", (100, 200), 
+               cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
+    cv2.putText(frame, "Using Test Pattern", (150, 280), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
     
-    frame_count = 0
+    # Add timestamp
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    cv2.putText(frame, timestamp, (200, 350), 
+               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 1)
     
-    # Performance optimization settings
-    PROCESS_EVERY_N_FRAMES = 5  # Process 1 out of every 5 frames (reduces CPU by 80%)
-    INFERENCE_SIZE = 480  # Smaller size for faster inference
-    JPEG_QUALITY = 70  # Lower quality for faster encoding/transmission
+    return frame
+
+def make_frame_processor(source):
+    """Build the YOLOv8 detection step run once per camera by its broadcaster"""
     
-    # Pre-load model in background to avoid blocking first frames
-    model = None
-    model_loading = True
-    last_annotated_frame = None  # Cache last processed frame
+    camera_key = str(source)
+    motion_gate = MotionGate(threshold=MOTION_THRESHOLD, refresh_interval=MOTION_REFRESH_SECONDS)
+    motion_gates[camera_key] = motion_gate
+    letterbox_buffer = LetterboxBuffer()  # Reused model input canvas
+    last_detections: List[Dict[str, Any]] = []
+    last_alert_ts = 0.0
     
-    print("[INFO] Starting frame generation...")
+    def raise_alerts(detections: List[Dict[str, Any]]):
+        """Record violation alerts for the detections in effect, at most once per ALERT_INTERVAL_SECONDS"""
+        nonlocal last_alert_ts
+        no_helmet_count = sum(1 for det in detections if 'NO-Hardhat' in det["class"])
+        no_vest_count = sum(1 for det in detections if 'NO-Safety Vest' in det["class"])
+        now = time.time()
+        if not (no_helmet_count or no_vest_count) or now - last_alert_ts < ALERT_INTERVAL_SECONDS:
+            return
+        last_alert_ts = now
+        if no_helmet_count > 0:
+            record_alert({
+                "type": "NO_HELMET",
+                "ts": int(now * 1000),
+                "zone": None,
+                "frame_path": None,
+                "meta": {"count": no_helmet_count}
+            })
+        if no_vest_count > 0:
+            record_alert({
+                "type": "NO_VEST",
+                "ts": int(now * 1000),
+                "zone": None,
+                "frame_path": None,
+                "meta": {"count": no_vest_count}
+            })
     
-    def load_model_async():
-        nonlocal model, model_loading
-        print("[INFO] Loading YOLOv8 model in background...")
-        model = get_yolo_model()
-        model_loading = False
-        print("[INFO] YOLOv8 model loaded and ready for inference")
-    
-    # Start loading model in background
-    import threading
-    threading.Thread(target=load_model_async, daemon=True).start()
-    
-    # Send first few frames immediately without waiting for model
-    print("[INFO] Sending initial frames...")
-    
-    def generate_synthetic_frame():
-        """Generate a synthetic test frame when camera is unavailable"""
-        import numpy as np
-        import datetime
-        frame = np.zeros((480, 640, 3), dtype=np.uint8)
-        frame[:] = (40, 40, 40)  # Dark gray background
-        
-        # Add "NO CAMERA" message
-        cv2.putText(frame, "NO CAMERA AVAILABLE", (100, 200), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 255), 3)
-        cv2.putText(frame, "Using Test Pattern", (150, 280), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255, 255, 255), 2)
+    def draw_status(annotated_frame, detections: List[Dict[str, Any]]):
+        """LIVE indicator and detection/violation counts, on every emitted frame"""
+        violation_count = sum(1 for det in detections
+                              if 'NO-Hardhat' in det["class"] or 'NO-Safety Vest' in det["class"])
         
-        # Add timestamp
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        cv2.putText(frame, timestamp, (200, 350), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (200, 200, 200), 1)
+        # Add "LIVE" indicator
+        cv2.rectangle(annotated_frame, (5, 5), (120, 45), (0, 0, 0), -1)
+        cv2.putText(annotated_frame, "LIVE", (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
         
-        return frame
+        # Add detection counts
+        cv2.putText(annotated_frame, f"Detections: {len(detections)}", (10, 70), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        cv2.putText(annotated_frame, f"Violations: {violation_count}", (10, 95), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if violation_count > 0 else (0, 255, 0), 2)
+        return annotated_frame
     
-    while True:
-        # Get frame - either from camera or synthetic
-        if use_synthetic:
-            frame = generate_synthetic_frame()
-        else:
-            success, frame = cam.read()
-            if not success:
-                print("[ERROR] Failed to read frame from camera - switching to synthetic mode")
-                use_synthetic = True
-                frame = generate_synthetic_frame()
+    def process(frame, frame_count):
+        """Returns (annotated_frame, detections, inferred)"""
+        nonlocal last_detections
         
-        try:
-            frame_count += 1
-            
-            # If model is still loading, send raw frames with loading message
-            if model_loading or model is None:
-                annotated_frame = frame.copy()
-                cv2.rectangle(annotated_frame, (5, 5), (350, 45), (0, 0, 0), -1)
-                cv2.putText(annotated_frame, "Loading AI Model...", (15, 35), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
-            # OPTIMIZATION: Process only every Nth frame
-            elif frame_count % PROCESS_EVERY_N_FRAMES == 0:
-                # Resize frame for faster inference
-                inference_frame = cv2.resize(frame, (INFERENCE_SIZE, INFERENCE_SIZE))
-                
-                # Run YOLOv8 prediction on smaller frame
-                results = model.predict(inference_frame, conf=0.5, verbose=False)[0]
-                
-                # Get annotated frame with bounding boxes (resize back to display size)
-                annotated_small = results.plot()
-                annotated_frame = cv2.resize(annotated_small, (frame.shape[1], frame.shape[0]))
-                
-                # Cache this frame for skipped frames
-                last_annotated_frame = annotated_frame.copy()
-                
-                # Count violations for alerts
-                violation_count = 0
-                no_helmet_count = 0
-                no_vest_count = 0
-                
-                # Parse detections for alert generation
-                if results.boxes is not None:
-                    for box in results.boxes:
-                        cls_id = int(box.cls[0])
-                        class_name = model.names[cls_id]
-                        conf = float(box.conf[0])
-                        
-                        # Check for violations
-                        if 'NO-Hardhat' in class_name or 'NO-Safety Vest' in class_name:
-                            violation_count += 1
-                            
-                            if 'NO-Hardhat' in class_name:
-                                no_helmet_count += 1
-                            if 'NO-Safety Vest' in class_name:
-                                no_vest_count += 1
-                
-                # Send alerts every 30 frames (once per second at 30fps)
-                if frame_count % 30 == 0:
-                    if no_helmet_count > 0:
-                        ALERTS.append({
-                            "type": "NO_HELMET",
-                            "ts": int(time.time() * 1000),
-                            "zone": None,
-                            "frame_path": None,
-                            "meta": {"count": no_helmet_count}
-                        })
-                    
-                    if no_vest_count > 0:
-                        ALERTS.append({
-                            "type": "NO_VEST",
-                            "ts": int(time.time() * 1000),
-                            "zone": None,
-                            "frame_path": None,
-                            "meta": {"count": no_vest_count}
-                        })
-                
-                # Add "LIVE" indicator
-                cv2.rectangle(annotated_frame, (5, 5), (120, 45), (0, 0, 0), -1)
-                cv2.putText(annotated_frame, "LIVE", (15, 35), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
-                
-                # Add detection counts
-                total_detections = len(results.boxes) if results.boxes is not None else 0
-                cv2.putText(annotated_frame, f"Detections: {total_detections}", (10, 70), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-                cv2.putText(annotated_frame, f"Violations: {violation_count}", (10, 95), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255) if violation_count > 0 else (0, 255, 0), 2)
-            else:
-                # OPTIMIZATION: Use cached frame for skipped frames
-                if last_annotated_frame is not None:
-                    annotated_frame = last_annotated_frame
-                else:
-                    annotated_frame = frame
-            
-        except Exception as e:
-            print(f"[ERROR] Frame processing error: {e}")
-            import traceback
-            traceback.print_exc()
-            annotated_frame = frame
+        model = get_loaded_model()
         
-        # Encode frame as JPEG with lower quality for faster transmission
-        try:
-            ret, buffer = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, JPEG_QUALITY])
-            if not ret:
-                print("Failed to encode frame")
+        # If model is still loading, send raw frames with loading message
+        if model is None:
+            annotated_frame = frame.copy()
+            cv2.rectangle(annotated_frame, (5, 5), (350, 45), (0, 0, 0), -1)
+            cv2.putText(annotated_frame, "Loading AI Model...", (15, 35), 
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 165, 255), 2)
+            return annotated_frame, [], False
+        
+        # The capture frame is shared with raw viewers: draw on a private copy,
+        # at full resolution (no resize down and back up)
+        annotated_frame = frame.copy()
+        
+        # OPTIMIZATION: Reuse the last detections for frames the controller skips,
+        # and for static scenes where nothing changed since the last inference.
+        # A violation that stays in view keeps raising alerts from them.
+        if (not inference_controller.should_infer(camera_key)
+                or (MOTION_GATE_ENABLED and not motion_gate.should_infer(frame))):
+            raise_alerts(last_detections)
+            draw_detections(annotated_frame, last_detections)
+            return draw_status(annotated_frame, last_detections), last_detections, False
+        
+        # Letterbox (aspect-preserving) to the size chosen by the controller
+        inference_size = inference_controller.inference_size(camera_key)
+        inference_frame, transform = letterbox_buffer.fit(frame, inference_size)
+        
+        # Run YOLOv8 prediction on smaller frame, batched with other cameras
+        started = time.time()
+        inference_detections = get_inference_scheduler().infer(inference_frame)
+        inference_controller.record_inference(camera_key, time.time() - started)
+        
+        # Map boxes back to source resolution and draw them there
+        detections = unletterbox_detections(inference_detections, transform, frame.shape)
+        draw_detections(annotated_frame, detections)
+        last_detections = detections
+        
+        # Rate-limited by wall-clock time: which frames are inferred depends on
+        # the adaptive stride, not on frame_count
+        raise_alerts(detections)
+        
+        return draw_status(annotated_frame, detections), detections, True
+    
+    return process
+
+def get_frame_broadcaster(source=None):
+    """Get the shared inference broadcaster for a camera source"""
+    if source is None:
+        source = active_camera_source
+    return stream_broadcaster.get_broadcaster(
+        source, get_camera(source), make_frame_processor, generate_synthetic_frame
+    )
+
+# Encode-once JPEG cache: every viewer of a frame receives the same bytes
+JPEG_QUALITY = int(os.getenv("JPEG_QUALITY", "70"))  # Lower quality for faster encoding/transmission
+jpeg_cache = EncodedFrameCache()
+
+def scaled_size(frame, width: Optional[int]):
+    """Target (width, height) for a downscaled stream, or None for full size"""
+    if not width or width >= frame.shape[1]:
+        return None
+    return (width, max(1, round(frame.shape[0] * width / frame.shape[1])))
+
+async def encoded_part(stream_key, seq: int, frame, quality: int, size=None) -> Optional[bytes]:
+    """Multipart chunk for a frame; only cache misses are encoded, off the event loop"""
+    part = jpeg_cache.lookup(stream_key, seq, quality, size)
+    if part is None:
+        part = await run_in_threadpool(jpeg_cache.get_part, stream_key, seq, frame, quality, size)
+    return part
+
+async def generate_frames(broadcaster, width: Optional[int] = None):
+    """Stream video frames with YOLOv8 detections from the camera's shared broadcaster
+    
+    Runs on the event loop instead of pinning a threadpool thread per viewer.
+    The next chunk is only produced once the previous one has been handed to
+    the client's socket, and then it is the newest frame: a slow client skips
+    frames instead of queueing them, so its memory and latency stay bounded.
+    """
+    # The generation keeps a recreated broadcaster (seq restarts at 1) off the old JPEGs
+    stream_key = ("annotated", str(broadcaster.source), broadcaster.generation)
+    print("[INFO] Starting frame generation...")
+    
+    with broadcaster.subscribe() as subscription:
+        while True:
+            published = await subscription.next_frame_async(timeout=2.0)
+            if published is None:
+                if not broadcaster.is_running():
+                    break  # Camera was released or switched
                 continue
-                
-            frame_bytes = buffer.tobytes()
+            seq, _, annotated_frame, _ = published
             
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except Exception as e:
-            print(f"Encode error: {e}")
-            continue
+            # Encoded once per frame, shared by all viewers
+            part = await encoded_part(stream_key, seq, annotated_frame, JPEG_QUALITY,
+                                      scaled_size(annotated_frame, width))
+            if part is None:
+                print("Failed to encode frame")
+                continue
+            yield part
 
 @app.get("/video_feed")
-def video_feed(source: str = None, raw: bool = False):
+def video_feed(source: str = None, raw: bool = False, width: Optional[int] = None):
     """Video streaming endpoint with optional source parameter
     
     Args:
         source: Camera source (index or URL)
         raw: If True, skip AI processing for maximum speed
+        width: Optional output width for downscaled (e.g. grid thumbnail) streams
     """
     # Parse source parameter - can be camera index or URL
-    camera_source = None
-    if source:
-        try:
-            # Try to parse as integer (local webcam index)
-            camera_source = int(source)
-        except ValueError:
-            # It's a URL (IP camera or RTSP)
-            camera_source = source
+    camera_source = parse_camera_source(source)
+    
+    # Camera setup can block, so it runs here in the threadpool; the stream
+    # generators are async and hold no thread while the viewer is connected
     
     # Use raw mode for instant streaming
     if raw:
         return StreamingResponse(
-            generate_raw_frames(camera_source),
+            generate_raw_frames(get_camera(camera_source), width),
             media_type="multipart/x-mixed-replace; boundary=frame"
         )
     
     return StreamingResponse(
-        generate_frames(camera_source),
+        generate_frames(get_frame_broadcaster(camera_source), width),
         media_type="multipart/x-mixed-replace; boundary=frame"
     )
 
-def generate_raw_frames(source=None):
-    """Generate raw video frames without AI processing - MAXIMUM SPEED"""
-    cam = get_camera(source)
+def parse_camera_source(source: Optional[str]):
+    """Parse a source query parameter - camera index or URL"""
+    if not source:
+        return None
+    try:
+        # Try to parse as integer (local webcam index)
+        return int(source)
+    except ValueError:
+        # It's a URL (IP camera or RTSP)
+        return source
+
+@app.get("/video_feed/status")
+def video_feed_status():
+    """Per-camera inference status: subscribers, inference FPS and capture health"""
+    return {
+        "cameras": stream_broadcaster.all_stats(),
+        # Every open capture, including sources only streamed raw
+        "readers": [reader.stats() for reader in camera_reader.active_readers().values()],
+        "scheduler": get_inference_scheduler().stats(),
+        "controller": inference_controller.stats(),
+        "motion_gate": {camera: gate.stats() for camera, gate in motion_gates.items()},
+        "jpeg_cache": jpeg_cache.stats()
+    }
+
+@app.get("/video_feed/detections")
+def video_feed_detections(source: str = None):
+    """Latest detection results published by a camera's broadcaster"""
+    camera_source = parse_camera_source(source)
+    if camera_source is None:
+        camera_source = active_camera_source
+    broadcaster = stream_broadcaster.get_existing_broadcaster(camera_source)
+    published = broadcaster.latest() if broadcaster else None
+    if published is None:
+        return {"source": str(camera_source), "ts": None, "detections": []}
+    _, ts, _, detections = published
+    return {"source": str(camera_source), "ts": int(ts * 1000), "detections": detections}
+
+async def generate_raw_frames(reader, width: Optional[int] = None):
+    """Stream raw video frames without AI processing - MAXIMUM SPEED"""
+    stream_key = ("raw", str(reader.source), reader.generation)
     print("[INFO] Starting RAW frame generation (no AI processing)...")
     
+    last_seq = 0
     while True:
-        success, frame = cam.read()
-        if not success:
+        latest = await reader.wait_for_frame_async(last_seq, timeout=5.0)
+        if latest is None:
             break
+        last_seq, _, frame = latest
         
-        try:
-            # Just encode and send - no processing!
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            if ret:
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-        except:
-            continue
+        # Just encode (once for all raw viewers) and send - no processing!
+        part = await encoded_part(stream_key, last_seq, frame, 60, scaled_size(frame, width))
+        if part is not None:
+            yield part
 
 # Global variable for streaming from remote source
-streaming_frames = []
+remote_frames = FrameChannel()  # Latest processed frame from the remote source
 streaming_active = False
 
+def process_remote_jpeg(jpeg_data: bytes, letterbox_buffer: LetterboxBuffer):
+    """Decode one uploaded JPEG, run YOLOv8 on it and store it for /remote_stream"""
+    # Decode JPEG
+    nparr = np.frombuffer(jpeg_data, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        return
+    
+    # Process with YOLOv8 (raw frame until the model has finished loading)
+    if get_loaded_model() is None:
+        annotated_frame = frame
+    else:
+        # Letterboxed to INFERENCE_SIZE like camera frames: exported models have
+        # a fixed input shape, and it batches with the cameras
+        inference_frame, transform = letterbox_buffer.fit(frame, INFERENCE_SIZE)
+        detections = unletterbox_detections(get_inference_scheduler().infer(inference_frame), transform, frame.shape)
+        annotated_frame = draw_detections(frame, detections)
+    
+    # Store for streaming endpoint
+    remote_frames.publish(annotated_frame)
+
 @app.post("/upload_stream")
 async def upload_stream(request: Request):
-    """Receive MJPEG stream from ffmpeg and process with YOLOv8"""
-    global streaming_frames, streaming_active
+    """Receive MJPEG stream from ffmpeg and process frames with YOLOv8 as they arrive"""
+    global streaming_active
     
     print("[INFO] Receiving stream from remote source...")
     streaming_active = True
     
+    # Frames are parsed incrementally; when the model is busy only the newest
+    # frame is decoded and inferred, older ones are dropped
+    parser = MJPEGStreamParser()
+    letterbox_buffer = LetterboxBuffer()  # Only used by this stream's worker thread
+    worker = LatestFrameWorker(
+        lambda jpeg_data: process_remote_jpeg(jpeg_data, letterbox_buffer), name="remote-stream"
+    ).start()
+    
+    error = None
     try:
-        # Read the multipart stream
-        body = await request.body()
-        
-        # Parse MJPEG stream
-        parts = body.split(b'--')
-        for part in parts:
-            if b'Content-Type: image/jpeg' in part:
-                # Extract JPEG data
-                jpeg_start = part.find(b'\r\n\r\n') + 4
-                if jpeg_start > 3:
-                    jpeg_data = part[jpeg_start:]
-                    
-                    # Decode JPEG
-                    nparr = np.frombuffer(jpeg_data, np.uint8)
-                    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                    
-                    if frame is not None:
-                        # Process with YOLOv8
-                        model = get_yolo_model()
-                        results = model.predict(frame, conf=0.5, verbose=False)[0]
-                        annotated_frame = results.plot()
-                        
-                        # Store for streaming endpoint
-                        streaming_frames.append(annotated_frame)
-                        if len(streaming_frames) > 30:  # Keep only last 30 frames
-                            streaming_frames.pop(0)
-        
-        return {"status": "ok", "message": "Stream received"}
+        async for chunk in request.stream():
+            for jpeg_data in parser.feed(chunk):
+                worker.submit(jpeg_data)
     except Exception as e:
         print(f"[ERROR] Stream upload error: {e}")
-        return {"status": "error", "message": str(e)}
+        error = e
     finally:
+        # The last frame is still processed; joining the worker happens off the event loop
+        await run_in_threadpool(worker.stop, drain=True)
         streaming_active = False
+    
+    if error is not None:
+        return {"status": "error", "message": str(error)}
+    return {"status": "ok", "message": "Stream received", **worker.stats()}
 
 @app.get("/remote_stream")
 def remote_stream():
     """Stream the processed frames from remote source"""
-    def generate():
+    async def generate():
+        # Send the current frame immediately, then wait for new ones
+        latest = remote_frames.latest()
+        last_seq = latest[0] - 1 if latest else 0
         while True:
-            if streaming_frames:
-                frame = streaming_frames[-1]  # Get latest frame
-                ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 80])
-                if ret:
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-            time.sleep(0.033)  # ~30 FPS
+            latest = await remote_frames.wait_for_frame_async(last_seq, timeout=5.0)
+            if latest is None:
+                continue
+            last_seq, _, frame = latest
+            part = await encoded_part(("remote",), last_seq, frame, 80)
+            if part is not None:
+                yield part
     
     return StreamingResponse(
         generate(),
@@ -545,11 +801,9 @@ def remote_stream():
 @app.post("/camera/release")
 def release_camera():
     """Release the camera to turn off the camera light"""
-    global camera
     try:
-        if camera is not None:
-            camera.release()
-            camera = None
+        stream_broadcaster.release_broadcaster(active_camera_source)
+        if camera_reader.release_reader(active_camera_source):
             return {"status": "released", "message": "Camera released successfully"}
         else:
             return {"status": "not_active", "message": "Camera was not active"}
@@ -565,13 +819,12 @@ def switch_camera(source: dict):
     - IP Camera/Phone: {"type": "ip", "url": "http://192.168.1.100:8080/video"}
     - RTSP Stream: {"type": "rtsp", "url": "rtsp://192.168.1.100:8554/stream"}
     """
-    global camera, active_camera_source
+    global active_camera_source
     
     try:
         # Release current camera
-        if camera is not None:
-            camera.release()
-            camera = None
+        stream_broadcaster.release_broadcaster(active_camera_source)
+        camera_reader.release_reader(active_camera_source)
         
         # Determine the new source
         if source.get("type") == "local":
@@ -631,8 +884,43 @@ def list_camera_sources():
 # MOBILE SENSOR DATA INTEGRATION
 # ============================================================================
 
-# Store sensor data in memory (last 1000 entries)
-SENSOR_DATA_HISTORY: List[Dict[str, Any]] = []
+# Fall detection: a run of free fall (low |a|) followed shortly by an impact
+# spike, checked per device over whole uploads (thresholds in m/s^2)
+fall_detector = FallDetector(
+    freefall_threshold=float(os.getenv("FALL_FREEFALL_THRESHOLD", "4.9")),
+    impact_threshold=float(os.getenv("FALL_IMPACT_THRESHOLD", "19.6")),
+    min_freefall_samples=int(os.getenv("FALL_MIN_FREEFALL_SAMPLES", "3")),
+    max_gap_samples=int(os.getenv("FALL_MAX_GAP_SAMPLES", "25"))
+)
+
+# Sensor history partitioned by device: each device has its own columnar ring
+# buffer (oldest overwritten beyond capacity), so one device never evicts another's data
+SENSOR_HISTORY_CAPACITY = int(os.getenv("SENSOR_HISTORY_CAPACITY", "1000"))
+SENSOR_MAX_DEVICES = int(os.getenv("SENSOR_MAX_DEVICES", "500"))
+
+# Disk tier: every sample is also appended to per-device memory-mapped
+# segment files, so history older than the in-memory buffers stays queryable
+SENSOR_ARCHIVE_ENABLED = os.getenv("SENSOR_ARCHIVE_ENABLED", "true").lower() == "true"
+SENSOR_ARCHIVE_DIR = os.getenv("SENSOR_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "sensors"))
+SENSOR_ARCHIVE_RETENTION_DAYS = float(os.getenv("SENSOR_ARCHIVE_RETENTION_DAYS", "28"))
+SENSOR_ARCHIVE_SEGMENT_RECORDS = int(os.getenv("SENSOR_ARCHIVE_SEGMENT_RECORDS", "262144"))
+sensor_archive = None
+if SENSOR_ARCHIVE_ENABLED:
+    try:
+        sensor_archive = SensorArchive(
+            SENSOR_ARCHIVE_DIR,
+            segment_records=SENSOR_ARCHIVE_SEGMENT_RECORDS,
+            retention_days=SENSOR_ARCHIVE_RETENTION_DAYS
+        )
+    except OSError as e:
+        print(f"[WARN] Sensor archive unavailable ({e}); sensor history is kept in memory only")
+
+sensor_devices = DeviceRegistry(
+    capacity_per_device=SENSOR_HISTORY_CAPACITY,
+    max_devices=SENSOR_MAX_DEVICES,
+    on_evict=fall_detector.forget,
+    archive=sensor_archive
+)
 
 # Pydantic models for sensor data
 class AccelerometerData(BaseModel):
@@ -659,6 +947,7 @@ class GPSData(BaseModel):
 
 class SensorDataIn(BaseModel):
     timestamp: str
+    deviceId: Optional[str] = None
     accelerometer: Optional[AccelerometerData] = None
     gyroscope: Optional[GyroscopeData] = None
     magnetometer: Optional[MagnetometerData] = None
@@ -669,56 +958,100 @@ class SensorDataIn(BaseModel):
 
 class BatchSensorData(BaseModel):
     batch: List[SensorDataIn]
+    deviceId: Optional[str] = None
+
+def client_device(request: Request) -> str:
+    """Device id for uploads that do not name one: the client address"""
+    return request.client.host if request.client else "unknown"
+
+def store_sensor_samples(samples: List[SensorDataIn], default_device: str, received_at: int) -> int:
+    """Append an upload to each device's partition and run fall detection on it"""
+    by_device: Dict[str, List[SensorDataIn]] = {}
+    for sample in samples:
+        by_device.setdefault(sample.deviceId or default_device, []).append(sample)
+    
+    stored = 0
+    for device, rows in by_device.items():
+        stored += store_device_samples(device, [s.dict() for s in rows], received_at)
+    return stored
+
+def store_device_samples(device: str, rows: List[Dict[str, Any]], received_at: int) -> int:
+    """Append sample dicts to one device's partition and run fall detection over them at once"""
+    store = sensor_devices.partition(device, len(rows))
+    stored = store.append_many(rows, received_at)
+    
+    rows = [s for s in rows if s.get("accelerometer")]
+    if rows:
+        accel = np.array([[s["accelerometer"]["x"], s["accelerometer"]["y"], s["accelerometer"]["z"]] for s in rows],
+                         dtype=np.float32)
+        record_falls(device, accel, [s["timestamp"] for s in rows])
+    return stored
+
+def store_device_frame(device: str, payload: bytes, received_at: int) -> Tuple[int, int]:
+    """
+    Decode a sensor_binary frame into one device's partition and run fall detection on it
+
+    Returns:
+        (samples in the frame, samples stored for the device afterwards)
+
+    Raises:
+        ValueError: If the frame is malformed
+    """
+    timestamps, client_ms, readings, valid = decode_frame(payload)
+    store = sensor_devices.partition(device, len(timestamps))
+    stored = store.append_columns(timestamps, readings, valid, received_at, client_ms)
+    
+    accel_rows = valid["accelerometer"]
+    if accel_rows.any():
+        record_falls(device, readings["accelerometer"][accel_rows], timestamps[accel_rows])
+    return len(timestamps), stored
+
+def record_falls(device: str, accel: np.ndarray, timestamps) -> int:
+    """Feed one device's accelerometer rows to the fall detector and record its alerts"""
+    falls = fall_detector.detect(device, accel)
+    for fall in falls:
+        sample_timestamp = timestamps[fall["index"]]
+        if isinstance(sample_timestamp, bytes):
+            sample_timestamp = sample_timestamp.decode("ascii")
+        record_alert({
+            "type": "POTENTIAL_FALL",
+            "ts": int(time.time() * 1000),
+            "zone": None,
+            "frame_path": None,
+            "meta": {
+                "acceleration": fall["impact"],
+                "freefall_min": fall["freefall_min"],
+                "device": device,
+                "sample_timestamp": sample_timestamp,
+                "source": "mobile_sensor"
+            }
+        })
+        print(f"[ALERT] Potential fall detected on {device}! Impact: {fall['impact']:.2f} m/s² "
+              f"after free fall (min {fall['freefall_min']:.2f} m/s²)")
+    return len(falls)
 
 @app.post("/api/sensor-data")
-def receive_sensor_data(sensor_data: SensorDataIn):
+def receive_sensor_data(sensor_data: SensorDataIn, request: Request):
     """
     Receive real-time sensor data from mobile devices (phones/tablets).
     This endpoint accepts data from the Flutter sensor app.
     """
     try:
-        # Convert to dict and add server timestamp
-        data_dict = sensor_data.dict()
-        data_dict["server_received_at"] = int(time.time() * 1000)
-        
-        # Add to history
-        SENSOR_DATA_HISTORY.append(data_dict)
-        
-        # Keep only last 1000 entries
-        if len(SENSOR_DATA_HISTORY) > 1000:
-            SENSOR_DATA_HISTORY.pop(0)
+        # Add to the device's history with the server timestamp; free fall
+        # followed by an impact raises a POTENTIAL_FALL alert
+        received_at = int(time.time() * 1000)
+        stored = store_sensor_samples([sensor_data], client_device(request), received_at)
         
         # Log for debugging
         print(f"[SENSOR] Received sensor data: Accel={sensor_data.accelerometer is not None}, "
               f"Gyro={sensor_data.gyroscope is not None}, GPS={sensor_data.gps is not None}, "
               f"Light={sensor_data.ambientLight}")
         
-        # Optional: Generate alerts based on sensor data
-        # Example: High acceleration might indicate a fall
-        if sensor_data.accelerometer:
-            accel_magnitude = (sensor_data.accelerometer.x**2 + 
-                             sensor_data.accelerometer.y**2 + 
-                             sensor_data.accelerometer.z**2)**0.5
-            
-            # Detect potential fall (acceleration > 2g)
-            if accel_magnitude > 19.6:  # 2g in m/s^2
-                ALERTS.append({
-                    "type": "POTENTIAL_FALL",
-                    "ts": int(time.time() * 1000),
-                    "zone": None,
-                    "frame_path": None,
-                    "meta": {
-                        "acceleration": accel_magnitude,
-                        "source": "mobile_sensor"
-                    }
-                })
-                print(f"[ALERT] Potential fall detected! Acceleration: {accel_magnitude:.2f} m/s²")
-        
         return {
             "success": True,
             "message": "Sensor data received successfully",
-            "timestamp": data_dict["server_received_at"],
-            "entries_stored": len(SENSOR_DATA_HISTORY)
+            "timestamp": received_at,
+            "entries_stored": stored
         }
     
     except Exception as e:
@@ -726,92 +1059,376 @@ def receive_sensor_data(sensor_data: SensorDataIn):
         raise HTTPException(status_code=400, detail=str(e))
 
 @app.post("/api/sensor-data/batch")
-def receive_batch_sensor_data(batch_data: BatchSensorData):
+def receive_batch_sensor_data(batch_data: BatchSensorData, request: Request):
     """Receive batch sensor data from mobile devices"""
     try:
         received_count = len(batch_data.batch)
-        
-        for sensor_data in batch_data.batch:
-            data_dict = sensor_data.dict()
-            data_dict["server_received_at"] = int(time.time() * 1000)
-            SENSOR_DATA_HISTORY.append(data_dict)
-        
-        # Keep only last 1000 entries
-        if len(SENSOR_DATA_HISTORY) > 1000:
-            SENSOR_DATA_HISTORY[:] = SENSOR_DATA_HISTORY[-1000:]
+        received_at = int(time.time() * 1000)
+        stored = store_sensor_samples(batch_data.batch, batch_data.deviceId or client_device(request), received_at)
         
         print(f"[SENSOR] Received batch of {received_count} sensor data entries")
         
         return {
             "success": True,
             "message": f"{received_count} sensor data entries received",
-            "timestamp": int(time.time() * 1000),
-            "entries_stored": len(SENSOR_DATA_HISTORY)
+            "timestamp": received_at,
+            "entries_stored": stored
         }
     
     except Exception as e:
         print(f"[ERROR] Failed to process batch sensor data: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@app.post("/api/sensor-data/binary")
+async def receive_binary_sensor_data(request: Request, deviceId: Optional[str] = None):
+    """
+    Receive packed binary sensor frames (see sensor_binary.py), decoded with
+    np.frombuffer directly into the columnar store - no per-sample JSON parsing.
+    """
+    payload = await request.body()
+    received_at = int(time.time() * 1000)
+    try:
+        received, stored = await run_in_threadpool(store_device_frame, deviceId or client_device(request), payload, received_at)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "success": True,
+        "message": f"{received} sensor data entries received",
+        "timestamp": received_at,
+        "entries_stored": stored
+    }
+
+# Persistent sensor connections: a device says hello (and authenticates) once,
+# then streams samples. JSON messages arriving within SENSOR_WS_FLUSH_MS are
+# stored together (one append and one fall detection pass), and acks are
+# batched by sample count or time
+SENSOR_WS_TOKEN = os.getenv("SENSOR_WS_TOKEN", "")
+SENSOR_WS_ACK_SAMPLES = int(os.getenv("SENSOR_WS_ACK_SAMPLES", "500"))
+SENSOR_WS_ACK_MS = int(os.getenv("SENSOR_WS_ACK_MS", "1000"))
+SENSOR_WS_FLUSH_MS = 50
+SENSOR_WS_FLUSH_MESSAGES = 256
+SENSOR_WS_HELLO_TIMEOUT_S = 10.0
+
+def parse_ws_samples(text: Optional[str]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """
+    Samples of a /ws/sensor JSON message: one sample, a list of samples or {"seq", "batch"}
+
+    Returns:
+        (client seq if the message carried one, sample dicts)
+
+    Raises:
+        ValueError: If the message is not JSON or a sample has no timestamp
+    """
+    data = json.loads(text or "")
+    seq = None
+    if isinstance(data, dict) and "batch" in data:
+        seq, data = data.get("seq"), data["batch"]
+    elif isinstance(data, dict):
+        seq = data.pop("seq", None)
+    rows = data if isinstance(data, list) else [data]
+    if not all(isinstance(row, dict) and row.get("timestamp") for row in rows):
+        raise ValueError("Every sample needs a timestamp")
+    return seq, rows
+
+def store_ws_messages(device: str, messages: List[Tuple[int, Dict[str, Any], int]]) -> Tuple[List[Tuple[int, Any, int, Optional[str]]], int]:
+    """
+    Store buffered /ws/sensor data messages for a device, in order. Samples of
+    consecutive JSON messages are appended together; binary (sensor_binary)
+    frames go in one at a time.
+
+    Args:
+        messages: (message number, ASGI receive message, receive time in epoch ms)
+
+    Returns:
+        ((message number, client seq, samples, error or None) per message,
+        samples stored for the device afterwards)
+    """
+    results = []
+    stored = len(sensor_devices.get(device) or [])
+    group: List[Tuple[int, Any, List[Dict[str, Any]]]] = []
+    
+    def store_group(received_at: int):
+        nonlocal stored
+        if not group:
+            return
+        try:
+            stored = store_device_samples(device, [row for _, _, rows in group for row in rows], received_at)
+            results.extend((number, seq, len(rows), None) for number, seq, rows in group)
+        except (ValueError, KeyError, TypeError):
+            # Find the malformed message(s); the rest are still stored
+            for number, seq, rows in group:
+                try:
+                    stored = store_device_samples(device, rows, received_at)
+                    results.append((number, seq, len(rows), None))
+                except (ValueError, KeyError, TypeError) as e:
+                    results.append((number, seq, 0, f"Invalid sample: {e}"))
+        group.clear()
+    
+    for number, message, received_at in messages:
+        if message.get("bytes") is not None:
+            store_group(received_at)
+            try:
+                received, stored = store_device_frame(device, message["bytes"], received_at)
+                results.append((number, None, received, None))
+            except ValueError as e:
+                results.append((number, None, 0, str(e)))
+            continue
+        try:
+            seq, rows = parse_ws_samples(message.get("text"))
+            group.append((number, seq, rows))
+        except ValueError as e:
+            results.append((number, None, 0, str(e)))
+    store_group(messages[-1][2])
+    return sorted(results, key=lambda result: result[0]), stored
+
+@app.websocket("/ws/sensor")
+async def sensor_stream_ws(websocket: WebSocket):
+    """
+    Persistent sensor ingestion channel (see README: WebSocket /ws/sensor).
+
+    The first message is {"type": "hello", "deviceId", "token"}; after the
+    {"type": "ready"} reply every text (JSON) or binary (sensor_binary frame)
+    message is stored for that device with the same fall detection as the REST
+    endpoints. Each ack covers all messages since the previous one.
+    """
+    await websocket.accept()
+    try:
+        hello = json.loads(await asyncio.wait_for(websocket.receive_text(), SENSOR_WS_HELLO_TIMEOUT_S))
+    except WebSocketDisconnect:
+        return
+    except (asyncio.TimeoutError, ValueError, KeyError):
+        await websocket.close(code=1008, reason="Expected a hello message")
+        return
+    if not isinstance(hello, dict) or hello.get("type") != "hello":
+        await websocket.close(code=1008, reason="Expected a hello message")
+        return
+    if SENSOR_WS_TOKEN and not hmac.compare_digest(str(hello.get("token") or ""), SENSOR_WS_TOKEN):
+        await websocket.close(code=1008, reason="Invalid token")
+        return
+    device = str(hello.get("deviceId") or (websocket.client.host if websocket.client else "unknown"))
+    await websocket.send_text(json.dumps({
+        "type": "ready", "deviceId": device,
+        "ack_samples": SENSOR_WS_ACK_SAMPLES, "ack_ms": SENSOR_WS_ACK_MS
+    }))
+    print(f"[SENSOR] WebSocket stream opened for {device}")
+    
+    loop = asyncio.get_running_loop()
+    pending: List[Tuple[int, Dict[str, Any], int]] = []
+    messages = total = unacked = stored = 0
+    last_seq = None
+    flush_at = ack_at = None
+    connected = True
+    try:
+        while connected:
+            deadlines = [d for d in (flush_at, ack_at) if d is not None]
+            timeout = max(0.0, min(deadlines) - loop.time()) if deadlines else None
+            try:
+                message = await asyncio.wait_for(websocket.receive(), timeout)
+            except asyncio.TimeoutError:
+                message = None
+            
+            if message is not None and message["type"] == "websocket.disconnect":
+                connected = False
+            elif message is not None:
+                messages += 1
+                pending.append((messages, message, int(time.time() * 1000)))
+                if flush_at is None:
+                    flush_at = loop.time() + SENSOR_WS_FLUSH_MS / 1000
+            
+            if pending and (not connected or len(pending) >= SENSOR_WS_FLUSH_MESSAGES
+                            or loop.time() >= flush_at or pending[-1][1].get("bytes") is not None):
+                results, stored = await run_in_threadpool(store_ws_messages, device, pending)
+                pending, flush_at = [], None
+                for number, seq, received, error in results:
+                    if error is not None:
+                        if connected:
+                            await websocket.send_text(json.dumps({"type": "error", "message": number, "seq": seq, "detail": error}))
+                        continue
+                    last_seq = seq if seq is not None else number
+                    total += received
+                    unacked += received
+                if unacked and ack_at is None:
+                    ack_at = loop.time() + SENSOR_WS_ACK_MS / 1000
+            
+            if connected and ack_at is not None and (unacked >= SENSOR_WS_ACK_SAMPLES or loop.time() >= ack_at):
+                await websocket.send_text(json.dumps({
+                    "type": "ack", "seq": last_seq, "samples": unacked, "total": total, "stored": stored
+                }))
+                unacked, ack_at = 0, None
+    except WebSocketDisconnect:
+        pass
+    print(f"[SENSOR] WebSocket stream closed for {device}: {total} samples in {messages} messages")
+
+def sensor_partitions(device: Optional[str]) -> Dict[str, Any]:
+    """Partitions a read touches: just the named device, or every device"""
+    if device is None:
+        return sensor_devices.stores()
+    store = sensor_devices.get(device)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"Unknown sensor device {device!r}")
+    return {device: store}
+
+def sensor_range_columns(device: Optional[str], start: int, end: int, with_timestamps: bool = True) -> Dict[str, Any]:
+    """
+    Columns of samples in [start, end) for one device or all devices: from the
+    in-memory buffer when it covers the range, else from the disk archive
+    """
+    if device is not None:
+        names = [device]
+        if sensor_devices.get(device) is None and (sensor_archive is None or device not in sensor_archive.devices()):
+            raise HTTPException(status_code=404, detail=f"Unknown sensor device {device!r}")
+    else:
+        names = list(sensor_devices.stores())
+        if sensor_archive is not None:
+            names += [name for name in sensor_archive.devices() if name not in names]
+
+    parts = {}
+    for name in names:
+        store = sensor_devices.get(name)
+        oldest = store.first_t_ms() if store is not None else None
+        if oldest is not None and (start >= oldest or sensor_archive is None):
+            parts[name] = store.range_columns(start, end)
+        elif sensor_archive is not None:
+            parts[name] = sensor_archive.range_columns(name, start, end, with_timestamps=with_timestamps)
+    return merge_columns(parts)
+
+@app.get("/api/sensor-data/devices")
+def list_sensor_devices():
+    """Registry of devices with their stored samples, last-seen times and sample rates"""
+    devices = sensor_devices.devices()
+    return {
+        "devices": devices,
+        "count": len(devices),
+        "archive": sensor_archive.usage() if sensor_archive is not None else None
+    }
+
 @app.get("/api/sensor-data/latest")
-def get_latest_sensor_data(count: int = 10):
-    """Get the latest sensor data entries"""
+def get_latest_sensor_data(count: int = 10, device: Optional[str] = None):
+    """Get the latest sensor data entries (of one device, or merged across devices)"""
     if count > 100:
         count = 100  # Limit to 100 entries max
     
-    latest = SENSOR_DATA_HISTORY[-count:] if SENSOR_DATA_HISTORY else []
+    partitions = sensor_partitions(device)
+    latest = samples_from_columns(merge_columns({name: store.columns(count) for name, store in partitions.items()}, limit=count))
     return {
         "data": latest,
         "count": len(latest),
-        "total_stored": len(SENSOR_DATA_HISTORY)
+        "total_stored": sum(len(store) for store in partitions.values())
+    }
+
+@app.get("/api/sensor-data/query")
+def query_sensor_data(fields: str = "accelerometer.magnitude", device: Optional[str] = None,
+                      start: Optional[int] = None, end: Optional[int] = None, bucket_ms: Optional[int] = None,
+                      mode: Literal["aggregate", "lttb"] = "aggregate", points: int = 500):
+    """
+    Chart-sized sensor history of one device (or all devices merged) for a
+    time range (epoch ms, default: the last hour).
+
+    mode=aggregate returns min/max/mean/last/count per bucket_ms bucket;
+    mode=lttb returns at most `points` samples chosen by LTTB downsampling.
+    fields is a comma-separated list such as "accelerometer.magnitude,gps.speed,ambientLight".
+    """
+    end = end if end is not None else int(time.time() * 1000) + 1
+    start = start if start is not None else end - 3600_000
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    columns = sensor_range_columns(device, start, end, with_timestamps=False)
+    try:
+        return sensor_query.query(
+            columns,
+            [f.strip() for f in fields.split(",") if f.strip()],
+            start, end, bucket_ms=bucket_ms, mode=mode, points=points
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"{e}; fields: {', '.join(sensor_query.field_names())}")
+
+@app.get("/api/sensor-data/history")
+def get_sensor_history(start: int, end: Optional[int] = None, device: Optional[str] = None, limit: int = 1000):
+    """Raw samples in [start, end) (epoch ms, server clock), including archived history, oldest first"""
+    end = end if end is not None else int(time.time() * 1000) + 1
+    limit = max(1, min(limit, 10000))
+    columns = sensor_range_columns(device, start, end)
+    data = samples_from_columns({
+        key: ({s: m[:limit] for s, m in value.items()} if key == "valid" else value[:limit])
+        for key, value in columns.items()
+    })
+    return {
+        "data": data,
+        "count": len(data),
+        "truncated": len(columns["t_ms"]) > limit
     }
 
 @app.get("/api/sensor-data/all")
-def get_all_sensor_data():
-    """Get all stored sensor data"""
+def get_all_sensor_data(device: Optional[str] = None):
+    """Get all stored sensor data (of one device, or merged across devices)"""
+    data = samples_from_columns(merge_columns({name: store.columns() for name, store in sensor_partitions(device).items()}))
     return {
-        "data": SENSOR_DATA_HISTORY,
-        "count": len(SENSOR_DATA_HISTORY)
+        "data": data,
+        "count": len(data)
     }
 
 @app.delete("/api/sensor-data")
-def clear_sensor_data():
-    """Clear all sensor data history"""
-    SENSOR_DATA_HISTORY.clear()
+def clear_sensor_data(device: Optional[str] = None):
+    """Clear the sensor data history (memory and archive) of one device, or of all devices"""
+    if device is None:
+        sensor_devices.clear()
+        if sensor_archive is not None:
+            sensor_archive.purge()
+    else:
+        removed = sensor_devices.remove(device)
+        if sensor_archive is not None:
+            removed = sensor_archive.purge(device) > 0 or removed
+        if not removed:
+            raise HTTPException(status_code=404, detail=f"Unknown sensor device {device!r}")
     return {
         "success": True,
         "message": "Sensor data history cleared"
     }
 
+def process_rss_bytes() -> Optional[int]:
+    """Resident memory of this worker process (Linux only; None elsewhere)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
 @app.get("/api/sensor-data/stats")
-def get_sensor_stats():
-    """Get statistics about received sensor data"""
-    if not SENSOR_DATA_HISTORY:
+def get_sensor_stats(device: Optional[str] = None):
+    """Get statistics about received sensor data (of one device, or all devices)"""
+    partitions = sensor_partitions(device)
+    total_entries = sum(len(store) for store in partitions.values())
+    if not total_entries:
         return {
             "total_entries": 0,
-            "message": "No sensor data received yet"
+            "message": "No sensor data received yet",
+            "rss_bytes": process_rss_bytes(),
+            "archive": sensor_archive.stats() if sensor_archive is not None else None
         }
     
-    # Calculate statistics
-    has_accelerometer = sum(1 for d in SENSOR_DATA_HISTORY if d.get("accelerometer"))
-    has_gyroscope = sum(1 for d in SENSOR_DATA_HISTORY if d.get("gyroscope"))
-    has_magnetometer = sum(1 for d in SENSOR_DATA_HISTORY if d.get("magnetometer"))
-    has_gps = sum(1 for d in SENSOR_DATA_HISTORY if d.get("gps"))
-    has_light = sum(1 for d in SENSOR_DATA_HISTORY if d.get("ambientLight") is not None)
-    
-    latest = SENSOR_DATA_HISTORY[-1] if SENSOR_DATA_HISTORY else None
+    # Coverage counts are maintained on insert, so this does not scan the history
+    coverage: Dict[str, int] = {}
+    for store in partitions.values():
+        for sensor, n in store.coverage().items():
+            coverage[sensor] = coverage.get(sensor, 0) + n
+    newest = max((store for store in partitions.values() if len(store)), key=lambda store: store.last_t_ms())
     
     return {
-        "total_entries": len(SENSOR_DATA_HISTORY),
+        "total_entries": total_entries,
+        "devices": len(partitions),
         "sensor_coverage": {
-            "accelerometer": has_accelerometer,
-            "gyroscope": has_gyroscope,
-            "magnetometer": has_magnetometer,
-            "gps": has_gps,
-            "light": has_light
+            "accelerometer": coverage["accelerometer"],
+            "gyroscope": coverage["gyroscope"],
+            "magnetometer": coverage["magnetometer"],
+            "gps": coverage["gps"],
+            "light": coverage["ambientLight"]
         },
-        "latest_timestamp": latest.get("timestamp") if latest else None,
-        "server_uptime": int(time.time())
+        "latest_timestamp": newest.latest_timestamp(),
+        "server_uptime": int(time.time()),
+        "history_bytes": sum(store.nbytes for store in partitions.values()),
+        "rss_bytes": process_rss_bytes(),
+        "archive": sensor_archive.stats() if sensor_archive is not None else None
     }
 
 # ============================================================================
@@ -943,7 +1560,7 @@ def voice_call_emergency(contact: ContactName):
         )
         
         # Log the emergency call
-        ALERTS.append({
+        record_alert({
             "type": f"EMERGENCY_CALL_{contact.upper()}",
             "ts": int(time.time() * 1000),
             "zone": None,
@@ -0,0 +1,77 @@
+"""
+Async Stream Module.
+Lets asyncio stream generators wait for frames published by the capture,
+broadcaster and remote-upload threads without holding a threadpool thread per
+viewer. Producers call AsyncFrameNotifier.notify() next to their condition
+variable notify_all(); each waiting coroutine is woken on its own event loop.
+"""
+
+import asyncio
+import threading
+from typing import Callable, Dict, List
+
+
+class AsyncFrameNotifier:
+    """Thread-to-asyncio wakeup for coroutines waiting on a new frame."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Dict[asyncio.AbstractEventLoop, List[asyncio.Future]] = {}
+
+    def notify(self):
+        """Wake every waiting coroutine (callable from any thread)."""
+        with self._lock:
+            if not self._waiters:
+                return
+            waiters, self._waiters = self._waiters, {}
+        # One cross-thread call per event loop, however many viewers wait on it
+        for loop, futures in waiters.items():
+            try:
+                loop.call_soon_threadsafe(_wake, futures)
+            except RuntimeError:
+                pass  # Loop already closed
+
+    async def wait(self, ready: Callable[[], bool], timeout: float) -> bool:
+        """
+        Wait until ready() is true or the timeout expires.
+
+        Args:
+            ready: Non-blocking check of the condition being waited for
+            timeout: Maximum seconds to wait
+
+        Returns:
+            ready() when the wait ends
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            future = loop.create_future()
+            with self._lock:
+                self._waiters.setdefault(loop, []).append(future)
+            try:
+                # Checked after registering so a publish in between is not missed
+                if ready():
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(future, remaining)
+                except asyncio.TimeoutError:
+                    return ready()
+            finally:
+                self._discard(loop, future)
+
+    def _discard(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future):
+        with self._lock:
+            futures = self._waiters.get(loop)
+            if futures is not None and future in futures:
+                futures.remove(future)
+                if not futures:
+                    del self._waiters[loop]
+
+
+def _wake(futures: List[asyncio.Future]):
+    for future in futures:
+        if not future.done():
+            future.set_result(None)
@@ -0,0 +1,292 @@
+"""
+Camera Reader Module.
+Runs one background capture thread per video source and keeps the newest
+timestamped frames in a small ring buffer, so any number of stream consumers
+can read the latest frame without touching (or racing on) the capture handle.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from async_stream import AsyncFrameNotifier
+
+
+CameraSource = Union[int, str]
+
+# (sequence number, capture timestamp in seconds, BGR frame)
+TimestampedFrame = Tuple[int, float, np.ndarray]
+
+# Distinguishes readers of the same source: sequence numbers restart per reader
+_generations = itertools.count(1)
+
+
+class CameraReader:
+    """Background capture thread draining a single video source."""
+
+    def __init__(
+        self,
+        source: CameraSource,
+        width: int = 640,
+        height: int = 480,
+        fps: int = 30,
+        buffer_size: int = 4,
+        reconnect_delay: float = 2.0
+    ):
+        """
+        Initialize the camera reader (the capture thread starts on start()).
+
+        Args:
+            source: Camera index, video file path, or IP/RTSP URL
+            width, height: Requested capture resolution
+            fps: Requested capture frame rate
+            buffer_size: Number of recent frames kept in the ring buffer
+            reconnect_delay: Seconds to wait before reopening a failed source
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.reconnect_delay = reconnect_delay
+
+        self._frames: Deque[TimestampedFrame] = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+        self._notifier = AsyncFrameNotifier()
+        self._seq = 0
+        self.generation = next(_generations)
+        self._capture: Optional[cv2.VideoCapture] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._opened = False
+
+        # Video files are read as fast as the decoder allows, so pace them
+        # to their native frame rate; live devices pace themselves.
+        self._paced = isinstance(source, str) and os.path.isfile(source)
+
+        # Measured capture rate (exponential moving average)
+        self._measured_fps = 0.0
+
+    def start(self) -> "CameraReader":
+        """Start the capture thread if it is not already running."""
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"camera-reader-{self.source}",
+            daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 2.0):
+        """
+        Stop the capture thread; the thread releases the device on its way out.
+
+        The device is never released from the caller's thread, which could
+        race a read() in progress: when the join times out, the capture
+        thread still releases it once the read returns.
+        """
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+            self._notifier.notify()
+        thread, self._thread = self._thread, None
+        if thread is None:
+            self._release_capture()
+        elif thread is not threading.current_thread():
+            thread.join(timeout=timeout)
+
+    def is_running(self) -> bool:
+        """True while the capture thread is alive."""
+        return self._running
+
+    def wait_until_ready(self, timeout: float = 3.0) -> bool:
+        """
+        Block until the first frame arrives or the source fails to open.
+
+        Returns:
+            True if at least one frame is available
+        """
+        return self.wait_for_frame(after_seq=0, timeout=timeout) is not None
+
+    def latest(self) -> Optional[TimestampedFrame]:
+        """
+        Get the newest captured frame without blocking.
+
+        Returns:
+            (seq, timestamp, frame) tuple, or None if nothing was captured yet.
+            The frame is shared between consumers and must not be modified.
+        """
+        with self._cond:
+            return self._frames[-1] if self._frames else None
+
+    def wait_for_frame(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[TimestampedFrame]:
+        """
+        Wait for a frame newer than after_seq.
+
+        Args:
+            after_seq: Sequence number of the last frame the caller consumed
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Newest (seq, timestamp, frame) tuple, or None on timeout
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._running and self._seq <= after_seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._frames[-1] if self._seq > after_seq and self._frames else None
+
+    async def wait_for_frame_async(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[TimestampedFrame]:
+        """Asyncio version of wait_for_frame() that does not block a thread."""
+        await self._notifier.wait(lambda: self._seq > after_seq or not self._running, timeout)
+        with self._cond:
+            return self._frames[-1] if self._seq > after_seq and self._frames else None
+
+    def stats(self) -> Dict:
+        """Capture statistics for status endpoints."""
+        latest = self.latest()
+        return {
+            "source": str(self.source),
+            "running": self._running,
+            "opened": self._opened,
+            "frames_captured": self._seq,
+            "capture_fps": round(self._measured_fps, 1),
+            "last_frame_age_ms": int((time.time() - latest[1]) * 1000) if latest else None,
+        }
+
+    def _open_capture(self) -> bool:
+        """Open (or reopen) the capture device with low-latency settings."""
+        self._release_capture()
+        print(f"[INFO] Initializing camera {self.source}...")
+        capture = cv2.VideoCapture(self.source)
+        if not capture.isOpened():
+            print(f"[WARN] Could not open camera {self.source}")
+            capture.release()
+            return False
+
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        capture.set(cv2.CAP_PROP_FPS, self.fps)
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize driver-side buffer lag
+
+        self._capture = capture
+        print(f"[INFO] Camera {self.source} initialized successfully")
+        return True
+
+    def _release_capture(self):
+        if self._capture is not None:
+            try:
+                self._capture.release()
+            except Exception:
+                pass
+            self._capture = None
+        self._opened = False
+
+    def _run(self):
+        """Capture thread: the only place the device is released once started."""
+        try:
+            self._capture_loop()
+        finally:
+            self._release_capture()
+
+    def _capture_loop(self):
+        """Capture loop: drain the device into the ring buffer at its native rate."""
+        last_ts = None
+        while self._running:
+            if self._capture is None:
+                if not self._open_capture():
+                    # Wake waiting consumers so they can fall back to placeholders
+                    with self._cond:
+                        self._cond.notify_all()
+                        self._notifier.notify()
+                    time.sleep(self.reconnect_delay)
+                    continue
+                native_fps = self._capture.get(cv2.CAP_PROP_FPS) or self.fps
+                frame_interval = 1.0 / native_fps if native_fps > 0 else 1.0 / self.fps
+
+            success, frame = self._capture.read()
+            if not success or frame is None:
+                print(f"[ERROR] Failed to read frame from camera {self.source} - reconnecting")
+                self._release_capture()
+                with self._cond:
+                    self._cond.notify_all()
+                    self._notifier.notify()
+                time.sleep(self.reconnect_delay)
+                continue
+
+            now = time.time()
+            if last_ts is not None:
+                dt = now - last_ts
+                if dt > 0:
+                    instant_fps = 1.0 / dt
+                    if self._measured_fps:
+                        instant_fps = 0.9 * self._measured_fps + 0.1 * instant_fps
+                    self._measured_fps = instant_fps
+            last_ts = now
+
+            with self._cond:
+                self._opened = True
+                self._seq += 1
+                self._frames.append((self._seq, now, frame))
+                self._cond.notify_all()
+                self._notifier.notify()
+
+            if self._paced:
+                time.sleep(max(0.0, frame_interval - (time.time() - now)))
+
+
+# Registry of running readers, one per source
+_readers: Dict[str, CameraReader] = {}
+_readers_lock = threading.Lock()
+
+
+def get_reader(source: CameraSource) -> CameraReader:
+    """Get the running reader for a source, starting one if needed."""
+    key = str(source)
+    with _readers_lock:
+        reader = _readers.get(key)
+        if reader is None or not reader.is_running():
+            reader = CameraReader(source).start()
+            _readers[key] = reader
+        return reader
+
+
+def release_reader(source: CameraSource) -> bool:
+    """
+    Stop the reader for a source and release its device.
+
+    Returns:
+        True if a reader was running for the source
+    """
+    with _readers_lock:
+        reader = _readers.pop(str(source), None)
+    if reader is None:
+        return False
+    reader.stop()
+    return True
+
+
+def release_all():
+    """Stop every running reader (used on shutdown)."""
+    with _readers_lock:
+        readers = list(_readers.values())
+        _readers.clear()
+    for reader in readers:
+        reader.stop()
+
+
+def active_readers() -> Dict[str, CameraReader]:
+    """Snapshot of the running readers keyed by source."""
+    with _readers_lock:
+        return dict(_readers)
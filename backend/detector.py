@@ -1,46 +1,142 @@
+import math
+
 import cv2
 import numpy as np
 
+# Detection window of OpenCV's default people detector (width, height)
+HOG_WINDOW = (64, 128)
+
+
+class PersonDetector:
+    """
+    HOG person detector built once and reused for every frame.
+
+    The descriptor (and the Haar cascade for method="haar") is created in the
+    constructor instead of per call, and detection runs on a downscaled copy
+    of the frame with the boxes mapped back to frame coordinates. The
+    smallest person found is HOG_WINDOW[1] pixels tall in the downscaled
+    copy, so min_person_height lets the copy shrink further when people are
+    large in the image, and max_person_height caps the pyramid levels.
+    """
+
+    def __init__(self, method="hog", detect_width=480, scale=1.1, win_stride=8, padding=8,
+                 min_person_height=0, max_person_height=0, hit_threshold=0.0):
+        """
+        Args:
+            method: "hog" (more accurate) or "haar" (full-body cascade, faster)
+            detect_width: Width of the copy detection runs on (0 = full frame)
+            scale: Pyramid step between levels (OpenCV default 1.05 has ~2x the levels of 1.1)
+            win_stride: Window step in pixels of the downscaled copy
+            padding: Padding around the image in pixels of the downscaled copy
+            min_person_height: Smallest person to find, in frame pixels (0 = what detect_width allows)
+            max_person_height: Largest person to find, in frame pixels (0 = no limit)
+            hit_threshold: SVM score a HOG window needs to count as a person
+        """
+        if method not in ("hog", "haar"):
+            raise ValueError(f"Unknown person detector method {method!r} (hog or haar)")
+        self.method = method
+        self.detect_width = detect_width
+        self.scale = max(1.01, scale)
+        self.win_stride = (win_stride, win_stride)
+        self.padding = (padding, padding)
+        self.min_person_height = min_person_height
+        self.max_person_height = max_person_height
+        self.hit_threshold = hit_threshold
+        self._hogs = {}
+        self._cascade = None
+        if method == "haar":
+            self._cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_fullbody.xml')
+
+    def detect(self, frame):
+        """
+        Detect persons in a BGR frame.
+
+        Returns list of bounding boxes (x, y, w, h) in frame coordinates
+        """
+        try:
+            factor = self._factor(frame.shape[1])
+            small = frame
+            if factor < 1.0:
+                size = (max(1, round(frame.shape[1] * factor)), max(1, round(frame.shape[0] * factor)))
+                small = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+            if self.method == "haar":
+                boxes = self._detect_haar(small, factor)
+            else:
+                boxes, _ = self._hog(factor).detectMultiScale(
+                    small, hitThreshold=self.hit_threshold, winStride=self.win_stride,
+                    padding=self.padding, scale=self.scale
+                )
+        except cv2.error:
+            return []
+
+        if len(boxes) == 0:
+            return []
+        # Back to frame coordinates
+        boxes = np.round(np.asarray(boxes, dtype=np.float64) / factor).astype(int)
+        return [tuple(int(v) for v in box) for box in boxes]
+
+    __call__ = detect
+
+    def _factor(self, frame_width):
+        """Downscale factor of the detection copy (<= 1)."""
+        factor = 1.0
+        if self.detect_width and frame_width > self.detect_width:
+            factor = self.detect_width / frame_width
+        if self.min_person_height:
+            # The smallest wanted person just fills the detection window
+            factor = min(factor, HOG_WINDOW[1] / self.min_person_height)
+        return factor
+
+    def _hog(self, factor):
+        """Descriptor whose pyramid stops at max_person_height (cached per level count)."""
+        nlevels = 64
+        if self.max_person_height:
+            largest = self.max_person_height * factor / HOG_WINDOW[1]
+            nlevels = max(1, int(math.log(max(largest, 1.0)) / math.log(self.scale)) + 1)
+        hog = self._hogs.get(nlevels)
+        if hog is None:
+            hog = cv2.HOGDescriptor(HOG_WINDOW, (16, 16), (8, 8), (8, 8), 9, 1, -1.0,
+                                    cv2.HOGDescriptor_L2Hys, 0.2, True, nlevels)
+            hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+            self._hogs[nlevels] = hog
+        return hog
+
+    def _detect_haar(self, small, factor):
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        min_size = (30, 30)
+        if self.min_person_height:
+            height = max(30, int(self.min_person_height * factor))
+            min_size = (height // 2, height)
+        max_size = (0, 0)
+        if self.max_person_height:
+            height = max(min_size[1], int(self.max_person_height * factor))
+            max_size = (height, height)
+        return self._cascade.detectMultiScale(gray, scaleFactor=self.scale, minNeighbors=5,
+                                              minSize=min_size, maxSize=max_size)
+
+
+_detectors = {}
+
+
+def _detector(method):
+    """Shared default detector per method (built on first use)."""
+    detector = _detectors.get(method)
+    if detector is None:
+        detector = _detectors[method] = PersonDetector(method=method)
+    return detector
+
+
 def detect_persons(frame):
     """
-    Detect persons in the frame using Haar Cascade or HOG
+    Detect persons in the frame using HOG (shared default PersonDetector)
     Returns list of bounding boxes (x, y, w, h)
     """
-    try:
-        # Try to use HOG person detector (more accurate but slower)
-        hog = cv2.HOGDescriptor()
-        hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
-        
-        # Detect people
-        boxes, weights = hog.detectMultiScale(frame, winStride=(8, 8), padding=(4, 4), scale=1.05)
-        
-        # Convert to (x, y, w, h) format
-        persons = []
-        for (x, y, w, h) in boxes:
-            persons.append((int(x), int(y), int(w), int(h)))
-        
-        return persons
-    
-    except Exception as e:
-        # Fallback: return empty list if detection fails
-        return []
+    return _detector("hog").detect(frame)
+
 
 def detect_persons_haar(frame):
     """
     Fallback: Detect persons using Haar Cascade (faster but less accurate)
     """
-    try:
-        # Load Haar Cascade classifier
-        cascade_path = cv2.data.haarcascades + 'haarcascade_fullbody.xml'
-        cascade = cv2.CascadeClassifier(cascade_path)
-        
-        # Convert to grayscale
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        
-        # Detect
-        persons = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
-        
-        return list(persons)
-    
-    except Exception as e:
-        return []
+    return _detector("haar").detect(frame)
@@ -0,0 +1,132 @@
+"""
+Fall Detector Module.
+Vectorized free-fall-then-impact detection over accelerometer samples. A
+fall is a run of near-zero acceleration magnitude (the phone is falling)
+followed within a short gap by a spike above the impact threshold. Each call
+processes a whole batch with NumPy; a short tail of each device's previous
+samples is carried over, so a pattern split across uploads is still found and
+the cost per sample is the same for single samples and large batches.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List
+
+import numpy as np
+
+
+GRAVITY = 9.81  # m/s^2
+
+
+class _DeviceState:
+    """Carried-over magnitudes and detection bookkeeping for one device."""
+
+    __slots__ = ("tail", "seen", "last_event")
+
+    def __init__(self):
+        self.tail = np.zeros(0, dtype=np.float32)
+        self.seen = 0            # Samples processed so far
+        self.last_event = None   # Absolute sample index of the last reported fall
+
+
+class FallDetector:
+    """Per-device free-fall + impact pattern detector over sample batches."""
+
+    def __init__(
+        self,
+        freefall_threshold: float = 0.5 * GRAVITY,
+        impact_threshold: float = 2.0 * GRAVITY,
+        min_freefall_samples: int = 3,
+        max_gap_samples: int = 25,
+        refractory_samples: int = 100,
+        max_devices: int = 10000
+    ):
+        """
+        Initialize the detector.
+
+        Args:
+            freefall_threshold: Magnitude (m/s^2) below which a sample counts as free fall
+            impact_threshold: Magnitude (m/s^2) above which a sample counts as an impact
+            min_freefall_samples: Consecutive free-fall samples needed (3 = 60 ms at 50 Hz)
+            max_gap_samples: Most samples from the end of free fall to the impact
+            refractory_samples: Samples after a fall during which no new fall is reported
+            max_devices: Devices tracked before the least recently seen is dropped
+        """
+        self.freefall_threshold = freefall_threshold
+        self.impact_threshold = impact_threshold
+        self.min_freefall_samples = max(1, min_freefall_samples)
+        self.max_gap_samples = max(1, max_gap_samples)
+        self.refractory_samples = refractory_samples
+        self.max_devices = max_devices
+        self._carry = self.min_freefall_samples + self.max_gap_samples
+        self._devices: "OrderedDict[Hashable, _DeviceState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def detect(self, device: Hashable, accel: np.ndarray) -> List[Dict[str, Any]]:
+        """
+        Feed a device's next accelerometer samples and report detected falls.
+
+        Args:
+            device: Device key (samples of different devices are never mixed)
+            accel: (n, 3) accelerometer readings in m/s^2, in time order
+
+        Returns:
+            One dict per fall: {"index" (row in accel), "impact" and
+            "freefall_min" magnitudes in m/s^2}
+        """
+        accel = np.asarray(accel, dtype=np.float32).reshape(-1, 3)
+        if len(accel) == 0:
+            return []
+        magnitude = np.sqrt(np.einsum("ij,ij->i", accel, accel))
+
+        with self._lock:
+            state = self._devices.pop(device, None) or _DeviceState()
+            self._devices[device] = state
+            while len(self._devices) > self.max_devices:
+                self._devices.popitem(last=False)
+
+            mag = np.concatenate([state.tail, magnitude])
+            offset = len(state.tail)          # Index of the first new sample in mag
+            base = state.seen - offset        # Absolute sample index of mag[0]
+            events = self._find(mag, offset)
+
+            falls = []
+            for j, freefall_min in events:
+                absolute = base + j
+                if state.last_event is not None and absolute - state.last_event < self.refractory_samples:
+                    continue
+                state.last_event = absolute
+                falls.append({
+                    "index": j - offset,
+                    "impact": float(mag[j]),
+                    "freefall_min": freefall_min,
+                })
+
+            state.seen += len(magnitude)
+            state.tail = mag[-self._carry:].copy()
+            return falls
+
+    def forget(self, device: Hashable):
+        with self._lock:
+            self._devices.pop(device, None)
+
+    def _find(self, mag: np.ndarray, start: int) -> List[tuple]:
+        """(index, free-fall minimum) of impacts at index >= start preceded by a free-fall run."""
+        impacts = np.flatnonzero(mag[start:] > self.impact_threshold) + start
+        if len(impacts) == 0:
+            return []
+
+        k = self.min_freefall_samples
+        freefall = (mag < self.freefall_threshold).astype(np.int32)
+        # run_end[i]: a run of >= k free-fall samples ends at i
+        window = np.convolve(freefall, np.ones(k, dtype=np.int32), mode="full")[:len(mag)]
+        run_end = window >= k
+        # Latest run end at or before each index (-1 if none yet)
+        last_run_end = np.maximum.accumulate(np.where(run_end, np.arange(len(mag)), -1))
+
+        previous = np.where(impacts > 0, last_run_end[np.maximum(impacts - 1, 0)], -1)
+        hit = (previous >= 0) & (impacts - previous <= self.max_gap_samples)
+        return [
+            (int(j), float(mag[max(0, p - k + 1):p + 1].min()))
+            for j, p in zip(impacts[hit].tolist(), previous[hit].tolist())
+        ]
@@ -0,0 +1,160 @@
+"""
+Encoded Frame Cache Module.
+JPEG-encodes each published frame once per (stream, sequence, quality, size)
+and hands the same multipart bytes to every viewer, plus a small latest-frame
+channel for streams that are not backed by a camera reader.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from async_stream import AsyncFrameNotifier
+
+
+# (stream key, frame sequence number, JPEG quality, (width, height) or None)
+CacheKey = Tuple[Hashable, int, int, Optional[Tuple[int, int]]]
+
+
+def mjpeg_part(jpeg_bytes: bytes) -> bytes:
+    """Wrap JPEG bytes as one part of a multipart/x-mixed-replace stream."""
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+
+class EncodedFrameCache:
+    """LRU cache of encoded MJPEG parts shared by all stream consumers."""
+
+    def __init__(self, max_entries: int = 64):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Number of encoded frames kept (older ones are evicted)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, bytes]" = OrderedDict()
+        self._in_flight: Dict[CacheKey, threading.Event] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get_part(
+        self,
+        stream: Hashable,
+        seq: int,
+        frame: np.ndarray,
+        quality: int = 70,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Optional[bytes]:
+        """
+        Get the multipart chunk for a frame, encoding it only on first request.
+
+        Concurrent requests for the same key wait for the single encoder
+        instead of encoding the frame again.
+
+        Args:
+            stream: Stream identifier (e.g. camera source)
+            seq: Sequence number of the frame within the stream
+            frame: BGR frame, used only when the key is not cached yet
+            quality: JPEG quality (0-100)
+            size: Optional (width, height) to downscale to before encoding
+
+        Returns:
+            Multipart chunk bytes, or None if encoding failed
+        """
+        key: CacheKey = (stream, seq, quality, size)
+        while True:
+            with self._lock:
+                part = self._entries.get(key)
+                if part is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return part
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._in_flight[key] = event
+                    self.misses += 1
+                    break
+            # Another consumer is encoding this frame - wait for its result
+            event.wait(timeout=1.0)
+
+        part = None
+        try:
+            image = frame
+            if size is not None and (frame.shape[1], frame.shape[0]) != size:
+                image = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            ret, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            if ret:
+                part = mjpeg_part(buffer.tobytes())
+        except Exception as e:
+            print(f"Encode error: {e}")
+        finally:
+            with self._lock:
+                if part is not None:
+                    self._entries[key] = part
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                self._in_flight.pop(key, None)
+            event.set()
+
+        return part
+
+    def lookup(
+        self,
+        stream: Hashable,
+        seq: int,
+        quality: int = 70,
+        size: Optional[Tuple[int, int]] = None
+    ) -> Optional[bytes]:
+        """Cached multipart chunk for a frame, or None without encoding."""
+        key: CacheKey = (stream, seq, quality, size)
+        with self._lock:
+            part = self._entries.get(key)
+            if part is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return part
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 3) if total else 0.0,
+        }
+
+
+class FrameChannel:
+    """Latest-frame slot that wakes asyncio consumers waiting for a newer frame."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._notifier = AsyncFrameNotifier()
+        self._seq = 0
+        self._latest: Optional[Tuple[int, float, np.ndarray]] = None
+
+    def publish(self, frame: np.ndarray) -> int:
+        """Replace the latest frame and wake all waiting consumers."""
+        with self._lock:
+            self._seq += 1
+            self._latest = (self._seq, time.time(), frame)
+            self._notifier.notify()
+            return self._seq
+
+    def latest(self) -> Optional[Tuple[int, float, np.ndarray]]:
+        with self._lock:
+            return self._latest
+
+    async def wait_for_frame_async(self, after_seq: int = 0, timeout: float = 1.0) -> Optional[Tuple[int, float, np.ndarray]]:
+        """Wait for a frame newer than after_seq (None on timeout) without blocking a thread."""
+        await self._notifier.wait(lambda: self._seq > after_seq, timeout)
+        with self._lock:
+            return self._latest if self._seq > after_seq else None
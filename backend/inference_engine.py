@@ -0,0 +1,418 @@
+"""
+Inference Engine Module.
+Runs the 10-class helmet/vest YOLOv8 model through a pluggable backend
+(PyTorch/Ultralytics, ONNX Runtime or OpenVINO). Every engine returns the
+same detection dicts, so the rest of the backend does not care which runtime
+is loaded. The non-PyTorch engines can export their artifact from best.pt on
+first use and reuse the cached file afterwards.
+"""
+
+import ast
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# Class names of the helmet/vest model (YOLOv8-Helmet-Vest-Detection-main/Training/data.yaml),
+# used when an exported artifact carries no metadata
+DEFAULT_CLASS_NAMES: Dict[int, str] = {
+    0: "Hardhat",
+    1: "Mask",
+    2: "NO-Hardhat",
+    3: "NO-Mask",
+    4: "NO-Safety Vest",
+    5: "Person",
+    6: "Safety Cone",
+    7: "Safety Vest",
+    8: "machinery",
+    9: "vehicle",
+}
+
+ENGINES = ("torch", "onnx", "openvino")
+
+# Detection dict produced by every engine:
+#   {"class": str, "class_id": int, "conf": float, "box": [x1, y1, x2, y2]}
+# with box coordinates in pixels of the frame passed to predict_batch().
+Detection = Dict
+
+
+class InferenceEngine(ABC):
+    """Common interface of all inference backends."""
+
+    name = "base"
+
+    def __init__(self, model_path: str, names: Optional[Dict[int, str]] = None):
+        self.model_path = model_path
+        self.names: Dict[int, str] = names or dict(DEFAULT_CLASS_NAMES)
+
+    @abstractmethod
+    def predict_batch(
+        self,
+        frames: List[np.ndarray],
+        conf: float = 0.5,
+        iou: float = 0.7,
+        imgsz: int = 640
+    ) -> List[List[Detection]]:
+        """
+        Run detection on a batch of BGR frames.
+
+        Args:
+            frames: BGR images (any size; letterboxed to imgsz internally)
+            conf: Minimum confidence
+            iou: NMS IoU threshold
+            imgsz: Square network input size (multiple of 32)
+
+        Returns:
+            One list of detection dicts per frame
+        """
+
+    def _detection(self, class_id: int, conf: float, box) -> Detection:
+        return {
+            "class": self.names.get(class_id, str(class_id)),
+            "class_id": class_id,
+            "conf": float(conf),
+            "box": [int(round(v)) for v in box],
+        }
+
+
+class TorchEngine(InferenceEngine):
+    """PyTorch backend through the Ultralytics YOLO API (loads best.pt)."""
+
+    name = "torch"
+
+    def __init__(self, model_path: str):
+        from ultralytics import YOLO
+
+        self.model = YOLO(model_path)
+        super().__init__(model_path, dict(self.model.names))
+
+    def predict_batch(self, frames, conf=0.5, iou=0.7, imgsz=640):
+        results = self.model.predict(frames, conf=conf, iou=iou, imgsz=imgsz, verbose=False)
+        batch = []
+        for result in results:
+            detections = []
+            if result.boxes is not None:
+                xyxy = result.boxes.xyxy.cpu().numpy()
+                confs = result.boxes.conf.cpu().numpy()
+                classes = result.boxes.cls.cpu().numpy().astype(int)
+                for box, score, class_id in zip(xyxy, confs, classes):
+                    detections.append(self._detection(int(class_id), score, box))
+            batch.append(detections)
+        return batch
+
+
+class _ExportedEngine(InferenceEngine):
+    """Shared pre/post-processing for raw YOLOv8 graphs (ONNX, OpenVINO)."""
+
+    def predict_batch(self, frames, conf=0.5, iou=0.7, imgsz=640):
+        blob, transforms = preprocess(frames, imgsz)
+        output = self._run(blob)
+        return [
+            self._postprocess(output[i], transforms[i], frames[i].shape, conf, iou)
+            for i in range(len(frames))
+        ]
+
+    @abstractmethod
+    def _run(self, blob: np.ndarray) -> np.ndarray:
+        """Execute the network on an NCHW float32 blob -> (N, 4 + classes, anchors)."""
+
+    def _postprocess(self, prediction, transform, shape, conf, iou, max_det=300) -> List[Detection]:
+        # (4 + classes, anchors) -> (anchors, 4 + classes)
+        prediction = prediction.T
+        scores = prediction[:, 4:]
+        class_ids = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+
+        keep = confidences >= conf
+        if not np.any(keep):
+            return []
+        prediction, class_ids, confidences = prediction[keep], class_ids[keep], confidences[keep]
+
+        # cx, cy, w, h -> x, y, w, h (top-left) for OpenCV NMS
+        boxes = prediction[:, :4].copy()
+        boxes[:, 0] -= boxes[:, 2] / 2
+        boxes[:, 1] -= boxes[:, 3] / 2
+
+        indices = cv2.dnn.NMSBoxesBatched(
+            boxes.tolist(), confidences.tolist(), class_ids.tolist(), conf, iou
+        )
+        indices = np.array(indices).reshape(-1)[:max_det]
+
+        # Undo the letterbox: network pixels -> source frame pixels
+        xyxy = boxes[indices].copy()
+        xyxy[:, 2:] += xyxy[:, :2]
+        xyxy = unletterbox_boxes(xyxy, transform, shape)
+        return [
+            self._detection(int(class_ids[i]), confidences[i], box)
+            for i, box in zip(indices, xyxy)
+        ]
+
+
+class OnnxRuntimeEngine(_ExportedEngine):
+    """ONNX Runtime backend (CPU execution provider)."""
+
+    name = "onnx"
+
+    def __init__(self, model_path: str):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        super().__init__(model_path, _parse_names(metadata.get("names", "")))
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVINOEngine(_ExportedEngine):
+    """OpenVINO backend (CPU plugin), like the hardhat model in helmet_infer.py."""
+
+    name = "openvino"
+
+    def __init__(self, model_path: str):
+        import openvino as ov
+
+        if os.path.isdir(model_path):
+            xml_files = [f for f in os.listdir(model_path) if f.endswith(".xml")]
+            if not xml_files:
+                raise FileNotFoundError(f"No OpenVINO .xml model found in {model_path}")
+            model_path = os.path.join(model_path, xml_files[0])
+
+        core = ov.Core()
+        model = core.read_model(model_path)
+        # Batch and image size vary with the adaptive controller
+        if model.inputs[0].get_partial_shape().is_static:
+            model.reshape([-1, 3, -1, -1])
+        self.compiled_model = core.compile_model(model, "CPU", {"PERFORMANCE_HINT": "THROUGHPUT"})
+        self.output_layer = self.compiled_model.outputs[0]
+
+        super().__init__(model_path, _names_from_metadata(os.path.dirname(model_path)))
+
+    def _run(self, blob):
+        return self.compiled_model([blob])[self.output_layer]
+
+
+# (ratio, pad_x, pad_y): network pixel = source pixel * ratio + pad
+LetterboxTransform = Tuple[float, float, float]
+
+
+def _letterbox_layout(h: int, w: int, size: int) -> Tuple[float, int, int, int, int]:
+    """(ratio, new_w, new_h, left, top) of a w x h frame letterboxed to size."""
+    ratio = min(size / h, size / w)
+    new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+    left = int(round((size - new_w) / 2 - 0.1))
+    top = int(round((size - new_h) / 2 - 0.1))
+    return ratio, new_w, new_h, left, top
+
+
+def letterbox(frame: np.ndarray, size: int) -> Tuple[np.ndarray, LetterboxTransform]:
+    """
+    Resize keeping aspect ratio and pad to a size x size square (gray 114 borders).
+
+    Returns:
+        (padded image, (ratio, pad_x, pad_y)) to map boxes back to the frame
+    """
+    h, w = frame.shape[:2]
+    if (w, h) == (size, size):
+        return frame, (1.0, 0.0, 0.0)
+
+    ratio, new_w, new_h, left, top = _letterbox_layout(h, w, size)
+    resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    padded = cv2.copyMakeBorder(
+        resized, top, size - new_h - top, left, size - new_w - left,
+        cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+    return padded, (ratio, float(left), float(top))
+
+
+class LetterboxBuffer:
+    """
+    Reusable letterbox canvas (one per camera).
+
+    The frame is resized straight into the canvas; the gray padding is only
+    repainted when the frame shape or target size changes. The returned image
+    is overwritten by the next fit() call.
+    """
+
+    def __init__(self):
+        self._canvas: Optional[np.ndarray] = None
+        self._layout: Optional[Tuple] = None
+
+    def fit(self, frame: np.ndarray, size: int) -> Tuple[np.ndarray, LetterboxTransform]:
+        h, w = frame.shape[:2]
+        if (w, h) == (size, size):
+            return frame, (1.0, 0.0, 0.0)
+
+        ratio, new_w, new_h, left, top = _letterbox_layout(h, w, size)
+        layout = (frame.shape, size)
+        if self._layout != layout:
+            self._canvas = np.full((size, size) + frame.shape[2:], 114, dtype=frame.dtype)
+            self._layout = layout
+        cv2.resize(frame, (new_w, new_h), dst=self._canvas[top:top + new_h, left:left + new_w],
+                   interpolation=cv2.INTER_LINEAR)
+        return self._canvas, (ratio, float(left), float(top))
+
+
+def unletterbox_boxes(boxes: np.ndarray, transform: LetterboxTransform, shape) -> np.ndarray:
+    """
+    Map (N, 4) xyxy boxes from letterboxed network pixels back to the source frame.
+
+    Args:
+        boxes: Boxes in letterboxed image coordinates
+        transform: (ratio, pad_x, pad_y) returned by letterbox()
+        shape: Source frame shape (boxes are clipped to it)
+    """
+    ratio, pad_x, pad_y = transform
+    h, w = shape[:2]
+    boxes = (np.asarray(boxes, dtype=np.float32) - (pad_x, pad_y, pad_x, pad_y)) / ratio
+    np.clip(boxes[:, 0::2], 0, w, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, h, out=boxes[:, 1::2])
+    return boxes
+
+
+def unletterbox_detections(detections: List[Detection], transform: LetterboxTransform, shape) -> List[Detection]:
+    """Copy of detection dicts with boxes mapped back to the source frame."""
+    if not detections:
+        return []
+    boxes = unletterbox_boxes([d["box"] for d in detections], transform, shape)
+    return [
+        {**det, "box": [int(round(v)) for v in box]}
+        for det, box in zip(detections, boxes.tolist())
+    ]
+
+
+def preprocess(frames: List[np.ndarray], imgsz: int) -> Tuple[np.ndarray, List[LetterboxTransform]]:
+    """Letterbox a batch of BGR frames into an NCHW float32 RGB blob in [0, 1]."""
+    blob = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+    transforms = []
+    for i, frame in enumerate(frames):
+        padded, transform = letterbox(frame, imgsz)
+        # BGR HWC uint8 -> RGB CHW float
+        blob[i] = padded[:, :, ::-1].transpose(2, 0, 1)
+        transforms.append(transform)
+    blob *= 1.0 / 255.0
+    return blob, transforms
+
+
+def _parse_names(text: str) -> Optional[Dict[int, str]]:
+    try:
+        names = ast.literal_eval(text)
+        return {int(k): v for k, v in names.items()}
+    except (ValueError, SyntaxError, AttributeError, TypeError):
+        return None
+
+
+def _names_from_metadata(directory: str) -> Optional[Dict[int, str]]:
+    """Read class names from the metadata.yaml Ultralytics writes next to exports."""
+    path = os.path.join(directory, "metadata.yaml")
+    if not os.path.isfile(path):
+        return None
+    names: Dict[int, str] = {}
+    in_names = False
+    with open(path) as f:
+        for line in f:
+            if line.startswith("names:"):
+                in_names = True
+                continue
+            if in_names:
+                if not line.startswith("  "):
+                    break
+                key, _, value = line.strip().partition(":")
+                names[int(key)] = value.strip().strip("'\"")
+    return names or None
+
+
+def engine_for_path(model_path: str) -> str:
+    """Infer the engine from a model artifact path."""
+    if model_path.endswith(".onnx"):
+        return "onnx"
+    if model_path.endswith(".xml") or os.path.isdir(model_path):
+        return "openvino"
+    return "torch"
+
+
+def export_model(pt_path: str, engine: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Export best.pt to an ONNX or OpenVINO artifact, reusing a cached export.
+
+    The export has dynamic batch and image size so the batch scheduler and
+    adaptive resolution keep working. Exporting needs the ultralytics package;
+    slim images should ship the artifact and point MODEL_PATH at it instead.
+
+    Args:
+        pt_path: Path to the PyTorch weights
+        engine: "onnx" or "openvino"
+        cache_dir: Where exported artifacts are kept (default: next to pt_path)
+
+    Returns:
+        Path of the exported artifact
+    """
+    cache_dir = cache_dir or os.path.dirname(os.path.abspath(pt_path))
+    stem = os.path.splitext(os.path.basename(pt_path))[0]
+    if engine == "onnx":
+        target = os.path.join(cache_dir, f"{stem}.onnx")
+    elif engine == "openvino":
+        target = os.path.join(cache_dir, f"{stem}_openvino_model", f"{stem}.xml")
+    else:
+        raise ValueError(f"Cannot export to engine '{engine}'")
+
+    if os.path.isfile(target) and os.path.getmtime(target) >= os.path.getmtime(pt_path):
+        print(f"[INFO] Using cached {engine} export: {target}")
+        return target
+
+    from ultralytics import YOLO
+
+    print(f"[INFO] Exporting {pt_path} to {engine} (first use, this can take a minute)...")
+    os.makedirs(cache_dir, exist_ok=True)
+    exported = YOLO(pt_path).export(format=engine, dynamic=True, simplify=True)
+    exported = str(exported)
+
+    # Ultralytics writes next to the weights; move into the cache dir if needed
+    if engine == "openvino" and os.path.isdir(exported):
+        exported = os.path.join(exported, f"{stem}.xml")
+    if os.path.abspath(exported) != os.path.abspath(target):
+        import shutil
+        source = os.path.dirname(exported) if engine == "openvino" else exported
+        destination = os.path.dirname(target) if engine == "openvino" else target
+        if os.path.exists(destination):
+            shutil.rmtree(destination) if os.path.isdir(destination) else os.remove(destination)
+        shutil.move(source, destination)
+    print(f"[INFO] Export complete: {target}")
+    return target
+
+
+def load_engine(model_path: str, engine: str = "auto", cache_dir: Optional[str] = None) -> InferenceEngine:
+    """
+    Load the model with the requested engine.
+
+    Args:
+        model_path: best.pt, an .onnx file, or an OpenVINO .xml/model directory
+        engine: "torch", "onnx", "openvino" or "auto" (pick from the file type)
+        cache_dir: Directory for artifacts exported from a .pt file
+
+    Returns:
+        Ready-to-use InferenceEngine
+    """
+    engine = (engine or "auto").lower()
+    if engine == "auto":
+        engine = engine_for_path(model_path)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown inference engine '{engine}' (expected one of {ENGINES} or 'auto')")
+
+    # A .pt with a non-PyTorch engine: export once and load the artifact
+    if engine != "torch" and model_path.endswith(".pt"):
+        model_path = export_model(model_path, engine, cache_dir)
+
+    print(f"[INFO] Loading {engine} inference engine from: {model_path}")
+    if engine == "onnx":
+        return OnnxRuntimeEngine(model_path)
+    if engine == "openvino":
+        return OpenVINOEngine(model_path)
+    return TorchEngine(model_path)
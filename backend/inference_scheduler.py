@@ -0,0 +1,173 @@
+"""
+Batched Inference Scheduler Module.
+Collects frames submitted by every active camera and runs them through the
+model as one batched predict call, bounded by a maximum batch size and a
+maximum wait, then routes each result back to the camera that submitted it.
+Frames of different shapes (inference resolutions) are predicted as separate
+sub-batches.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+# predict_batch(frames) -> one result per frame, in order; frames share one shape
+BatchPredictor = Callable[[List[np.ndarray]], List[Any]]
+
+
+class BatchInferenceScheduler:
+    """Central dynamic batcher shared by all camera broadcasters."""
+
+    def __init__(
+        self,
+        predict_batch: BatchPredictor,
+        max_batch_size: int = 8,
+        max_wait_ms: float = 15.0
+    ):
+        """
+        Initialize the scheduler (the worker thread starts on first submit).
+
+        Args:
+            predict_batch: Callable running the model on a list of frames
+            max_batch_size: Largest number of frames sent in one predict call
+            max_wait_ms: Longest time the first queued frame waits for company
+        """
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue[Tuple[np.ndarray, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._running = False
+
+        # Statistics
+        self.batches_run = 0
+        self.frames_run = 0
+        self._batch_ms = 0.0
+        self._frame_cost = 0.0  # Seconds of predict time per frame
+
+    def submit(self, frame: np.ndarray) -> Future:
+        """
+        Queue a frame for the next batch.
+
+        Returns:
+            Future resolved with this frame's prediction result
+        """
+        self._ensure_running()
+        future: Future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def infer(self, frame: np.ndarray, timeout: Optional[float] = None) -> Any:
+        """Submit a frame and block until its result is ready."""
+        return self.submit(frame).result(timeout=timeout)
+
+    def stop(self):
+        """Stop the worker thread; frames still queued are failed."""
+        with self._lock:
+            self._running = False
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Batching statistics for status endpoints."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "queue_depth": self._queue.qsize(),
+            "batches_run": self.batches_run,
+            "frames_run": self.frames_run,
+            "avg_batch_size": round(self.frames_run / self.batches_run, 2) if self.batches_run else 0.0,
+            "batch_ms": round(self._batch_ms, 1),
+            "frame_cost_ms": round(self._frame_cost * 1000, 2),
+        }
+
+    def load(self) -> Dict[str, float]:
+        """Current load signals for the adaptive controller."""
+        return {
+            "frame_cost_s": self._frame_cost,
+            "queue_depth": self._queue.qsize(),
+            "max_batch_size": self.max_batch_size,
+        }
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="inference-scheduler", daemon=True)
+            self._thread.start()
+
+    def _collect_batch(self) -> List[Tuple[np.ndarray, Future]]:
+        """Block for the first frame, then gather more until full or max_wait elapses."""
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        """Worker loop: collect a batch, predict once, route results back."""
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            # Group by frame shape: one predict call per inference resolution
+            groups: Dict[Tuple[int, ...], List[Tuple[np.ndarray, Future]]] = {}
+            for item in batch:
+                groups.setdefault(item[0].shape, []).append(item)
+
+            for group in groups.values():
+                self._predict_group(group)
+
+        # Fail anything left behind so callers do not hang
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("Inference scheduler stopped"))
+
+    def _predict_group(self, group: List[Tuple[np.ndarray, Future]]):
+        frames = [frame for frame, _ in group]
+        futures = [future for _, future in group]
+        started = time.time()
+        try:
+            results = self.predict_batch(frames)
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        elapsed = time.time() - started
+        if self.batches_run == 0:
+            self._batch_ms = elapsed * 1000
+            self._frame_cost = elapsed / len(frames)
+        else:
+            self._batch_ms = 0.9 * self._batch_ms + 0.1 * elapsed * 1000
+            self._frame_cost = 0.9 * self._frame_cost + 0.1 * elapsed / len(frames)
+        self.batches_run += 1
+        self.frames_run += len(frames)
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
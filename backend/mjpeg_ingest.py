@@ -0,0 +1,166 @@
+"""
+MJPEG Ingestion Module.
+Incrementally splits an MJPEG/multipart upload into JPEG frames as chunks
+arrive, and hands them to a worker that only ever processes the newest
+frame, so memory stays constant and stale frames are dropped under load.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+
+JPEG_SOI = b"\xff\xd8"  # Start of image marker
+JPEG_EOI = b"\xff\xd9"  # End of image marker
+
+
+class MJPEGStreamParser:
+    """Incremental JPEG frame extractor for multipart/MJPEG byte streams."""
+
+    def __init__(self, max_frame_bytes: int = 8 * 1024 * 1024):
+        """
+        Initialize the parser.
+
+        Frames are delimited by JPEG start/end markers rather than the
+        multipart boundary, so part headers and boundaries are skipped
+        whatever boundary string the sender chose.
+
+        Args:
+            max_frame_bytes: A frame growing beyond this size is discarded
+                             (protects against corrupt input without an EOI)
+        """
+        self.max_frame_bytes = max_frame_bytes
+        self._buffer = bytearray()
+        self._scan_from = 0  # Resume EOI search here instead of rescanning
+        self._in_frame = False
+
+        self.frames_parsed = 0
+        self.bytes_received = 0
+        self.frames_discarded = 0
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        """
+        Add a chunk of the upload body.
+
+        Args:
+            chunk: Next bytes received from the client
+
+        Returns:
+            Complete JPEG frames found so far, oldest first
+        """
+        self.bytes_received += len(chunk)
+        self._buffer += chunk
+        frames = []
+
+        while True:
+            if not self._in_frame:
+                start = self._buffer.find(JPEG_SOI)
+                if start < 0:
+                    # Keep a trailing 0xFF in case the marker is split across chunks
+                    del self._buffer[:-1]
+                    break
+                del self._buffer[:start]
+                self._in_frame = True
+                self._scan_from = len(JPEG_SOI)
+
+            end = self._buffer.find(JPEG_EOI, self._scan_from)
+            if end < 0:
+                if len(self._buffer) > self.max_frame_bytes:
+                    self.frames_discarded += 1
+                    self._buffer.clear()
+                    self._in_frame = False
+                else:
+                    self._scan_from = max(len(JPEG_SOI), len(self._buffer) - 1)
+                break
+
+            end += len(JPEG_EOI)
+            frames.append(bytes(self._buffer[:end]))
+            del self._buffer[:end]
+            self._in_frame = False
+            self.frames_parsed += 1
+
+        return frames
+
+
+class LatestFrameWorker:
+    """Background worker that processes only the most recently submitted item."""
+
+    def __init__(self, handler: Callable[[Any], None], name: str = "latest-frame-worker"):
+        """
+        Initialize the worker (call start() to launch the thread).
+
+        Args:
+            handler: Called with each item the worker gets to process
+            name: Thread name, for debugging
+        """
+        self.handler = handler
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._pending: Optional[Any] = None
+        self._has_pending = False
+        self._running = False
+        self._drain = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.submitted = 0
+        self.processed = 0
+        self.dropped = 0
+
+    def start(self) -> "LatestFrameWorker":
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, item: Any):
+        """Offer a new item, replacing (dropping) any item still waiting."""
+        with self._cond:
+            if self._has_pending:
+                self.dropped += 1
+            self._pending = item
+            self._has_pending = True
+            self.submitted += 1
+            self._cond.notify()
+
+    def stop(self, timeout: float = 2.0, drain: bool = False):
+        """
+        Stop the worker (blocks until its thread exits or timeout passes).
+
+        Args:
+            timeout: Longest wait for the thread, in seconds
+            drain: Process an item still waiting before stopping instead of dropping it
+        """
+        with self._cond:
+            self._running = False
+            self._drain = drain
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "frames_submitted": self.submitted,
+            "frames_processed": self.processed,
+            "frames_dropped": self.dropped,
+        }
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._has_pending:
+                    self._cond.wait()
+                if not self._running and not (self._drain and self._has_pending):
+                    if self._has_pending:
+                        self.dropped += 1
+                    return
+                item = self._pending
+                self._pending = None
+                self._has_pending = False
+
+            try:
+                self.handler(item)
+                self.processed += 1
+            except Exception as e:
+                print(f"[ERROR] {self.name} failed to process frame: {e}")
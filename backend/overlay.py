@@ -0,0 +1,93 @@
+"""
+Detection Overlay Module.
+Draws detection dicts (as produced by inference_engine) onto BGR frames at
+their full resolution, so annotated streams look the same whichever inference
+engine is loaded. Box geometry is computed for all detections at once and
+outlines/label backgrounds are drawn with one OpenCV call per color.
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+
+VIOLATION_COLOR = (0, 0, 255)   # Red: NO-Hardhat, NO-Safety Vest, NO-Mask
+COMPLIANT_COLOR = (0, 200, 0)   # Green: Hardhat, Safety Vest, Mask
+PERSON_COLOR = (255, 160, 0)    # Blue
+OTHER_COLOR = (0, 200, 255)     # Yellow/orange: cones, machinery, vehicles
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def class_color(class_name: str) -> Tuple[int, int, int]:
+    """BGR color for a class name."""
+    if class_name.startswith("NO-"):
+        return VIOLATION_COLOR
+    if class_name in ("Hardhat", "Safety Vest", "Mask"):
+        return COMPLIANT_COLOR
+    if class_name == "Person":
+        return PERSON_COLOR
+    return OTHER_COLOR
+
+
+@lru_cache(maxsize=1024)
+def _text_size(text: str, font_scale: float, thickness: int) -> Tuple[int, int, int]:
+    (tw, th), baseline = cv2.getTextSize(text, FONT, font_scale, thickness)
+    return tw, th, baseline
+
+
+def draw_detections(frame: np.ndarray, detections: List[Dict], thickness: int = 0) -> np.ndarray:
+    """
+    Draw boxes and labels in place.
+
+    Line width and font size scale with the frame so overlays drawn on a
+    1080p frame look like those on a 480p one.
+
+    Args:
+        frame: BGR frame (modified in place)
+        detections: Dicts with "class", "conf" and "box" [x1, y1, x2, y2] in frame pixels
+        thickness: Box line thickness in pixels (0 = derive from frame size)
+
+    Returns:
+        The same frame, for chaining
+    """
+    if not detections:
+        return frame
+
+    h, w = frame.shape[:2]
+    scale = max(1.0, min(h, w) / 480)
+    thickness = thickness or max(2, int(round(2 * scale)))
+    font_scale = 0.5 * scale
+    text_thickness = max(1, int(round(scale)))
+
+    boxes = np.array([det["box"] for det in detections], dtype=np.int32).reshape(-1, 4)
+    np.clip(boxes[:, 0::2], 0, w - 1, out=boxes[:, 0::2])
+    np.clip(boxes[:, 1::2], 0, h - 1, out=boxes[:, 1::2])
+    x1, y1, x2, y2 = boxes.T
+
+    labels = [f"{det['class']} {det['conf']:.2f}" for det in detections]
+    sizes = np.array([_text_size(label, font_scale, text_thickness) for label in labels], dtype=np.int32)
+    tw, th, baseline = sizes.T
+    # Label sits above the box, or inside it when the box touches the top edge
+    ty = np.maximum(y1, th + baseline)
+
+    outlines = np.stack([
+        np.stack([x1, y1], axis=1), np.stack([x2, y1], axis=1),
+        np.stack([x2, y2], axis=1), np.stack([x1, y2], axis=1),
+    ], axis=1)
+    backgrounds = np.stack([
+        np.stack([x1, ty - th - baseline], axis=1), np.stack([x1 + tw, ty - th - baseline], axis=1),
+        np.stack([x1 + tw, ty], axis=1), np.stack([x1, ty], axis=1),
+    ], axis=1)
+
+    colors = [class_color(det["class"]) for det in detections]
+    for color in set(colors):
+        idx = [i for i, c in enumerate(colors) if c == color]
+        cv2.polylines(frame, list(outlines[idx]), True, color, thickness)
+        cv2.fillPoly(frame, list(backgrounds[idx]), color)
+
+    for label, x, y, base in zip(labels, x1.tolist(), ty.tolist(), baseline.tolist()):
+        cv2.putText(frame, label, (x, y - base), FONT, font_scale, (255, 255, 255), text_thickness)
+    return frame
@@ -0,0 +1,437 @@
+"""
+INT8 Quantization Tool.
+Post-training static quantization of the helmet/vest YOLOv8 model for CPU
+nodes: calibrates on a sample of training images, writes an INT8 ONNX or
+OpenVINO artifact, then evaluates FP32 and INT8 on the validation split and
+writes a report (mAP50, mAP50-95, per-frame latency) in the same column
+format as "YOLOv8-Helmet-Vest-Detection-main/Results and graphs/results.csv".
+
+Needs the full build environment plus the quantization toolkits:
+    pip install -r requirements.txt onnx nncf
+
+Usage:
+    python quantize_model.py --engine openvino
+    python quantize_model.py --engine onnx --calib-images /data/css-data/train/images \\
+        --eval-images /data/css-data/valid/images
+
+The backend loads the result through MODEL_PATH, e.g.
+    MODEL_PATH=/app/models/best_int8_openvino_model  (or .../best_int8.onnx)
+"""
+
+import argparse
+import glob
+import os
+import random
+import re
+import shutil
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from inference_engine import InferenceEngine, export_model, load_engine, preprocess
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_WEIGHTS = os.path.join(HERE, "best.pt")
+DEFAULT_DATA = os.path.join(HERE, "..", "YOLOv8-Helmet-Vest-Detection-main", "Training", "data.yaml")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+REPORT_COLUMNS = [
+    "model", "engine", "precision", "size_mb",
+    "metrics/precision(B)", "metrics/recall(B)", "metrics/mAP50(B)", "metrics/mAP50-95(B)",
+    "speed/latency_ms", "speed/speedup", "metrics/mAP50_drop",
+]
+
+
+# ---------------------------------------------------------------------------
+# Dataset
+# ---------------------------------------------------------------------------
+
+def dataset_split(data_yaml: str, split: str) -> Optional[str]:
+    """Resolve an image directory ("train"/"val"/"test") from a YOLO data.yaml."""
+    import yaml
+
+    with open(data_yaml) as f:
+        data = yaml.safe_load(f)
+    path = data.get(split)
+    if not path:
+        return None
+    # data.yaml was written on Windows; accept either separator
+    path = str(path).replace("\\", "/")
+    if not os.path.isabs(path):
+        root = data.get("path") or os.path.dirname(os.path.abspath(data_yaml))
+        path = os.path.join(root, path)
+    # Ultralytics accepts the split root or its images/ folder
+    if os.path.isdir(os.path.join(path, "images")):
+        path = os.path.join(path, "images")
+    return path if os.path.isdir(path) else None
+
+
+def list_images(directory: str, limit: int = 0, seed: int = 0) -> List[str]:
+    """Image files under a directory, randomly sampled down to limit (0 = all)."""
+    files = sorted(
+        p for p in glob.glob(os.path.join(directory, "**", "*"), recursive=True)
+        if p.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    if limit and len(files) > limit:
+        files = sorted(random.Random(seed).sample(files, limit))
+    return files
+
+
+def load_labels(image_path: str, width: int, height: int) -> np.ndarray:
+    """
+    Read the YOLO label file of an image (images/x.jpg -> labels/x.txt).
+
+    Returns:
+        (N, 5) array of [class, x1, y1, x2, y2] in pixels
+    """
+    parts = image_path.replace("\\", "/").split("/")
+    if "images" in parts:
+        idx = len(parts) - 1 - parts[::-1].index("images")
+        parts[idx] = "labels"
+    label_path = os.path.splitext("/".join(parts))[0] + ".txt"
+    if not os.path.isfile(label_path):
+        return np.zeros((0, 5), dtype=np.float32)
+
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+    if rows.size == 0:
+        return np.zeros((0, 5), dtype=np.float32)
+    cls, cx, cy, w, h = rows[:, 0], rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return np.stack([cls, cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+# ---------------------------------------------------------------------------
+# Quantization
+# ---------------------------------------------------------------------------
+
+def _head_ops(ops: Sequence[Tuple[str, str]], skip_types: Sequence[str]) -> List[str]:
+    """
+    Names of ops to keep in floating point: the box-decoding arithmetic and DFL
+    of the Detect head (last "model.N" module) plus every Sigmoid. Quantizing
+    those costs noticeable mAP for almost no speed.
+
+    Args:
+        ops: (name, type) of every op in the graph
+        skip_types: Arithmetic op types to keep in FP32 inside the head
+    """
+    indices = [int(m.group(1)) for name, _ in ops for m in [re.search(r"model\.(\d+)[/.]", name)] if m]
+    if not indices:
+        return [name for name, op_type in ops if op_type == "Sigmoid"]
+    head = re.compile(rf"model\.{max(indices)}[/.]")
+    return [
+        name for name, op_type in ops
+        if op_type == "Sigmoid"
+        or (head.search(name) and (op_type in skip_types or "dfl" in name))
+    ]
+
+
+def quantize_onnx(fp32_path: str, output_path: str, calib_images: List[str], imgsz: int) -> str:
+    """Static INT8 quantization (QDQ, per-channel weights) with ONNX Runtime."""
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime.quantization import (
+        CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType, quantize_static
+    )
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class ImageReader(CalibrationDataReader):
+        def __init__(self):
+            self._paths = iter(calib_images)
+
+        def get_next(self):
+            for path in self._paths:
+                frame = cv2.imread(path)
+                if frame is not None:
+                    return {input_name: preprocess([frame], imgsz)[0]}
+            return None
+
+    prepared_path = os.path.splitext(output_path)[0] + "_prep.onnx"
+    quant_pre_process(fp32_path, prepared_path)
+
+    model = onnx.load(prepared_path)
+    excluded = _head_ops([(n.name, n.op_type) for n in model.graph.node], ("Add", "Sub", "Mul", "Div"))
+    print(f"[INFO] Keeping {len(excluded)} head/activation nodes in FP32")
+
+    quantize_static(
+        prepared_path, output_path, ImageReader(),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=excluded,
+    )
+    os.remove(prepared_path)
+
+    # Carry the class names over so the backend labels INT8 detections correctly
+    source, quantized = onnx.load(fp32_path), onnx.load(output_path)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+def quantize_openvino(fp32_xml: str, output_xml: str, calib_images: List[str], imgsz: int) -> str:
+    """Static INT8 quantization (mixed preset) with NNCF for OpenVINO."""
+    import nncf
+    import openvino as ov
+
+    model = ov.Core().read_model(fp32_xml)
+    frames = [f for f in (cv2.imread(p) for p in calib_images) if f is not None]
+    dataset = nncf.Dataset(frames, lambda frame: preprocess([frame], imgsz)[0])
+
+    excluded = _head_ops(
+        [(op.get_friendly_name(), op.get_type_name()) for op in model.get_ops()],
+        ("Add", "Subtract", "Multiply", "Divide"),
+    )
+    print(f"[INFO] Keeping {len(excluded)} head/activation ops in FP32")
+
+    quantized = nncf.quantize(
+        model, dataset,
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(frames),
+        ignored_scope=nncf.IgnoredScope(names=excluded),
+    )
+    os.makedirs(os.path.dirname(output_xml), exist_ok=True)
+    ov.save_model(quantized, output_xml)
+
+    # Class names live in metadata.yaml next to the .xml
+    metadata = os.path.join(os.path.dirname(fp32_xml), "metadata.yaml")
+    if os.path.isfile(metadata):
+        shutil.copy(metadata, os.path.dirname(output_xml))
+    return output_xml
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes -> (N, M)."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(br - tl, 0, None).prod(axis=2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(axis=1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def match_predictions(pred: np.ndarray, gt: np.ndarray) -> np.ndarray:
+    """
+    Mark each prediction as TP/FP at every IoU threshold (greedy, highest IoU first).
+
+    Args:
+        pred: (N, 6) [class, conf, x1, y1, x2, y2]
+        gt: (M, 5) [class, x1, y1, x2, y2]
+
+    Returns:
+        (N, len(IOU_THRESHOLDS)) boolean TP matrix
+    """
+    tp = np.zeros((len(pred), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(pred) == 0 or len(gt) == 0:
+        return tp
+    iou = box_iou(pred[:, 2:], gt[:, 1:])
+    iou[pred[:, 0][:, None] != gt[:, 0][None, :]] = 0.0
+    for t, threshold in enumerate(IOU_THRESHOLDS):
+        pi, gi = np.nonzero(iou >= threshold)
+        if len(pi) == 0:
+            continue
+        # Each prediction and each ground-truth box matched at most once
+        for by_gt in (False, True):
+            order = np.argsort(-iou[pi, gi], kind="stable")
+            pi, gi = pi[order], gi[order]
+            _, first = np.unique(gi if by_gt else pi, return_index=True)
+            pi, gi = pi[first], gi[first]
+        tp[pi, t] = True
+    return tp
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    """COCO-style 101-point interpolated AP."""
+    r = np.concatenate(([0.0], recall, [1.0]))
+    p = np.concatenate(([1.0], precision, [0.0]))
+    p = np.flip(np.maximum.accumulate(np.flip(p)))
+    x = np.linspace(0, 1, 101)
+    y = np.interp(x, r, p)
+    return float(((y[1:] + y[:-1]) / 2 * np.diff(x)).sum())
+
+
+def compute_metrics(tp: np.ndarray, conf: np.ndarray, pred_cls: np.ndarray, gt_cls: np.ndarray) -> Dict[str, float]:
+    """
+    Mean precision/recall (at the max mean-F1 confidence), mAP50 and mAP50-95
+    over classes that appear in the ground truth, as Ultralytics val reports.
+    """
+    order = np.argsort(-conf)
+    tp, conf, pred_cls = tp[order], conf[order], pred_cls[order]
+    classes = np.unique(gt_cls).astype(int)
+    grid = np.linspace(0, 1, 1000)
+
+    ap = np.zeros((len(classes), tp.shape[1]))
+    p_curve = np.zeros((len(classes), len(grid)))
+    r_curve = np.zeros((len(classes), len(grid)))
+    for k, c in enumerate(classes):
+        mask = pred_cls == c
+        n_gt = int((gt_cls == c).sum())
+        if not mask.any():
+            continue
+        tpc = tp[mask].cumsum(axis=0)
+        fpc = (~tp[mask]).cumsum(axis=0)
+        recall = tpc / (n_gt + 1e-9)
+        precision = tpc / (tpc + fpc)
+        # Curves vs confidence (conf is descending, np.interp needs ascending x)
+        r_curve[k] = np.interp(-grid, -conf[mask], recall[:, 0], left=0)
+        p_curve[k] = np.interp(-grid, -conf[mask], precision[:, 0], left=1)
+        for t in range(tp.shape[1]):
+            ap[k, t] = average_precision(recall[:, t], precision[:, t])
+
+    f1 = 2 * p_curve * r_curve / (p_curve + r_curve + 1e-9)
+    best = int(f1.mean(axis=0).argmax()) if len(classes) else 0
+    return {
+        "metrics/precision(B)": float(p_curve[:, best].mean()) if len(classes) else 0.0,
+        "metrics/recall(B)": float(r_curve[:, best].mean()) if len(classes) else 0.0,
+        "metrics/mAP50(B)": float(ap[:, 0].mean()) if len(classes) else 0.0,
+        "metrics/mAP50-95(B)": float(ap.mean()) if len(classes) else 0.0,
+    }
+
+
+def evaluate(engine: InferenceEngine, images: List[str], imgsz: int, latency_frames: int = 100) -> Dict[str, float]:
+    """
+    Accuracy on labelled images plus single-frame latency at the serving settings.
+
+    Returns:
+        Report columns for this model (metrics and speed/latency_ms)
+    """
+    tps, confs, pred_classes, gt_classes = [], [], [], []
+    for path in images:
+        frame = cv2.imread(path)
+        if frame is None:
+            continue
+        h, w = frame.shape[:2]
+        gt = load_labels(path, w, h)
+        detections = engine.predict_batch([frame], conf=0.001, iou=0.7, imgsz=imgsz)[0]
+        pred = np.array(
+            [[d["class_id"], d["conf"], *d["box"]] for d in detections], dtype=np.float32
+        ).reshape(-1, 6)
+        tps.append(match_predictions(pred, gt))
+        confs.append(pred[:, 1])
+        pred_classes.append(pred[:, 0])
+        gt_classes.append(gt[:, 0])
+
+    metrics = compute_metrics(
+        np.concatenate(tps), np.concatenate(confs),
+        np.concatenate(pred_classes), np.concatenate(gt_classes)
+    )
+
+    # Latency: one frame per call, serving confidence, after warm-up
+    frames = [f for f in (cv2.imread(p) for p in images[:latency_frames]) if f is not None]
+    for frame in frames[:3]:
+        engine.predict_batch([frame], conf=0.5, imgsz=imgsz)
+    started = time.perf_counter()
+    for frame in frames:
+        engine.predict_batch([frame], conf=0.5, imgsz=imgsz)
+    metrics["speed/latency_ms"] = (time.perf_counter() - started) * 1000 / max(1, len(frames))
+    return metrics
+
+
+def artifact_size_mb(path: str) -> float:
+    if os.path.isdir(path) or path.endswith(".xml"):
+        directory = path if os.path.isdir(path) else os.path.dirname(path)
+        total = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+    else:
+        total = os.path.getsize(path)
+    return total / (1024 * 1024)
+
+
+def write_report(rows: List[Dict], path: str):
+    """Write rows in the fixed-width, right-aligned CSV layout of results.csv."""
+    def cell(value) -> str:
+        if isinstance(value, float):
+            value = f"{value:.5g}"
+        return f"{value:>23}"
+
+    with open(path, "w") as f:
+        f.write(",".join(cell(c) for c in REPORT_COLUMNS) + "\n")
+        for row in rows:
+            f.write(",".join(cell(row.get(c, "")) for c in REPORT_COLUMNS) + "\n")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 post-training quantization of the helmet/vest model")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="FP32 best.pt")
+    parser.add_argument("--data", default=DEFAULT_DATA, help="YOLO data.yaml with train/val splits")
+    parser.add_argument("--engine", choices=("openvino", "onnx"), default="openvino")
+    parser.add_argument("--imgsz", type=int, default=640, help="Calibration and evaluation input size")
+    parser.add_argument("--calib-images", help="Calibration image directory (default: train split)")
+    parser.add_argument("--calib-size", type=int, default=300, help="Number of calibration images")
+    parser.add_argument("--eval-images", help="Labelled evaluation image directory (default: val split)")
+    parser.add_argument("--eval-size", type=int, default=500, help="Evaluation images (0 = all)")
+    parser.add_argument("--output-dir", default=os.path.join(HERE, "models"))
+    parser.add_argument("--report", help="Report path (default: <output-dir>/quantization_results.csv)")
+    parser.add_argument("--skip-eval", action="store_true", help="Only produce the INT8 artifact")
+    args = parser.parse_args()
+
+    calib_dir = args.calib_images or dataset_split(args.data, "train")
+    eval_dir = args.eval_images or dataset_split(args.data, "val") or calib_dir
+    if not calib_dir:
+        parser.error(f"No calibration images: {args.data} train split not found, pass --calib-images")
+    calib_images = list_images(calib_dir, args.calib_size)
+    print(f"[INFO] Calibrating on {len(calib_images)} images from {calib_dir}")
+
+    # FP32 export (dynamic shapes, same artifact the backend would build itself)
+    os.makedirs(args.output_dir, exist_ok=True)
+    fp32_path = export_model(args.weights, args.engine, args.output_dir)
+    stem = os.path.splitext(os.path.basename(args.weights))[0] + "_int8"
+    if args.engine == "onnx":
+        int8_path = quantize_onnx(fp32_path, os.path.join(args.output_dir, f"{stem}.onnx"), calib_images, args.imgsz)
+    else:
+        int8_path = quantize_openvino(
+            fp32_path, os.path.join(args.output_dir, f"{stem}_openvino_model", f"{stem}.xml"),
+            calib_images, args.imgsz
+        )
+    print(f"[INFO] INT8 model written to {int8_path}")
+    print(f"[INFO] Serve it with MODEL_PATH={int8_path}")
+
+    if args.skip_eval:
+        return
+    if not eval_dir:
+        parser.error("No evaluation images: pass --eval-images or use --skip-eval")
+
+    eval_images = list_images(eval_dir, args.eval_size, seed=1)
+    print(f"[INFO] Evaluating on {len(eval_images)} images from {eval_dir}")
+    candidates = [
+        ("best.pt", "torch", "fp32", args.weights),
+        (os.path.basename(fp32_path), args.engine, "fp32", fp32_path),
+        (os.path.basename(int8_path), args.engine, "int8", int8_path),
+    ]
+    rows = []
+    for name, engine_name, precision, path in candidates:
+        engine = load_engine(path, engine_name)
+        metrics = evaluate(engine, eval_images, args.imgsz)
+        rows.append({"model": name, "engine": engine_name, "precision": precision,
+                     "size_mb": artifact_size_mb(path), **metrics})
+        print(f"[INFO] {name}: mAP50 {metrics['metrics/mAP50(B)']:.4f}, "
+              f"{metrics['speed/latency_ms']:.1f} ms/frame")
+
+    baseline = rows[0]
+    for row in rows:
+        row["speed/speedup"] = baseline["speed/latency_ms"] / row["speed/latency_ms"]
+        row["metrics/mAP50_drop"] = baseline["metrics/mAP50(B)"] - row["metrics/mAP50(B)"]
+
+    report = args.report or os.path.join(args.output_dir, "quantization_results.csv")
+    write_report(rows, report)
+    print(f"[INFO] Report written to {report}")
+
+
+if __name__ == "__main__":
+    main()
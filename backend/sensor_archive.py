@@ -0,0 +1,453 @@
+"""
+Sensor Archive Module.
+Disk tier of the sensor history. Every device gets a directory of
+append-only segment files holding fixed-width little-endian records (one per
+sample), read back with np.memmap so queries copy only the rows they return
+and resident memory stays flat however much history is kept. Next to each
+segment, a sparse index stores the time of every INDEX_STRIDE-th record, so a
+time-range lookup binary-searches it and maps only the pages in range.
+
+The ingest path only packs records and queues them; a background thread
+appends them to the open segment files every flush_interval and applies the
+retention period (also to devices that stopped sending). Queued records are
+included in reads, so nothing is missing between flushes.
+
+Each process writes its own segments (<first t_ms>-<pid>.seg), so several
+uvicorn workers can archive the same device; readers merge all of them.
+Within a segment, sample times are made non-decreasing on write (a batch that
+overlaps the previous one is clamped to its last time), which keeps the
+sparse index searchable.
+"""
+
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from sensor_store import SCALAR_SENSORS, VECTOR_SENSORS
+
+
+SENSORS = tuple(VECTOR_SENSORS) + tuple(SCALAR_SENSORS)
+
+RECORD_DTYPE = np.dtype([
+    ("t_ms", "<i8"),            # Server-clock sample time (see sensor_store)
+    ("received_at", "<i8"),
+    ("client_ms", "<i8"),
+    ("valid", "<u2"),           # Bit i set = SENSORS[i] present
+    ("reserved", "<u2", (3,)),
+    ("timestamp", "S32"),       # Client timestamp as uploaded (same as SensorStore)
+    ("gps", "<f8", (5,)),
+    ("accelerometer", "<f4", (3,)),
+    ("gyroscope", "<f4", (3,)),
+    ("magnetometer", "<f4", (3,)),
+    ("proximity", "<f4"),
+    ("ambientLight", "<f4"),
+    ("pressure", "<f4"),
+])
+
+# One sparse index entry per this many records (~78 KB of records)
+INDEX_STRIDE = 512
+
+
+class _Segment:
+    """The segment this process is currently appending to for one device."""
+
+    __slots__ = ("path", "count", "first_t", "last_write", "records_file", "index_file")
+
+    def __init__(self, path: str, first_t: int):
+        self.path = path
+        self.first_t = first_t
+        self.last_write = time.monotonic()
+        self.records_file = open(path, "ab")
+        self.index_file = open(path[:-4] + ".tidx", "ab")
+        # Reopened after an idle close within the same millisecond: continue it
+        self.count = self.records_file.tell() // RECORD_DTYPE.itemsize
+
+    def close(self):
+        self.records_file.close()
+        self.index_file.close()
+
+
+class SensorArchive:
+    """Per-device memory-mapped columnar segments with a sparse time index."""
+
+    def __init__(
+        self,
+        root: str,
+        segment_records: int = 262_144,
+        segment_span_ms: int = 3_600_000,
+        retention_days: float = 28.0,
+        flush_interval: float = 0.5,
+        max_pending: int = 262_144,
+        retention_check_interval: float = 3600.0,
+        idle_close_interval: float = 300.0
+    ):
+        """
+        Initialize the archive (the writer starts on start()).
+
+        Args:
+            root: Directory holding one subdirectory per device
+            segment_records: Records per segment before rotating (~40 MB)
+            segment_span_ms: Time span per segment before rotating
+            retention_days: Segments older than this are deleted (0 = keep all)
+            flush_interval: Longest time a record waits in memory before its write
+            max_pending: Records queued before new batches are dropped
+            retention_check_interval: Seconds between retention sweeps over all devices
+            idle_close_interval: Seconds without samples before a device's segment
+                files are closed (device ids come and go, e.g. client addresses)
+        """
+        self.root = root
+        self.segment_records = max(INDEX_STRIDE, segment_records)
+        self.segment_span_ms = segment_span_ms
+        self.retention_days = retention_days
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.retention_check_interval = retention_check_interval
+        self.idle_close_interval = idle_close_interval
+        self._segments: Dict[str, _Segment] = {}
+        self._pending: Dict[str, List[np.ndarray]] = {}
+        self._pending_count = 0
+        self._last_t: Dict[str, int] = {}
+        self._lock = threading.Lock()        # Pending records and clamping state
+        self._write_lock = threading.Lock()  # Segment files
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        os.makedirs(root, exist_ok=True)
+
+        # Statistics
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.deleted_segments = 0
+
+    def start(self) -> "SensorArchive":
+        """Start the writer thread (first retention sweep included)."""
+        if self._running:
+            return self
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="sensor-archive", daemon=True)
+        self._thread.start()
+        print(f"[INFO] Sensor archive: {self.root} (retention {self.retention_days:g} days)")
+        return self
+
+    def stop(self, timeout: float = 5.0):
+        """Write queued records and close the segment files."""
+        if not self._running:
+            return
+        self._running = False
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def append(
+        self,
+        device: str,
+        t_ms: np.ndarray,
+        received_at: int,
+        client_ms: np.ndarray,
+        timestamp: np.ndarray,
+        readings: Dict[str, np.ndarray],
+        valid: Dict[str, np.ndarray]
+    ):
+        """Queue a batch for a device (SensorStore on_append signature, device first); no disk I/O."""
+        n = len(t_ms)
+        records = np.zeros(n, dtype=RECORD_DTYPE)
+        records["received_at"] = received_at
+        records["client_ms"] = client_ms
+        records["timestamp"] = np.asarray(timestamp, dtype="S32")
+        bits = np.zeros(n, dtype=np.uint16)
+        for bit, name in enumerate(SENSORS):
+            if name in readings:
+                records[name] = readings[name]
+                bits |= np.asarray(valid[name], dtype=np.uint16) << bit
+        records["valid"] = bits
+
+        with self._lock:
+            if self._pending_count + n > self.max_pending:
+                self.dropped += n
+                return
+            # Non-decreasing times per device keep the sparse index sorted
+            floor = self._last_t.get(device, np.iinfo(np.int64).min)
+            records["t_ms"] = np.maximum.accumulate(np.maximum(np.asarray(t_ms, dtype=np.int64), floor))
+            self._last_t[device] = int(records["t_ms"][-1])
+            self._pending.setdefault(device, []).append(records)
+            self._pending_count += n
+        if self._thread is None:
+            # No writer thread (start() not called): write on the caller's thread
+            self.flush()
+
+    def flush(self):
+        """Write every queued record to its segment."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._pending_count = 0
+        if not pending:
+            return
+        with self._write_lock:
+            for device, batches in pending.items():
+                records = np.concatenate(batches) if len(batches) > 1 else batches[0]
+                try:
+                    self._write_device(device, records)
+                    self.written += len(records)
+                except OSError as e:
+                    self.errors += 1
+                    print(f"[ERROR] Failed to archive {len(records)} sensor samples of {device}: {e}")
+
+    def purge(self, device: Optional[str] = None) -> int:
+        """
+        Delete the archived (and queued) history of one device, or of all devices.
+
+        Returns:
+            Number of device directories removed
+        """
+        with self._write_lock:
+            with self._lock:
+                names = [device] if device is not None else list(set(self.devices()) | set(self._pending))
+                for name in names:
+                    self._pending_count -= sum(len(batch) for batch in self._pending.pop(name, []))
+                    self._last_t.pop(name, None)
+            removed = 0
+            for name in names:
+                segment = self._segments.pop(name, None)
+                if segment is not None:
+                    segment.close()
+                directory = self._device_dir(name)
+                if os.path.isdir(directory):
+                    shutil.rmtree(directory, ignore_errors=True)
+                    removed += 1
+        return removed
+
+    def range_columns(
+        self,
+        device: str,
+        start_ms: int,
+        end_ms: int,
+        limit: Optional[int] = None,
+        with_timestamps: bool = True
+    ) -> Dict[str, Any]:
+        """
+        A device's archived samples with start_ms <= t_ms < end_ms, oldest first.
+
+        Args:
+            limit: Return at most this many of the oldest matches
+            with_timestamps: Include the client timestamps; aggregate queries
+                skip copying them
+
+        Returns:
+            Columns in the SensorStore.columns() layout
+        """
+        parts = []
+        for path, first_t in self._segment_files(device):
+            if first_t >= end_ms:
+                break
+            rows = self._read_range(path, start_ms, end_ms)
+            if rows is not None and len(rows):
+                parts.append(rows)
+        with self._lock:
+            queued = list(self._pending.get(device, []))
+        for batch in queued:
+            rows = batch[(batch["t_ms"] >= start_ms) & (batch["t_ms"] < end_ms)]
+            if len(rows):
+                parts.append(rows)
+
+        records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD_DTYPE)
+        if len(parts) > 1:
+            records = records[np.argsort(records["t_ms"], kind="stable")]
+        if limit is not None:
+            records = records[:limit]
+        return _to_columns(records, with_timestamps)
+
+    def devices(self) -> List[str]:
+        return sorted(unquote(name[2:]) for name in os.listdir(self.root) if name.startswith("d_"))
+
+    def usage(self, device: Optional[str] = None) -> Dict[str, int]:
+        """Segment count, records and bytes on disk (for one device or all)."""
+        names = [device] if device is not None else self.devices()
+        segments = records = size = 0
+        for name in names:
+            for path, _ in self._segment_files(name):
+                segments += 1
+                file_size = os.path.getsize(path)
+                size += file_size
+                records += file_size // RECORD_DTYPE.itemsize
+        return {"segments": segments, "records": records, "bytes": size}
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "root": self.root,
+            "queued": self._pending_count,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "deleted_segments": self.deleted_segments,
+            "open_segments": len(self._segments),
+        }
+
+    def _run(self):
+        next_retention = 0.0
+        while self._running:
+            if time.monotonic() >= next_retention:
+                self._apply_retention_all()
+                next_retention = time.monotonic() + self.retention_check_interval
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self._close_idle()
+        self.flush()
+        with self._write_lock:
+            for segment in self._segments.values():
+                segment.close()
+            self._segments.clear()
+
+    def _close_idle(self):
+        """Close the segments of devices that stopped sending; the next sample starts a new one."""
+        cutoff = time.monotonic() - self.idle_close_interval
+        with self._write_lock:
+            idle = [device for device, segment in self._segments.items() if segment.last_write < cutoff]
+            for device in idle:
+                self._segments.pop(device).close()
+        if idle:
+            with self._lock:
+                for device in idle:
+                    if device not in self._pending:
+                        self._last_t.pop(device, None)
+
+    def _device_dir(self, device: str) -> str:
+        # "d_" prefix: quoted ids such as ".." stay ordinary names
+        return os.path.join(self.root, "d_" + quote(device, safe=""))
+
+    def _segment_files(self, device: str) -> List[Tuple[str, int]]:
+        """(path, first t_ms) of a device's segments from every process, oldest first."""
+        directory = self._device_dir(device)
+        try:
+            names = os.listdir(directory)
+        except FileNotFoundError:
+            return []
+        segments = []
+        for name in names:
+            if name.endswith(".seg"):
+                try:
+                    segments.append((os.path.join(directory, name), int(name.split("-")[0])))
+                except ValueError:
+                    continue
+        return sorted(segments, key=lambda segment: segment[1])
+
+    def _write_device(self, device: str, records: np.ndarray):
+        segment = self._segments.get(device)
+        if segment is not None and not os.path.exists(segment.path):
+            # Purged by another process: start a new segment
+            self._segments.pop(device).close()
+            segment = None
+        start = 0
+        while start < len(records):
+            if segment is None or segment.count >= self.segment_records or \
+                    int(records["t_ms"][start]) - segment.first_t >= self.segment_span_ms:
+                segment = self._rotate(device, int(records["t_ms"][start]))
+            take = min(len(records) - start, self.segment_records - segment.count)
+            self._write(segment, records[start:start + take])
+            start += take
+
+    def _rotate(self, device: str, first_t: int) -> _Segment:
+        previous = self._segments.pop(device, None)
+        if previous is not None:
+            previous.close()
+        directory = self._device_dir(device)
+        os.makedirs(directory, exist_ok=True)
+        segment = _Segment(os.path.join(directory, f"{first_t}-{os.getpid()}.seg"), first_t)
+        self._segments[device] = segment
+        return segment
+
+    def _write(self, segment: _Segment, records: np.ndarray):
+        # Sparse index: the time of every INDEX_STRIDE-th record of the segment
+        positions = np.arange(segment.count, segment.count + len(records))
+        marks = records["t_ms"][positions % INDEX_STRIDE == 0]
+        segment.records_file.write(records.tobytes())
+        segment.records_file.flush()
+        if len(marks):
+            segment.index_file.write(marks.astype("<i8").tobytes())
+            segment.index_file.flush()
+        segment.count += len(records)
+        segment.last_write = time.monotonic()
+
+    def _read_range(self, path: str, start_ms: int, end_ms: int) -> Optional[np.ndarray]:
+        """Rows of one segment in [start_ms, end_ms), mapping only the blocks in range."""
+        try:
+            count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            if count == 0:
+                return None
+            index = np.fromfile(path[:-4] + ".tidx", dtype="<i8")
+        except FileNotFoundError:
+            return None
+        # Blocks written but not yet indexed (concurrent writer) are read in full
+        index = index[:(count - 1) // INDEX_STRIDE + 1]
+        lo = max(0, int(np.searchsorted(index, start_ms, side="right")) - 1) * INDEX_STRIDE
+        hi = min(count, int(np.searchsorted(index, end_ms, side="left")) * INDEX_STRIDE)
+        if len(index) * INDEX_STRIDE < count:
+            hi = count
+        if lo >= hi:
+            return None
+        records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", shape=(count,))[lo:hi]
+        t = records["t_ms"]
+        first, last = np.searchsorted(t, start_ms, side="left"), np.searchsorted(t, end_ms, side="left")
+        return np.array(records[first:last])
+
+    def _apply_retention_all(self):
+        if self.retention_days <= 0:
+            return
+        try:
+            devices = self.devices()
+        except OSError:
+            return
+        for device in devices:
+            self._apply_retention(device)
+
+    def _apply_retention(self, device: str):
+        cutoff = int((time.time() - self.retention_days * 86400) * 1000)
+        with self._write_lock:
+            segment = self._segments.get(device)
+            current = segment.path if segment is not None else None
+            files = self._segment_files(device)
+            for path, first_t in files:
+                if first_t >= cutoff:
+                    break
+                if path == current or self._last_t_of(path) >= cutoff:
+                    continue
+                for file_path in (path, path[:-4] + ".tidx"):
+                    try:
+                        os.remove(file_path)
+                    except FileNotFoundError:
+                        pass
+                self.deleted_segments += 1
+            if current is None and files and not self._segment_files(device):
+                # Nothing left of an idle device
+                try:
+                    os.rmdir(self._device_dir(device))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _last_t_of(path: str) -> int:
+        count = os.path.getsize(path) // RECORD_DTYPE.itemsize
+        if count == 0:
+            return np.iinfo(np.int64).min
+        return int(np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=(count - 1) * RECORD_DTYPE.itemsize, shape=(1,))["t_ms"][0])
+
+
+def _to_columns(records: np.ndarray, with_timestamps: bool = True) -> Dict[str, Any]:
+    """Archive records -> SensorStore.columns() layout (empty timestamps unless with_timestamps)."""
+    bits = records["valid"]
+    columns: Dict[str, Any] = {
+        "received_at": records["received_at"],
+        "t_ms": records["t_ms"],
+        "timestamp": records["timestamp"] if with_timestamps else np.zeros(len(records), dtype="S32"),
+    }
+    for name in SENSORS:
+        columns[name] = records[name]
+    columns["valid"] = {name: (bits & (1 << bit)) != 0 for bit, name in enumerate(SENSORS)}
+    return columns
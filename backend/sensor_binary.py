@@ -0,0 +1,92 @@
+"""
+Sensor Binary Format Module.
+Packed little-endian frame format for mobile sensor uploads, decoded with
+np.frombuffer straight into SensorStore columns (no per-sample JSON or
+Pydantic parsing).
+
+Frame layout (version 1):
+    header  16 bytes  magic b"SNSR", uint16 version, uint16 record size,
+                      uint32 record count, uint32 reserved (0)
+    records count x RECORD_DTYPE_V1 (100 bytes each)
+
+Each record carries the client time in epoch milliseconds, a validity
+bitmask (bit i set = SENSOR_BITS[i] present) and every reading; fields of
+absent sensors are ignored.
+"""
+
+import struct
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+MAGIC = b"SNSR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+# Validity bitmask order
+SENSOR_BITS = ("accelerometer", "gyroscope", "magnetometer", "gps", "proximity", "ambientLight", "pressure")
+
+RECORD_DTYPE_V1 = np.dtype([
+    ("t_ms", "<i8"),
+    ("valid", "<u2"),
+    ("reserved", "<u2"),
+    ("accelerometer", "<f4", (3,)),
+    ("gyroscope", "<f4", (3,)),
+    ("magnetometer", "<f4", (3,)),
+    ("gps", "<f8", (5,)),          # latitude, longitude, altitude, speed, accuracy
+    ("proximity", "<f4"),
+    ("ambientLight", "<f4"),
+    ("pressure", "<f4"),
+])
+
+RECORD_DTYPES = {1: RECORD_DTYPE_V1}
+
+MAX_RECORDS = 100_000
+
+
+def decode_frame(payload: bytes) -> Tuple[np.ndarray, np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """
+    Decode a binary upload into columns for SensorStore.append_columns().
+
+    Args:
+        payload: Frame bytes (header + records)
+
+    Returns:
+        (timestamps as ISO 8601 UTC bytes, client times in epoch ms,
+        readings by sensor, validity by sensor)
+
+    Raises:
+        ValueError: If the header, version or length do not match
+    """
+    if len(payload) < HEADER.size:
+        raise ValueError("Frame shorter than its header")
+    magic, version, record_size, count, _ = HEADER.unpack_from(payload)
+    if magic != MAGIC:
+        raise ValueError("Not a sensor frame (bad magic)")
+    dtype = RECORD_DTYPES.get(version)
+    if dtype is None:
+        raise ValueError(f"Unsupported frame version {version}")
+    if record_size != dtype.itemsize:
+        raise ValueError(f"Record size {record_size} does not match version {version} ({dtype.itemsize})")
+    if count > MAX_RECORDS:
+        raise ValueError(f"Frame has {count} records (max {MAX_RECORDS})")
+    if len(payload) != HEADER.size + count * record_size:
+        raise ValueError(f"Frame length {len(payload)} does not match {count} records")
+
+    records = np.frombuffer(payload, dtype=dtype, count=count, offset=HEADER.size)
+    timestamps = np.datetime_as_string(records["t_ms"].astype("datetime64[ms]"), unit="ms", timezone="UTC")
+    readings = {name: records[name] for name in SENSOR_BITS}
+    valid = {name: (records["valid"] & (1 << bit)) != 0 for bit, name in enumerate(SENSOR_BITS)}
+    return timestamps.astype("S32"), records["t_ms"], readings, valid
+
+
+def encode_frame(records: np.ndarray, version: int = VERSION) -> bytes:
+    """
+    Pack records (RECORD_DTYPES[version] array) into a frame.
+
+    Used by clients, tests and the load generator.
+    """
+    dtype = RECORD_DTYPES[version]
+    records = np.ascontiguousarray(records, dtype=dtype)
+    return HEADER.pack(MAGIC, version, dtype.itemsize, len(records), 0) + records.tobytes()
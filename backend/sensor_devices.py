@@ -0,0 +1,186 @@
+"""
+Sensor Devices Module.
+Per-device partitions of the sensor history. Every device (phone / worker)
+gets its own bounded SensorStore plus registry bookkeeping (first/last seen,
+sample totals), so a chatty device only evicts its own samples and per-device
+queries, fall detection and stats touch a single partition. Fleet-wide views
+merge the partitions on demand.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from sensor_store import SensorStore
+
+
+class _Device:
+    """Registry entry for one device."""
+
+    __slots__ = ("store", "first_seen", "last_seen", "samples_total")
+
+    def __init__(self, store: SensorStore, now_ms: int):
+        self.store = store
+        self.first_seen = now_ms
+        self.last_seen = now_ms
+        self.samples_total = 0
+
+
+class DeviceRegistry:
+    """Device id -> bounded sensor partition, least recently seen evicted first."""
+
+    def __init__(
+        self,
+        capacity_per_device: int = 1000,
+        max_devices: int = 500,
+        rate_window_ms: int = 10_000,
+        on_evict: Optional[Callable[[str], None]] = None,
+        archive: Optional[Any] = None
+    ):
+        """
+        Initialize the registry.
+
+        Args:
+            capacity_per_device: Samples kept per device
+            max_devices: Devices kept before the least recently seen is dropped
+            rate_window_ms: Trailing window the reported sample rate is measured over
+            on_evict: Called with the device id when a device is dropped
+            archive: Optional SensorArchive every partition writes through to
+        """
+        self.capacity_per_device = max(1, capacity_per_device)
+        self.max_devices = max(1, max_devices)
+        self.rate_window_ms = rate_window_ms
+        self.on_evict = on_evict
+        self.archive = archive
+        self._devices: "OrderedDict[str, _Device]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._devices)
+
+    def partition(self, device: str, samples: int = 0) -> SensorStore:
+        """
+        Store of a device, created on first use; marks the device as seen.
+
+        Args:
+            device: Device id
+            samples: Samples about to be written (for the registry totals)
+        """
+        now_ms = int(time.time() * 1000)
+        evicted = []
+        with self._lock:
+            entry = self._devices.pop(device, None)
+            if entry is None:
+                on_append = partial(self.archive.append, device) if self.archive is not None else None
+                entry = _Device(SensorStore(self.capacity_per_device, on_append=on_append), now_ms)
+            self._devices[device] = entry
+            entry.last_seen = now_ms
+            entry.samples_total += samples
+            while len(self._devices) > self.max_devices:
+                evicted.append(self._devices.popitem(last=False)[0])
+        for name in evicted:
+            print(f"[INFO] Sensor device {name} evicted (more than {self.max_devices} devices)")
+            if self.on_evict is not None:
+                self.on_evict(name)
+        return entry.store
+
+    def get(self, device: str) -> Optional[SensorStore]:
+        """Store of a known device (None if unknown), without marking it as seen."""
+        entry = self._devices.get(device)
+        return entry.store if entry is not None else None
+
+    def stores(self) -> Dict[str, SensorStore]:
+        with self._lock:
+            return {name: entry.store for name, entry in self._devices.items()}
+
+    def remove(self, device: str) -> bool:
+        with self._lock:
+            removed = self._devices.pop(device, None) is not None
+        if removed and self.on_evict is not None:
+            self.on_evict(device)
+        return removed
+
+    def clear(self):
+        with self._lock:
+            names = list(self._devices)
+            self._devices.clear()
+        if self.on_evict is not None:
+            for name in names:
+                self.on_evict(name)
+
+    def devices(self, now_ms: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Registry listing, most recently seen first.
+
+        Returns:
+            Dicts with "deviceId", "samples_stored", "samples_total",
+            "first_seen"/"last_seen" (epoch ms), "last_sample_at" (server-clock
+            ms of the newest sample), "sample_rate_hz" over rate_window_ms and
+            "sensor_coverage"
+        """
+        now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+        with self._lock:
+            entries = list(self._devices.items())
+        listing = []
+        for name, entry in reversed(entries):
+            store = entry.store
+            listing.append({
+                "deviceId": name,
+                "samples_stored": len(store),
+                "samples_total": entry.samples_total,
+                "first_seen": entry.first_seen,
+                "last_seen": entry.last_seen,
+                "last_sample_at": store.last_t_ms(),
+                "sample_rate_hz": round(store.count_since(now_ms - self.rate_window_ms) * 1000 / self.rate_window_ms, 2),
+                "sensor_coverage": store.coverage(),
+            })
+        return listing
+
+
+def merge_columns(parts: Dict[str, Dict[str, Any]], limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Concatenate per-device SensorStore column dicts into one, ordered by t_ms.
+
+    Args:
+        parts: Device id -> columns()/range_columns() output
+        limit: Keep only the newest `limit` rows
+
+    Returns:
+        Columns in the same layout plus a "device" column with each row's device id
+    """
+    parts = {name: cols for name, cols in parts.items() if len(cols["t_ms"])}
+    if not parts:
+        return {**SensorStore(1).columns(0), "device": np.zeros(0, dtype=object)}
+    if len(parts) == 1:
+        name, cols = next(iter(parts.items()))
+        return _take({**cols, "device": np.full(len(cols["t_ms"]), name, dtype=object)}, limit)
+
+    merged: Dict[str, Any] = {}
+    columns = list(parts.values())
+    for key, value in columns[0].items():
+        if key == "valid":
+            merged["valid"] = {s: np.concatenate([c["valid"][s] for c in columns]) for s in value}
+        else:
+            merged[key] = np.concatenate([c[key] for c in columns])
+    merged["device"] = np.concatenate([np.full(len(c["t_ms"]), n, dtype=object) for n, c in parts.items()])
+
+    order = np.argsort(merged["t_ms"], kind="stable")
+    if limit is not None:
+        order = order[len(order) - min(limit, len(order)):]
+    return _take(merged, None, order)
+
+
+def _take(cols: Dict[str, Any], limit: Optional[int], rows: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """Select rows (or the last `limit` rows) of every column."""
+    if rows is None:
+        if limit is None or limit >= len(cols["t_ms"]):
+            return cols
+        rows = np.arange(len(cols["t_ms"]) - max(0, limit), len(cols["t_ms"]))
+    return {
+        key: ({s: m[rows] for s, m in value.items()} if key == "valid" else value[rows])
+        for key, value in cols.items()
+    }
@@ -0,0 +1,451 @@
+"""
+Sensor Load Generator.
+Drives the sensor ingestion endpoints with synthetic multi-device streams
+(accelerometer, gyroscope, GPS, ambient light; a walking worker per device)
+or replays recorded sensor_logs at N x speed, and reports throughput,
+latency percentiles and server memory - for sizing pods before rolling
+phones out to a new site.
+
+Works against the FastAPI backend (app.py) and my_sensor_app/example_server.py;
+both accept /api/sensor-data (one sample) and /api/sensor-data/batch, the
+backend also /api/sensor-data/binary (sensor_binary frames).
+
+Load model:
+    --hz > 0   open loop: every device produces --hz samples/s, sent in
+               requests of --batch-size samples on a fixed schedule. Latency
+               is measured from the scheduled send time, so a server that
+               falls behind shows up in p99 instead of silently lowering the
+               offered load.
+    --hz 0     closed loop: --concurrency workers send back to back, which
+               measures the maximum throughput.
+
+Server RSS is sampled once per second from /proc/<pid>/status (--server-pid,
+local servers) or from the "rss_bytes" / "rssBytes" field of the server's
+stats endpoint (/api/sensor-data/stats on the backend, /health on the
+example server).
+
+Usage:
+    python sensor_loadgen.py --url http://localhost:8000 --devices 200 --hz 50 --batch-size 50
+    python sensor_loadgen.py --url http://localhost:8000 --format binary --hz 0 --concurrency 32
+    python sensor_loadgen.py --url http://localhost:5000 --target flask \\
+        --replay ../my_sensor_app/sensor_logs --speed 10
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+
+from sensor_binary import RECORD_DTYPE_V1, SENSOR_BITS, encode_frame
+
+
+GRAVITY = 9.81
+# Degrees of latitude per metre
+DEG_PER_M = 1.0 / 111_320.0
+
+STATS_PATHS = {"backend": "/api/sensor-data/stats", "flask": "/health"}
+
+
+# ---------------------------------------------------------------------------
+# Sample sources
+# ---------------------------------------------------------------------------
+
+class SyntheticDevice:
+    """A phone carried by a walking worker: gait on the accelerometer, a GPS track, daylight."""
+
+    def __init__(self, device_id: str, hz: float, seed: int, base_lat: float = 12.9716, base_lon: float = 77.5946):
+        self.device_id = device_id
+        self.hz = hz
+        self.rng = np.random.default_rng(seed)
+        self.step_hz = self.rng.uniform(1.6, 2.2)
+        self.heading = self.rng.uniform(0, 2 * np.pi)
+        self.speed = self.rng.uniform(0.8, 1.5)
+        self.lat = base_lat + self.rng.normal(0, 2e-4)
+        self.lon = base_lon + self.rng.normal(0, 2e-4)
+        self.light = self.rng.uniform(80, 20_000)
+        self.t = 0.0
+
+    def records(self, n: int, start_ms: int) -> np.ndarray:
+        """Next n samples as sensor_binary records (GPS and light at 1 Hz)."""
+        dt = 1.0 / self.hz
+        t = self.t + dt * np.arange(n)
+        self.t += dt * n
+        gait = np.sin(2 * np.pi * self.step_hz * t)
+
+        records = np.zeros(n, dtype=RECORD_DTYPE_V1)
+        records["t_ms"] = start_ms + np.round(np.arange(n) * dt * 1000).astype(np.int64)
+        records["accelerometer"] = np.column_stack([
+            0.6 * np.sin(np.pi * self.step_hz * t),
+            0.3 * gait,
+            GRAVITY + 1.8 * gait,
+        ]) + self.rng.normal(0, 0.15, (n, 3))
+        records["gyroscope"] = self.rng.normal(0, 0.05, (n, 3))
+        records["gyroscope"][:, 2] += 0.2 * np.cos(2 * np.pi * self.step_hz * t)
+
+        # Slow random walk of the heading; position advances at walking speed
+        self.heading += self.rng.normal(0, 0.05)
+        distance = self.speed * dt * n
+        self.lat += distance * np.cos(self.heading) * DEG_PER_M
+        self.lon += distance * np.sin(self.heading) * DEG_PER_M / np.cos(np.radians(self.lat))
+        self.light = float(np.clip(self.light * np.exp(self.rng.normal(0, 0.02)), 1, 100_000))
+        records["gps"] = (self.lat, self.lon, 920 + self.rng.normal(0, 1), self.speed, self.rng.uniform(3, 10))
+        records["ambientLight"] = self.light
+
+        valid = np.full(n, (1 << SENSOR_BITS.index("accelerometer")) | (1 << SENSOR_BITS.index("gyroscope")), dtype=np.uint16)
+        once_a_second = (np.floor(t) != np.floor(t - dt)) | (np.arange(n) == 0)
+        valid[once_a_second] |= (1 << SENSOR_BITS.index("gps")) | (1 << SENSOR_BITS.index("ambientLight"))
+        records["valid"] = valid
+        return records
+
+
+def records_to_json(records: np.ndarray, device_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """sensor_binary records -> the JSON sample layout of the mobile app."""
+    timestamps = np.datetime_as_string(records["t_ms"].astype("datetime64[ms]"), unit="ms", timezone="UTC")
+    bits = {name: (records["valid"] & (1 << bit)) != 0 for bit, name in enumerate(SENSOR_BITS)}
+    samples = []
+    for i in range(len(records)):
+        sample: Dict[str, Any] = {"timestamp": str(timestamps[i])}
+        if device_id is not None:
+            sample["deviceId"] = device_id
+        for name in ("accelerometer", "gyroscope", "magnetometer"):
+            if bits[name][i]:
+                x, y, z = records[name][i].tolist()
+                sample[name] = {"x": round(x, 4), "y": round(y, 4), "z": round(z, 4)}
+        if bits["gps"][i]:
+            lat, lon, alt, speed, accuracy = records["gps"][i].tolist()
+            sample["gps"] = {"latitude": lat, "longitude": lon, "altitude": round(alt, 1),
+                             "speed": round(speed, 2), "accuracy": round(accuracy, 1)}
+        for name in ("proximity", "ambientLight", "pressure"):
+            sample[name] = round(float(records[name][i]), 2) if bits[name][i] else None
+        samples.append(sample)
+    return samples
+
+
+def load_recorded(path: str) -> List[Dict[str, Any]]:
+    """
+    Samples from sensor_logs: NDJSON segments (sensor_log.py) and the older
+    one-sample-per-file JSON dumps, ordered by timestamp.
+    """
+    files = [path] if os.path.isfile(path) else sorted(
+        glob.glob(os.path.join(path, "*.ndjson")) + glob.glob(os.path.join(path, "*.json"))
+    )
+    samples = []
+    for file_path in files:
+        if os.path.basename(file_path) == "index.json":
+            continue
+        with open(file_path) as f:
+            if file_path.endswith(".ndjson"):
+                rows = [json.loads(line) for line in f if line.strip()]
+            else:
+                try:
+                    data = json.load(f)
+                except ValueError:
+                    continue
+                rows = data if isinstance(data, list) else data.get("batch", [data])
+        samples.extend(row for row in rows if isinstance(row, dict) and row.get("timestamp"))
+    for sample in samples:
+        sample["_t"] = parse_ms(sample["timestamp"])
+    samples.sort(key=lambda sample: sample["_t"])
+    return samples
+
+
+def parse_ms(timestamp: str) -> int:
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp() * 1000)
+
+
+# ---------------------------------------------------------------------------
+# Request schedules
+# ---------------------------------------------------------------------------
+
+class Request:
+    __slots__ = ("due", "device", "samples")
+
+    def __init__(self, due: float, device: str, samples: Any):
+        self.due = due
+        self.device = device
+        self.samples = samples
+
+
+def synthetic_schedule(devices: List[SyntheticDevice], batch_size: int, duration: float, hz: float):
+    """Requests of every device in send order: (due time offset in s, device, records)."""
+    if hz <= 0:
+        # Closed loop: devices take turns, due immediately
+        while True:
+            for device in devices:
+                yield Request(0.0, device.device_id, device.records(batch_size, int(time.time() * 1000)))
+    interval = batch_size / hz
+    # Stagger devices across one interval so requests do not arrive in bursts
+    heap = [(interval * i / len(devices), i) for i in range(len(devices))]
+    heapq.heapify(heap)
+    while heap:
+        due, i = heapq.heappop(heap)
+        if due >= duration:
+            return
+        device = devices[i]
+        yield Request(due, device.device_id, device.records(batch_size, int(time.time() * 1000)))
+        heapq.heappush(heap, (due + interval, i))
+
+
+def replay_schedule(samples: List[Dict[str, Any]], batch_size: int, speed: float, loop: bool, default_device: str):
+    """Recorded samples in batches, due at their original spacing divided by speed (0 = as fast as possible)."""
+    if not samples:
+        return
+    span = samples[-1]["_t"] - samples[0]["_t"]
+    offset = 0.0
+    while True:
+        by_device: Dict[str, List[Dict[str, Any]]] = {}
+        for sample in samples:
+            device = sample.get("deviceId") or default_device
+            rows = by_device.setdefault(device, [])
+            rows.append(sample)
+            if len(rows) >= batch_size:
+                yield replay_request(rows, device, samples[0]["_t"], speed, offset)
+                by_device[device] = []
+        for device, rows in by_device.items():
+            if rows:
+                yield replay_request(rows, device, samples[0]["_t"], speed, offset)
+        if not loop:
+            return
+        offset += (span + 1000) / 1000.0 / speed if speed > 0 else 0.0
+
+
+def replay_request(rows, device, t0, speed, offset):
+    due = offset + (rows[-1]["_t"] - t0) / 1000.0 / speed if speed > 0 else 0.0
+    return Request(due, device, [{k: v for k, v in row.items() if k not in ("_t", "server_received_at")} for row in rows])
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+
+class Results:
+    """Per-request outcomes collected from the workers."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: List[float] = []
+        self.samples_ok = 0
+        self.requests_ok = 0
+        self.errors: Dict[str, int] = {}
+
+    def record(self, latency: float, samples: int, error: Optional[str]):
+        with self._lock:
+            self.latencies.append(latency)
+            if error is None:
+                self.requests_ok += 1
+                self.samples_ok += samples
+            else:
+                self.errors[error] = self.errors.get(error, 0) + 1
+
+
+class RssSampler:
+    """Samples the server's resident memory once per second."""
+
+    def __init__(self, pid: Optional[int], stats_url: Optional[str]):
+        self.pid = pid
+        self.stats_url = stats_url
+        self.samples: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def read(self) -> Optional[int]:
+        if self.pid is not None:
+            try:
+                with open(f"/proc/{self.pid}/status") as f:
+                    for line in f:
+                        if line.startswith("VmRSS:"):
+                            return int(line.split()[1]) * 1024
+            except OSError:
+                return None
+        if self.stats_url:
+            try:
+                data = requests.get(self.stats_url, timeout=2).json()
+                value = data.get("rss_bytes", data.get("rssBytes"))
+                return int(value) if value is not None else None
+            except (requests.RequestException, ValueError, TypeError):
+                return None
+        return None
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.read()
+            if rss is not None:
+                self.samples.append(rss)
+            self._stop.wait(1.0)
+
+
+def send(session: requests.Session, base_url: str, fmt: str, request: Request, timeout: float) -> Optional[str]:
+    """POST one request; returns None on success, else an error label."""
+    samples = request.samples
+    try:
+        if fmt == "binary":
+            response = session.post(
+                f"{base_url}/api/sensor-data/binary", params={"deviceId": request.device},
+                data=encode_frame(samples), headers={"Content-Type": "application/octet-stream"}, timeout=timeout
+            )
+        else:
+            if isinstance(samples, np.ndarray):
+                samples = records_to_json(samples, request.device)
+            if fmt == "single":
+                response = session.post(f"{base_url}/api/sensor-data", json=samples[0], timeout=timeout)
+            else:
+                response = session.post(
+                    f"{base_url}/api/sensor-data/batch",
+                    json={"batch": samples, "deviceId": request.device}, timeout=timeout
+                )
+    except requests.Timeout:
+        return "timeout"
+    except requests.RequestException as e:
+        return type(e).__name__
+    return None if response.ok else f"HTTP {response.status_code}"
+
+
+def run(schedule, args, stats_url: Optional[str]) -> Dict[str, Any]:
+    results = Results()
+    pending: "queue.Queue[Optional[Request]]" = queue.Queue(maxsize=args.concurrency * 4)
+    start = time.perf_counter()
+    deadline = start + args.duration
+    open_loop = args.speed > 0 if args.replay else args.hz > 0
+
+    def worker():
+        session = requests.Session()
+        while True:
+            request = pending.get()
+            if request is None:
+                return
+            # Open loop: latency counts from when the request was due
+            began = start + request.due if open_loop else time.perf_counter()
+            count = len(request.samples) if args.format != "single" else 1
+            error = send(session, args.url, args.format, request, args.timeout)
+            results.record(time.perf_counter() - began, count, error)
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(args.concurrency)]
+    for thread in workers:
+        thread.start()
+    sampler = RssSampler(args.server_pid, stats_url).start()
+
+    sent = 0
+    for request in schedule:
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        wait = start + request.due - now
+        if wait > 0:
+            time.sleep(wait)
+        pending.put(request)
+        sent += 1
+    for _ in workers:
+        pending.put(None)
+    for thread in workers:
+        thread.join(timeout=args.timeout + 5)
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    latencies = np.array(results.latencies) * 1000 if results.latencies else np.zeros(1)
+    rss = sampler.samples
+    return {
+        "target": args.url,
+        "format": args.format,
+        "elapsed_s": round(elapsed, 2),
+        "requests_sent": sent,
+        "requests_ok": results.requests_ok,
+        "errors": results.errors,
+        "samples_ok": results.samples_ok,
+        "samples_per_s": round(results.samples_ok / elapsed, 1),
+        "requests_per_s": round(results.requests_ok / elapsed, 1),
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 2),
+            "p90": round(float(np.percentile(latencies, 90)), 2),
+            "p99": round(float(np.percentile(latencies, 99)), 2),
+            "max": round(float(latencies.max()), 2),
+        },
+        "server_rss_mb": {
+            "start": round(rss[0] / 2**20, 1),
+            "peak": round(max(rss) / 2**20, 1),
+            "end": round(rss[-1] / 2**20, 1),
+        } if rss else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the sensor ingestion endpoints")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server base URL")
+    parser.add_argument("--target", choices=("backend", "flask"), default="backend",
+                        help="Server kind (stats endpoint for RSS; flask has no binary endpoint)")
+    parser.add_argument("--format", choices=("batch", "single", "binary"), default="batch")
+    parser.add_argument("--devices", type=int, default=50, help="Synthetic devices")
+    parser.add_argument("--hz", type=float, default=50.0, help="Samples/s per device (0 = closed loop, max throughput)")
+    parser.add_argument("--batch-size", type=int, default=50, help="Samples per request")
+    parser.add_argument("--concurrency", type=int, default=16, help="Parallel connections")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds to run")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Request timeout (s)")
+    parser.add_argument("--replay", help="Replay sensor_logs (directory or file) instead of synthetic devices")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed multiplier (0 = as fast as possible)")
+    parser.add_argument("--loop", action="store_true", help="Restart the replay until --duration")
+    parser.add_argument("--server-pid", type=int, help="Read server RSS from /proc/<pid> instead of the stats endpoint")
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    args.url = args.url.rstrip("/")
+    if args.format == "binary" and args.target == "flask":
+        parser.error("The example server has no binary endpoint")
+    if args.format == "single":
+        args.batch_size = 1
+
+    if args.replay:
+        samples = load_recorded(args.replay)
+        if not samples:
+            parser.error(f"No recorded samples in {args.replay}")
+        if args.format == "binary":
+            parser.error("Replay sends recorded JSON samples; use --format batch or single")
+        print(f"[INFO] Replaying {len(samples)} samples from {args.replay} at {args.speed}x")
+        schedule = replay_schedule(samples, args.batch_size, args.speed, args.loop, "replay")
+    else:
+        devices = [SyntheticDevice(f"loadgen-{i:04d}", args.hz or 50.0, args.seed + i) for i in range(args.devices)]
+        offered = f"{args.devices * args.hz:.0f} samples/s offered" if args.hz > 0 else "closed loop"
+        print(f"[INFO] {args.devices} synthetic devices, {args.format} x {args.batch_size}, "
+              f"{args.concurrency} connections, {offered}, {args.duration:.0f}s")
+        schedule = synthetic_schedule(devices, args.batch_size, args.duration, args.hz)
+
+    report = run(schedule, args, args.url + STATS_PATHS[args.target])
+
+    latency = report["latency_ms"]
+    print(f"[INFO] {report['samples_ok']} samples in {report['requests_ok']} requests over {report['elapsed_s']}s")
+    print(f"[INFO] Throughput: {report['samples_per_s']} samples/s, {report['requests_per_s']} requests/s")
+    print(f"[INFO] Latency ms: p50 {latency['p50']}, p90 {latency['p90']}, p99 {latency['p99']}, max {latency['max']}")
+    if report["errors"]:
+        print(f"[WARN] Errors: {report['errors']}")
+    if report["server_rss_mb"]:
+        rss = report["server_rss_mb"]
+        print(f"[INFO] Server RSS MB: start {rss['start']}, peak {rss['peak']}, end {rss['end']}")
+    else:
+        print("[WARN] Server RSS unavailable (pass --server-pid for a local server)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
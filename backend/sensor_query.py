@@ -0,0 +1,168 @@
+"""
+Sensor Query Module.
+Chart-sized views of the sensor history: per-bucket min/max/mean/last of
+selected fields computed with NumPy reductions (one pass per field, no
+per-sample Python), and Largest-Triangle-Three-Buckets (LTTB) downsampling
+that keeps the visual shape of a series within a fixed point budget. Response
+size depends on the bucket count or point budget, not on the time range.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from sensor_store import SCALAR_SENSORS, VECTOR_SENSORS
+
+
+MAX_BUCKETS = 5000
+MAX_POINTS = 5000
+
+
+def field_names() -> List[str]:
+    """Queryable fields: "<sensor>.<component>", "<imu sensor>.magnitude" and scalar sensors."""
+    names = []
+    for sensor, (components, _) in VECTOR_SENSORS.items():
+        names.extend(f"{sensor}.{c}" for c in components)
+        if len(components) == 3:
+            names.append(f"{sensor}.magnitude")
+    names.extend(SCALAR_SENSORS)
+    return names
+
+
+def field_values(columns: Dict[str, Any], field: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Times and values of one field where its sensor reading is present.
+
+    Args:
+        columns: SensorStore.columns()/range_columns() output
+        field: Name from field_names()
+
+    Raises:
+        ValueError: For unknown fields
+    """
+    sensor, _, component = field.partition(".")
+    if sensor in SCALAR_SENSORS and not component:
+        values = columns[sensor].astype(np.float64)
+    elif sensor in VECTOR_SENSORS and component:
+        components = VECTOR_SENSORS[sensor][0]
+        readings = columns[sensor].astype(np.float64)
+        if component == "magnitude" and len(components) == 3:
+            values = np.sqrt(np.einsum("ij,ij->i", readings, readings))
+        elif component in components:
+            values = readings[:, components.index(component)]
+        else:
+            raise ValueError(f"Unknown field {field!r}")
+    else:
+        raise ValueError(f"Unknown field {field!r}")
+    mask = columns["valid"][sensor]
+    return columns["t_ms"][mask], values[mask]
+
+
+def bucket_aggregate(t: np.ndarray, values: np.ndarray, start_ms: int, bucket_ms: int) -> Dict[str, list]:
+    """
+    Min/max/mean/last/count per time bucket (empty buckets omitted).
+
+    Returns:
+        Columnar {"t": bucket start ms, "min", "max", "mean", "last", "count"}
+    """
+    if len(t) == 0:
+        return {"t": [], "min": [], "max": [], "mean": [], "last": [], "count": []}
+    order = np.argsort(t, kind="stable")
+    t, values = t[order], values[order]
+    bucket = (t - start_ms) // bucket_ms
+    # Sorted bucket ids: each bucket is a contiguous run, reduced with reduceat
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], len(t)]
+    counts = ends - starts
+    return {
+        "t": (start_ms + bucket[starts] * bucket_ms).tolist(),
+        "min": _round(np.minimum.reduceat(values, starts)),
+        "max": _round(np.maximum.reduceat(values, starts)),
+        "mean": _round(np.add.reduceat(values, starts) / counts),
+        "last": _round(values[ends - 1]),
+        "count": counts.tolist(),
+    }
+
+
+def lttb(t: np.ndarray, values: np.ndarray, points: int) -> Dict[str, list]:
+    """
+    Largest-Triangle-Three-Buckets downsampling to at most `points` samples.
+
+    Keeps the first and last sample, and from each bucket in between the
+    sample forming the largest triangle with the previously kept sample and
+    the next bucket's mean.
+
+    Returns:
+        Columnar {"t", "value"}
+    """
+    order = np.argsort(t, kind="stable")
+    t, values = t[order].astype(np.float64), values[order]
+    n = len(t)
+    if points >= n or points < 3:
+        return {"t": t.astype(np.int64).tolist(), "value": _round(values)}
+
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    # Mean point of every bucket, precomputed with cumulative sums
+    t_sum, v_sum = np.r_[0.0, np.cumsum(t)], np.r_[0.0, np.cumsum(values)]
+    lengths = np.maximum(edges[1:] - edges[:-1], 1)
+    t_mean = (t_sum[edges[1:]] - t_sum[edges[:-1]]) / lengths
+    v_mean = (v_sum[edges[1:]] - v_sum[edges[:-1]]) / lengths
+
+    selected = np.empty(points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], max(edges[i + 1], edges[i] + 1)
+        # Next bucket's mean (the last sample for the final bucket)
+        ct, cv = (t_mean[i + 1], v_mean[i + 1]) if i + 1 < len(t_mean) else (t[-1], values[-1])
+        at, av = t[a], values[a]
+        area = np.abs((at - ct) * (values[lo:hi] - av) - (at - t[lo:hi]) * (cv - av))
+        a = lo + int(area.argmax())
+        selected[i + 1] = a
+    return {"t": t[selected].astype(np.int64).tolist(), "value": _round(values[selected])}
+
+
+def query(
+    columns: Dict[str, Any],
+    fields: List[str],
+    start_ms: int,
+    end_ms: int,
+    bucket_ms: Optional[int] = None,
+    mode: str = "aggregate",
+    points: int = 500
+) -> Dict[str, Any]:
+    """
+    Run an aggregate or LTTB query over columns already limited to [start_ms, end_ms).
+
+    Args:
+        fields: Names from field_names()
+        bucket_ms: Bucket width for "aggregate" (widened to keep <= MAX_BUCKETS;
+            None = the range split into `points` buckets)
+        mode: "aggregate" (per-bucket min/max/mean/last) or "lttb"
+        points: Point budget for "lttb" (and the default bucket count)
+
+    Raises:
+        ValueError: For unknown fields or modes
+    """
+    if mode not in ("aggregate", "lttb"):
+        raise ValueError(f"Unknown mode {mode!r} (aggregate or lttb)")
+    points = max(3, min(points, MAX_POINTS))
+    span = max(1, end_ms - start_ms)
+    if bucket_ms is None:
+        bucket_ms = -(-span // points)
+    bucket_ms = max(1, int(bucket_ms), -(-span // MAX_BUCKETS))
+
+    series = {}
+    for field in fields:
+        t, values = field_values(columns, field)
+        series[field] = bucket_aggregate(t, values, start_ms, bucket_ms) if mode == "aggregate" else lttb(t, values, points)
+    result = {"start": start_ms, "end": end_ms, "mode": mode, "series": series}
+    if mode == "aggregate":
+        result["bucket_ms"] = bucket_ms
+    else:
+        result["points"] = points
+    return result
+
+
+def _round(values: np.ndarray) -> list:
+    return np.round(values, 6).tolist()
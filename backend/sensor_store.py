@@ -0,0 +1,292 @@
+"""
+Sensor Store Module.
+Columnar ring buffer for mobile sensor samples. Each field lives in a
+preallocated NumPy column (accelerometer/gyroscope/magnetometer xyz, GPS,
+light, pressure, proximity, timestamps) with a head pointer and a per-sensor
+validity mask, so a sample costs ~150 bytes instead of a nested dict, the
+oldest sample is overwritten in O(1) and the latest-N view is a slice.
+Per-sensor coverage counts are maintained on insert for /stats.
+
+Each sample also gets a server-clock time ("t_ms") for range queries: the
+receive time minus the client-reported offset to the newest sample of its
+upload, so batched samples keep their spacing and client clock or timezone
+errors do not shift them.
+"""
+
+import threading
+import warnings
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+Sample = Dict[str, Any]
+
+# Nested sensor readings: name -> (component fields, dtype)
+VECTOR_SENSORS = {
+    "accelerometer": (("x", "y", "z"), np.float32),
+    "gyroscope": (("x", "y", "z"), np.float32),
+    "magnetometer": (("x", "y", "z"), np.float32),
+    "gps": (("latitude", "longitude", "altitude", "speed", "accuracy"), np.float64),
+}
+# Single-value readings
+SCALAR_SENSORS = ("proximity", "ambientLight", "pressure")
+
+# Longest client timestamp kept (ISO 8601 with microseconds and offset)
+_TIMESTAMP_DTYPE = "S32"
+
+
+class SensorStore:
+    """Fixed-capacity columnar history of sensor samples, oldest overwritten first."""
+
+    def __init__(self, capacity: int = 1000, on_append: Optional[Callable[..., None]] = None):
+        """
+        Initialize the store.
+
+        Args:
+            capacity: Maximum samples kept
+            on_append: Called with (t_ms, received_at, client_ms, timestamp, readings, valid)
+                for every appended batch, e.g. to write it through to disk
+        """
+        self.capacity = max(1, capacity)
+        self.on_append = on_append
+        self.received_at = np.zeros(self.capacity, dtype=np.int64)
+        self.t_ms = np.zeros(self.capacity, dtype=np.int64)
+        self.timestamp = np.zeros(self.capacity, dtype=_TIMESTAMP_DTYPE)
+        self.vectors = {
+            name: np.zeros((self.capacity, len(fields)), dtype=dtype)
+            for name, (fields, dtype) in VECTOR_SENSORS.items()
+        }
+        self.scalars = {name: np.zeros(self.capacity, dtype=np.float32) for name in SCALAR_SENSORS}
+        self.valid = {
+            name: np.zeros(self.capacity, dtype=bool)
+            for name in list(VECTOR_SENSORS) + list(SCALAR_SENSORS)
+        }
+        self._coverage = {name: 0 for name in self.valid}
+        self._head = 0   # Next slot to write
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the columns."""
+        columns = [self.received_at, self.t_ms, self.timestamp, *self.vectors.values(), *self.scalars.values(), *self.valid.values()]
+        return sum(column.nbytes for column in columns)
+
+    def append(self, sample: Sample, received_at: int) -> int:
+        """Store one sample (SensorDataIn.dict() layout); returns the stored count."""
+        return self.append_many([sample], received_at)
+
+    def append_many(self, samples: Sequence[Sample], received_at: int) -> int:
+        """
+        Store a batch of samples in arrival order.
+
+        Args:
+            samples: Dicts with "timestamp" and optional nested sensor readings
+            received_at: Server receive time in epoch milliseconds
+
+        Returns:
+            Number of samples stored afterwards
+        """
+        samples = list(samples)[-self.capacity:]
+        n = len(samples)
+        if n == 0:
+            return self._count
+
+        # Gather each column for the whole batch, then write it with one slice assignment
+        timestamps = [str(s.get("timestamp") or "").encode("ascii", "replace")[:32] for s in samples]
+        readings, valid = {}, {}
+        for name, (fields, dtype) in VECTOR_SENSORS.items():
+            values = [s.get(name) for s in samples]
+            mask = np.array([r is not None for r in values], dtype=bool)
+            column = np.zeros((n, len(fields)), dtype=dtype)
+            if mask.any():
+                column[mask] = [[r[f] for f in fields] for r in values if r is not None]
+            readings[name], valid[name] = column, mask
+        for name in SCALAR_SENSORS:
+            values = [s.get(name) for s in samples]
+            valid[name] = np.array([r is not None for r in values], dtype=bool)
+            readings[name] = np.array([r if r is not None else 0.0 for r in values], dtype=np.float32)
+        timestamps = np.array(timestamps, dtype=_TIMESTAMP_DTYPE)
+        return self.append_columns(timestamps, readings, valid, received_at, _parse_client_ms(timestamps))
+
+    def append_columns(
+        self,
+        timestamp: np.ndarray,
+        readings: Dict[str, np.ndarray],
+        valid: Dict[str, np.ndarray],
+        received_at: int,
+        client_ms: Optional[np.ndarray] = None
+    ) -> int:
+        """
+        Store a batch already in columnar form (e.g. a decoded binary upload).
+
+        Args:
+            timestamp: (n,) client timestamps (ISO 8601 strings or bytes)
+            readings: Sensor name -> (n, k) or (n,) values; missing sensors are invalid
+            valid: Sensor name -> (n,) bool, True where the reading is present
+            received_at: Server receive time in epoch milliseconds
+            client_ms: (n,) client times in epoch ms, for sample spacing (None = all at received_at)
+
+        Returns:
+            Number of samples stored afterwards
+        """
+        n = len(timestamp)
+        t_ms = _anchor_times(client_ms, received_at, n)
+        if self.on_append is not None and n:
+            self.on_append(t_ms, received_at, t_ms if client_ms is None else client_ms, timestamp, readings, valid)
+        if n > self.capacity:
+            t_ms = t_ms[-self.capacity:]
+            timestamp = timestamp[-self.capacity:]
+            readings = {name: values[-self.capacity:] for name, values in readings.items()}
+            valid = {name: mask[-self.capacity:] for name, mask in valid.items()}
+            n = self.capacity
+        if n == 0:
+            return self._count
+
+        with self._lock:
+            slots = (self._head + np.arange(n)) % self.capacity
+            # Overwritten slots no longer count towards coverage
+            overwritten = slots[:max(0, self._count + n - self.capacity)]
+            for name, mask in self.valid.items():
+                self._coverage[name] -= int(mask[overwritten].sum())
+
+            self.received_at[slots] = received_at
+            self.t_ms[slots] = t_ms
+            self.timestamp[slots] = timestamp
+            for name, mask in self.valid.items():
+                if name in readings:
+                    column = self.vectors[name] if name in self.vectors else self.scalars[name]
+                    column[slots] = readings[name]
+                    mask[slots] = valid[name]
+                    self._coverage[name] += int(np.count_nonzero(valid[name]))
+                else:
+                    mask[slots] = False
+
+            self._head = (self._head + n) % self.capacity
+            self._count = min(self.capacity, self._count + n)
+            return self._count
+
+    def columns(self, n: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Newest n samples as column copies, oldest first.
+
+        Returns:
+            {"received_at", "t_ms", "timestamp", <vector sensor> (n, k),
+            <scalar sensor> (n,), "valid": {sensor: (n,) bool}}
+        """
+        with self._lock:
+            return self._gather(self._slots(n))
+
+    def range_columns(self, start_ms: int, end_ms: int) -> Dict[str, np.ndarray]:
+        """Samples with start_ms <= t_ms < end_ms as column copies (same layout as columns())."""
+        with self._lock:
+            slots = self._slots(None)
+            t = self.t_ms[slots]
+            return self._gather(slots[(t >= start_ms) & (t < end_ms)])
+
+    def count_since(self, t_ms: int) -> int:
+        """Samples with t_ms >= t_ms (e.g. for a sample rate)."""
+        with self._lock:
+            return int(np.count_nonzero(self.t_ms[self._slots(None)] >= t_ms))
+
+    def first_t_ms(self) -> Optional[int]:
+        """Server-clock time of the oldest sample."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return int(self.t_ms[(self._head - self._count) % self.capacity])
+
+    def last_t_ms(self) -> Optional[int]:
+        """Server-clock time of the newest sample."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return int(self.t_ms[(self._head - 1) % self.capacity])
+
+    def latest_timestamp(self) -> Optional[str]:
+        """Client timestamp of the newest sample."""
+        with self._lock:
+            if self._count == 0:
+                return None
+            return self.timestamp[(self._head - 1) % self.capacity].decode("ascii")
+
+    def coverage(self) -> Dict[str, int]:
+        """Stored samples that include each sensor (maintained on insert)."""
+        with self._lock:
+            return dict(self._coverage)
+
+    def clear(self):
+        with self._lock:
+            for mask in self.valid.values():
+                mask[:] = False
+            self._coverage = {name: 0 for name in self.valid}
+            self._head = 0
+            self._count = 0
+
+    def _gather(self, slots: np.ndarray) -> Dict[str, np.ndarray]:
+        return {
+            "received_at": self.received_at[slots],
+            "t_ms": self.t_ms[slots],
+            "timestamp": self.timestamp[slots],
+            **{name: column[slots] for name, column in self.vectors.items()},
+            **{name: column[slots] for name, column in self.scalars.items()},
+            "valid": {name: mask[slots] for name, mask in self.valid.items()},
+        }
+
+    def _slots(self, n: Optional[int]) -> np.ndarray:
+        """Ring slots of the newest n samples, oldest first."""
+        n = self._count if n is None else max(0, min(n, self._count))
+        return (self._head - n + np.arange(n)) % self.capacity
+
+
+def samples_from_columns(cols: Dict[str, Any]) -> List[Sample]:
+    """Per-sample dicts from a columns() dict ("deviceId" added if it has a "device" column)."""
+    valid = cols["valid"]
+    timestamps = np.char.decode(cols["timestamp"], "ascii").tolist()
+    received = cols["received_at"].tolist()
+    devices = cols["device"].tolist() if "device" in cols else None
+    # Convert each column to Python lists once instead of per element
+    vectors = {name: (_to_list(cols[name]), valid[name].tolist()) for name in VECTOR_SENSORS}
+    scalars = {name: (_to_list(cols[name]), valid[name].tolist()) for name in SCALAR_SENSORS}
+
+    samples = []
+    for i in range(len(received)):
+        sample = {"timestamp": timestamps[i]}
+        if devices is not None:
+            sample["deviceId"] = devices[i]
+        for name, (values, mask) in vectors.items():
+            sample[name] = dict(zip(VECTOR_SENSORS[name][0], values[i])) if mask[i] else None
+        for name, (values, mask) in scalars.items():
+            sample[name] = values[i] if mask[i] else None
+        sample["server_received_at"] = received[i]
+        samples.append(sample)
+    return samples
+
+
+def _parse_client_ms(timestamps: np.ndarray) -> Optional[np.ndarray]:
+    """ISO 8601 client timestamps as epoch ms (None if any fails to parse)."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # NumPy warns about explicit UTC offsets
+            return np.char.decode(timestamps, "ascii").astype("datetime64[ms]").astype(np.int64)
+    except ValueError:
+        return None
+
+
+def _anchor_times(client_ms: Optional[np.ndarray], received_at: int, n: int) -> np.ndarray:
+    """Server-clock sample times: the newest sample at received_at, the rest at their client offsets."""
+    if client_ms is None:
+        return np.full(n, received_at, dtype=np.int64)
+    client_ms = np.asarray(client_ms, dtype=np.int64)
+    return received_at - (client_ms.max() - client_ms)
+
+
+def _to_list(column: np.ndarray) -> list:
+    """Python floats; float32 columns are rounded so 9.81 reads back as 9.81."""
+    if column.dtype == np.float32:
+        column = column.astype(np.float64).round(6)
+    return column.tolist()
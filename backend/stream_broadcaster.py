@@ -0,0 +1,308 @@
+"""
+Stream Broadcaster Module.
+Runs a single inference loop per camera source and publishes the annotated
+frames and detection results to any number of subscribers, so YOLO cost per
+camera stays constant no matter how many viewers are attached.
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from async_stream import AsyncFrameNotifier
+from camera_reader import CameraReader
+
+
+# processor(frame, frame_index) -> (annotated_frame, detections, inferred)
+FrameProcessor = Callable[[np.ndarray, int], Tuple[np.ndarray, List[Dict[str, Any]], bool]]
+
+# (sequence number, publish timestamp in seconds, annotated frame, detections)
+PublishedFrame = Tuple[int, float, np.ndarray, List[Dict[str, Any]]]
+
+# Distinguishes broadcasters of the same source: sequence numbers restart per broadcaster
+_generations = itertools.count(1)
+
+
+class Subscription:
+    """Handle returned by CameraBroadcaster.subscribe(); use as a context manager."""
+
+    def __init__(self, broadcaster: "CameraBroadcaster"):
+        self.broadcaster = broadcaster
+        self.last_seq = 0
+        self.closed = False
+
+    async def next_frame_async(self, timeout: float = 1.0) -> Optional[PublishedFrame]:
+        """
+        Wait for a frame newer than the last one this subscriber received.
+
+        Frames published while the subscriber was busy are skipped, so a slow
+        consumer always gets the newest frame rather than a backlog.
+
+        Returns:
+            (seq, timestamp, annotated_frame, detections), or None on timeout
+        """
+        return self._advance(await self.broadcaster.wait_for_frame_async(self.last_seq, timeout))
+
+    def _advance(self, published: Optional[PublishedFrame]) -> Optional[PublishedFrame]:
+        if published is not None:
+            if self.last_seq:
+                # Frames this subscriber was too slow to receive
+                self.broadcaster.frames_skipped += max(0, published[0] - self.last_seq - 1)
+            self.last_seq = published[0]
+        return published
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.broadcaster.unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CameraBroadcaster:
+    """Single inference loop for one camera, fanned out to many subscribers."""
+
+    def __init__(
+        self,
+        source: Any,
+        reader: CameraReader,
+        processor: FrameProcessor,
+        placeholder: Callable[[], np.ndarray],
+        idle_timeout: float = 10.0
+    ):
+        """
+        Initialize the broadcaster (the loop starts with the first subscriber).
+
+        Args:
+            source: Camera source this broadcaster serves
+            reader: Background reader delivering raw frames
+            processor: Callable running detection and drawing overlays
+            placeholder: Callable returning a frame to show while the camera is down
+            idle_timeout: Seconds without subscribers before the loop stops
+        """
+        self.source = source
+        self.reader = reader
+        self.processor = processor
+        self.placeholder = placeholder
+        self.idle_timeout = idle_timeout
+
+        self._cond = threading.Condition()
+        self._notifier = AsyncFrameNotifier()
+        self._subscribers: List[Subscription] = []
+        self._published: Optional[PublishedFrame] = None
+        self._seq = 0
+        self.generation = next(_generations)
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self._idle_since: Optional[float] = None
+
+        # Rolling rate statistics (exponential moving averages)
+        self._publish_fps = 0.0
+        self._inference_fps = 0.0
+        self._inference_ms = 0.0
+        self._last_publish_ts: Optional[float] = None
+        self._last_inference_ts: Optional[float] = None
+        self.frames_inferred = 0
+        self.frames_skipped = 0  # Published frames slow subscribers never received
+
+    def subscribe(self) -> Subscription:
+        """Attach a new subscriber, starting the inference loop if needed."""
+        subscription = Subscription(self)
+        with self._cond:
+            self._subscribers.append(subscription)
+            self._idle_since = None
+            if not self._running:
+                self._running = True
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name=f"broadcaster-{self.source}",
+                    daemon=True
+                )
+                self._thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Detach a subscriber; the loop stops after idle_timeout with none left."""
+        with self._cond:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if not self._subscribers:
+                self._idle_since = time.time()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop the inference loop immediately."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+            self._notifier.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=timeout)
+        self._thread = None
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def latest(self) -> Optional[PublishedFrame]:
+        """Newest published frame and detections, without blocking."""
+        with self._cond:
+            return self._published
+
+    async def wait_for_frame_async(self, after_seq: int, timeout: float = 1.0) -> Optional[PublishedFrame]:
+        """Wait for a published frame newer than after_seq (None on timeout) without blocking a thread."""
+        await self._notifier.wait(lambda: self._seq > after_seq or not self._running, timeout)
+        with self._cond:
+            return self._published if self._seq > after_seq else None
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-camera status for the /video_feed/status endpoint."""
+        with self._cond:
+            subscribers = len(self._subscribers)
+            published = self._published
+        return {
+            "source": str(self.source),
+            "running": self._running,
+            "subscribers": subscribers,
+            "publish_fps": round(self._publish_fps, 1),
+            "inference_fps": round(self._inference_fps, 1),
+            "inference_ms": round(self._inference_ms, 1),
+            "frames_published": self._seq,
+            "frames_inferred": self.frames_inferred,
+            "frames_skipped": self.frames_skipped,
+            "detections": len(published[3]) if published else 0,
+            "camera": self.reader.stats(),
+        }
+
+    def _publish(self, frame: np.ndarray, detections: List[Dict[str, Any]]):
+        now = time.time()
+        if self._last_publish_ts is not None and now > self._last_publish_ts:
+            self._publish_fps = _ema(self._publish_fps, 1.0 / (now - self._last_publish_ts))
+        self._last_publish_ts = now
+
+        with self._cond:
+            self._seq += 1
+            self._published = (self._seq, now, frame, detections)
+            self._cond.notify_all()
+            self._notifier.notify()
+
+    def _record_inference(self, started: float):
+        now = time.time()
+        self.frames_inferred += 1
+        self._inference_ms = _ema(self._inference_ms, (now - started) * 1000)
+        if self._last_inference_ts is not None and now > self._last_inference_ts:
+            self._inference_fps = _ema(self._inference_fps, 1.0 / (now - self._last_inference_ts))
+        self._last_inference_ts = now
+
+    def _idle_expired(self) -> bool:
+        with self._cond:
+            if self._subscribers or self._idle_since is None:
+                return False
+            if time.time() - self._idle_since < self.idle_timeout:
+                return False
+            self._running = False
+            self._cond.notify_all()
+            self._notifier.notify()
+            return True
+
+    def _run(self):
+        """Inference loop: newest camera frame -> processor -> subscribers."""
+        print(f"[INFO] Broadcaster started for camera {self.source}")
+        last_seq = 0
+        frame_index = 0
+
+        while self._running:
+            if self._idle_expired():
+                break
+
+            latest = self.reader.wait_for_frame(last_seq, timeout=1.0)
+            if latest is None:
+                frame = self.placeholder()
+            else:
+                last_seq, _, frame = latest
+
+            frame_index += 1
+            started = time.time()
+            try:
+                annotated, detections, inferred = self.processor(frame, frame_index)
+            except Exception as e:
+                print(f"[ERROR] Frame processing error on camera {self.source}: {e}")
+                annotated, detections, inferred = frame, [], False
+
+            if inferred:
+                self._record_inference(started)
+            self._publish(annotated, detections)
+
+        print(f"[INFO] Broadcaster stopped for camera {self.source}")
+
+
+def _ema(current: float, sample: float, alpha: float = 0.1) -> float:
+    return sample if current == 0 else (1 - alpha) * current + alpha * sample
+
+
+# Registry of broadcasters, one per source
+_broadcasters: Dict[str, CameraBroadcaster] = {}
+_broadcasters_lock = threading.Lock()
+
+
+def get_broadcaster(
+    source: Any,
+    reader: CameraReader,
+    processor_factory: Callable[[Any], FrameProcessor],
+    placeholder: Callable[[], np.ndarray]
+) -> CameraBroadcaster:
+    """
+    Get the broadcaster for a source, creating one if needed.
+
+    Args:
+        source: Camera source
+        reader: Background reader for the source
+        processor_factory: Called with the source once per new broadcaster to build its processor
+        placeholder: Frame factory used while the camera is unavailable
+    """
+    key = str(source)
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.get(key)
+        if broadcaster is None or broadcaster.reader is not reader:
+            if broadcaster is not None:
+                broadcaster.stop()
+            broadcaster = CameraBroadcaster(source, reader, processor_factory(source), placeholder)
+            _broadcasters[key] = broadcaster
+        return broadcaster
+
+
+def get_existing_broadcaster(source: Any) -> Optional[CameraBroadcaster]:
+    """Look up the broadcaster for a source without creating one."""
+    with _broadcasters_lock:
+        return _broadcasters.get(str(source))
+
+
+def release_broadcaster(source: Any) -> bool:
+    """Stop and forget the broadcaster for a source."""
+    with _broadcasters_lock:
+        broadcaster = _broadcasters.pop(str(source), None)
+    if broadcaster is None:
+        return False
+    broadcaster.stop()
+    return True
+
+
+def release_all():
+    """Stop every broadcaster (used on shutdown)."""
+    with _broadcasters_lock:
+        broadcasters = list(_broadcasters.values())
+        _broadcasters.clear()
+    for broadcaster in broadcasters:
+        broadcaster.stop()
+
+
+def all_stats() -> List[Dict[str, Any]]:
+    """Status of every known broadcaster."""
+    with _broadcasters_lock:
+        broadcasters = list(_broadcasters.values())
+    return [b.stats() for b in broadcasters]
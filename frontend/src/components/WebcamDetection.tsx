@@ -41,6 +41,7 @@ export function WebcamDetection() {
     confidence: 0,
   });
   const detectionIntervalRef = useRef<number | null>(null);
+  const alertStreamRef = useRef<EventSource | null>(null);
   const lastAlertTimeRef = useRef<number>(0);
   const { addAlert, updateCameraFeed } = useApp();
 
@@ -178,6 +179,10 @@ export function WebcamDetection() {
       clearInterval(detectionIntervalRef.current);
       detectionIntervalRef.current = null;
     }
+    if (alertStreamRef.current) {
+      alertStreamRef.current.close();
+      alertStreamRef.current = null;
+    }
 
     try {
       // Stop the video stream by removing the src and setting a blank image
@@ -207,44 +212,43 @@ export function WebcamDetection() {
   };
 
   const startStatusPolling = () => {
-    // Poll for alerts and update status
-    if (detectionIntervalRef.current) {
-      clearInterval(detectionIntervalRef.current);
+    // Subscribe to pushed alerts instead of polling /alerts; EventSource
+    // reconnects on its own and resumes after the last received alert id
+    if (alertStreamRef.current) {
+      alertStreamRef.current.close();
     }
 
-    detectionIntervalRef.current = window.setInterval(async () => {
+    const apiUrl = import.meta.env.VITE_API_URL || "http://localhost:8001";
+    const source = new EventSource(`${apiUrl}/alerts/stream`);
+    source.addEventListener("alert", (event) => {
       try {
-        const apiUrl = import.meta.env.VITE_API_URL || "http://localhost:8001";
-
-        // Fetch latest alerts
-        const alertsResponse = await fetch(`${apiUrl}/alerts`);
-        const alertsData = await alertsResponse.json();
-
-        if (alertsData.data && alertsData.data.length > 0) {
-          const latestAlert = alertsData.data[alertsData.data.length - 1];
-
-          // Update detection status based on alerts
-          if (
-            latestAlert.type === "no_helmet" ||
-            latestAlert.type === "NO_HELMET"
-          ) {
-            setDetectionStatus({
-              personDetected: true,
-              helmetDetected: false,
-              confidence: 0.9,
-            });
-          } else {
-            setDetectionStatus({
-              personDetected: true,
-              helmetDetected: true,
-              confidence: 0.9,
-            });
-          }
+        const latestAlert = JSON.parse((event as MessageEvent).data);
+
+        // Update detection status based on alerts
+        if (
+          latestAlert.type === "no_helmet" ||
+          latestAlert.type === "NO_HELMET"
+        ) {
+          setDetectionStatus({
+            personDetected: true,
+            helmetDetected: false,
+            confidence: 0.9,
+          });
+        } else {
+          setDetectionStatus({
+            personDetected: true,
+            helmetDetected: true,
+            confidence: 0.9,
+          });
         }
       } catch (error) {
-        console.error("Error polling status:", error);
+        console.error("Error reading alert event:", error);
       }
-    }, 2000); // Poll every 2 seconds
+    });
+    source.onerror = () => {
+      console.warn("Alert stream interrupted, reconnecting...");
+    };
+    alertStreamRef.current = source;
   };
 
   const startDetection = async () => {
@@ -6,19 +6,27 @@ Install dependencies: pip install flask flask-cors
 from flask import Flask, request, jsonify, render_template_string
 from flask_cors import CORS
 from datetime import datetime
+import atexit
 import json
 import os
 
+from sensor_log import SensorLogWriter
+
 app = Flask(__name__)
 CORS(app)
 
 # Store data in memory
 sensor_data_history = []
 
-# Create logs directory
+# Samples are appended to rotating NDJSON segments in sensor_logs/ by a
+# background writer (see sensor_log.py); requests never touch the disk
 LOGS_DIR = 'sensor_logs'
-if not os.path.exists(LOGS_DIR):
-    os.makedirs(LOGS_DIR)
+sensor_log = SensorLogWriter(
+    LOGS_DIR,
+    max_segment_bytes=int(os.environ.get('SENSOR_LOG_SEGMENT_MB', 64)) * 1024 * 1024,
+    max_segment_age=float(os.environ.get('SENSOR_LOG_SEGMENT_SECONDS', 300)),
+).start()
+atexit.register(sensor_log.stop)
 
 @app.route('/api/sensor-data', methods=['POST'])
 def receive_sensor_data():
@@ -34,10 +42,8 @@ def receive_sensor_data():
     if len(sensor_data_history) > 1000:
         sensor_data_history.pop(0)
     
-    # Save to file (optional)
-    filename = os.path.join(LOGS_DIR, f"sensor_data_{datetime.now().timestamp()}.json")
-    with open(filename, 'w') as f:
-        json.dump(sensor_data, f, indent=2)
+    # Persist (queued; written in batches by the log writer)
+    sensor_log.append(sensor_data)
     
     return jsonify({
         'success': True,
@@ -53,6 +59,7 @@ def receive_batch_data():
     print(f"Received {len(batch_data)} sensor data entries")
     
     sensor_data_history.extend(batch_data)
+    sensor_log.extend(batch_data)
     
     # Keep only last 1000 entries
     if len(sensor_data_history) > 1000:
@@ -82,12 +89,27 @@ def clear_history():
     sensor_data_history.clear()
     return jsonify({'success': True, 'message': 'History cleared'})
 
+@app.route('/api/sensor-logs', methods=['GET'])
+def list_log_segments():
+    """Segment index: file, time range (server ms), record count and size"""
+    return jsonify(sensor_log.segments())
+
+def process_rss_bytes():
+    """Resident memory of the server process (Linux only; None elsewhere)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'ok',
         'entriesStored': len(sensor_data_history),
+        'log': sensor_log.stats(),
+        'rssBytes': process_rss_bytes(),
         'timestamp': datetime.now().isoformat()
     })
 
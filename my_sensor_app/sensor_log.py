@@ -0,0 +1,208 @@
+"""
+Append-only sensor log for example_server.py
+
+Requests only put samples on an in-memory queue. A background thread drains
+it in batches and appends compact NDJSON lines (one sample per line) to the
+current segment file, rotating to a new segment by size or age. index.json
+lists every segment with its record count and time range, so readers can
+find the segments covering a time window without opening them. The index is
+rewritten (atomically) only when a segment is opened or closed, so the
+entry of the segment being written is final once it is closed. On rotation,
+the oldest segments are deleted beyond max_total_bytes or retention_days.
+
+Segment files are named segment_<first_ms>_<seq>.ndjson.
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+
+
+class SensorLogWriter:
+    """Batched background writer of size/time-rotated NDJSON segments."""
+
+    def __init__(self, directory, max_segment_bytes=64 * 1024 * 1024, max_segment_age=300.0,
+                 flush_interval=0.5, batch_size=5000, queue_size=100000,
+                 max_total_bytes=2 * 1024 * 1024 * 1024, retention_days=30.0):
+        """
+        Args:
+            directory: Where segments and index.json are written
+            max_segment_bytes: Rotate once a segment reaches this size
+            max_segment_age: Rotate once a segment is this many seconds old
+            max_total_bytes: Delete the oldest segments beyond this total size (0 = no cap)
+            retention_days: Delete segments whose newest sample is older (0 = keep all)
+            flush_interval: Longest time a sample waits in memory
+            batch_size: Most samples written per flush
+            queue_size: Samples buffered before new ones are dropped
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_total_bytes = max_total_bytes
+        self.retention_days = retention_days
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._segments = self._load_index()
+        self._next_seq = self._segment_seq(self._segments[-1]) + 1 if self._segments else 0
+        self._file = None
+        self._active = None
+        self._opened_at = 0.0
+        self._thread = None
+        self._running = False
+
+        self.written = 0
+        self.dropped = 0
+        self.deleted_segments = 0
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='sensor-log-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        """Flush what is queued and close the current segment."""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(None)
+        self._thread.join(timeout=timeout)
+
+    def append(self, sample, received_at=None):
+        """Queue one sample; never blocks the request."""
+        record = dict(sample)
+        record['server_received_at'] = received_at or int(time.time() * 1000)
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def extend(self, samples):
+        received_at = int(time.time() * 1000)
+        return sum(1 for sample in samples if self.append(sample, received_at))
+
+    def segments(self):
+        """Index entries: file, first/last server_received_at, records, bytes."""
+        return [dict(segment) for segment in self._segments]
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'segments': len(self._segments),
+            'deleted_segments': self.deleted_segments,
+        }
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f).get('segments', [])
+        except (OSError, ValueError):
+            return []
+
+    def _save_index(self):
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'segments': self._segments}, f)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _segment_seq(segment):
+        try:
+            return int(segment['file'].rsplit('_', 1)[1].split('.')[0])
+        except (IndexError, ValueError):
+            return 0
+
+    def _open_segment(self, first_ms):
+        name = f'segment_{first_ms}_{self._next_seq:06d}.ndjson'
+        self._next_seq += 1
+        self._file = open(os.path.join(self.directory, name), 'a', buffering=1024 * 1024)
+        self._active = {'file': name, 'first_ts': first_ms, 'last_ts': first_ms, 'records': 0, 'bytes': 0}
+        self._segments.append(self._active)
+        self._opened_at = time.monotonic()
+        self._apply_retention()
+        self._save_index()
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            self._active = None
+            self._save_index()
+
+    def _apply_retention(self):
+        """Delete the oldest closed segments beyond the size cap or retention period."""
+        cutoff = int((time.time() - self.retention_days * 86400) * 1000) if self.retention_days > 0 else None
+        total = sum(segment['bytes'] for segment in self._segments)
+        while len(self._segments) > 1 and self._segments[0] is not self._active:
+            oldest = self._segments[0]
+            over_size = self.max_total_bytes > 0 and total > self.max_total_bytes
+            expired = cutoff is not None and oldest['last_ts'] < cutoff
+            if not (over_size or expired):
+                break
+            try:
+                os.remove(os.path.join(self.directory, oldest['file']))
+            except FileNotFoundError:
+                pass
+            self._segments.pop(0)
+            total -= oldest['bytes']
+            self.deleted_segments += 1
+
+    def _write(self, batch):
+        if self._file is not None and (self._active['bytes'] >= self.max_segment_bytes
+                                       or time.monotonic() - self._opened_at >= self.max_segment_age):
+            self._close_segment()
+        if self._file is None:
+            self._open_segment(batch[0]['server_received_at'])
+
+        data = ''.join(json.dumps(record, separators=(',', ':')) + '\n' for record in batch)
+        self._file.write(data)
+        self._file.flush()
+        self._active['records'] += len(batch)
+        self._active['bytes'] += len(data)
+        self._active['last_ts'] = max(self._active['last_ts'], batch[-1]['server_received_at'])
+        self.written += len(batch)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._file is not None and time.monotonic() - self._opened_at >= self.max_segment_age:
+                    self._close_segment()
+                continue
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            item = first
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    self.dropped += len(batch)
+                    print(f"Failed to write {len(batch)} sensor samples: {e}")
+        self._close_segment()
@@ -23,10 +23,17 @@ V = CFG.get("vest_hsv", {})
 H_T = CFG.get("helmet_ratio_thresh", 0.10)
 V_T = CFG.get("vest_ratio_thresh", 0.15)
 PROX = CFG.get("proximity_pixels", 120)
+PERSON_DETECTOR = CFG.get("person_detector") or {}
 
 # Import detection modules
 try:
-    from detector import detect_persons
+    from detector import PersonDetector
+    # Built once: HOG descriptor / cascade reused for every frame
+    try:
+        detect_persons = PersonDetector.from_config(PERSON_DETECTOR).detect
+    except ValueError as e:
+        print(f"Invalid person_detector section in config.yaml: {e}")
+        sys.exit(1)
     from ppe import roi_slices, crop, mask_ratio_hsv
     from zones import centroid, in_polygon, draw_polygon
 except ImportError as e: